@@ -24,7 +24,14 @@ from multi_agent_system.components.system_operator import SystemOperator
 from multi_agent_system.components.storage import Storage
 from multi_agent_system.components.heat_exchanger import HeatExchanger
 from multi_agent_system.components.heat_pump import HeatPump
-from multi_agent_system.base.util import read_config, DynamicObject
+from multi_agent_system.components.aggregator import Aggregator
+from multi_agent_system.base.util import read_config
+from multi_agent_system.base.executor import trade_round, trading_executor
+from multi_agent_system.base.fleet import assess_fleet
+from multi_agent_system.base.billing import BalancingEnergyBilling
+from multi_agent_system.base.schedule import ProductSchedule
+from multi_agent_system.base.templates import clear_templates, shared_dynamic_object
+from multi_agent_system.models.registry import load_model_plugins
 
 
 class EtaHeatingSystemsMas(RuleBased):
@@ -65,57 +72,76 @@ class EtaHeatingSystemsMas(RuleBased):
             self.config['environment_specific']['date_format'])
         self.time = 0
         self.min_product = min(list(self.products.keys()))
-        self.ambient_temperature = DynamicObject(
+        # templates of a previous multi agent system within this process are dropped
+        clear_templates()
+        self.ambient_temperature = shared_dynamic_object(
             filename=self.config['environment_specific']['ambient_temperature'],
             sheet_name='ambient_temperature')
 
-        # number of trading steps between shortest and longest product
-        # longer products must be multiples of shortest product
-        self.num_trading_steps = int(max(list(self.products.keys())) / self.min_product)
+        # product schedule compiled once and passed to all agents - traded products and horizons per trading step
+        self.schedule = ProductSchedule(self.products)
+        self.num_trading_steps = self.schedule.num_trading_steps
         self.trading_step = 0
         self.num_control_steps = int(self.min_product / self.sampling_time)
         self.control_step = 0
 
+        # import modules registering additional (third-party) models
+        load_model_plugins(self.config['environment_specific'].get('model_plugins', []))
+
         # instantiate agents
         self.traders = {}
         self.markets = {}
+        self.aggregators = {}
         self.agent_inputs = {}
         for agent in self.config['agents']:
             if agent['type'] == 'market':
                 self.markets[agent['name']] = Market(agent_name=agent['name'],
                                                      agent_type=agent['type'],
                                                      agent_config=agent['config'],
-                                                     experiment_config=self.config['environment_specific'])
+                                                     experiment_config=self.config['environment_specific'],
+                                                     schedule=self.schedule)
             elif agent['type'] == 'converter':
                 self.traders[agent['name']] = Converter(agent_name=agent['name'],
                                                         agent_type=agent['type'],
                                                         agent_config=agent['config'],
-                                                        experiment_config=self.config['environment_specific'])
+                                                        experiment_config=self.config['environment_specific'],
+                                                        schedule=self.schedule)
             elif agent['type'] == 'consumer':
                 self.traders[agent['name']] = Consumer(agent_name=agent['name'],
                                                        agent_type=agent['type'],
                                                        agent_config=agent['config'],
-                                                       experiment_config=self.config['environment_specific'])
+                                                       experiment_config=self.config['environment_specific'],
+                                                       schedule=self.schedule)
             elif agent['type'] == 'system_operator':
                 self.traders[agent['name']] = SystemOperator(agent_name=agent['name'],
                                                              agent_type=agent['type'],
                                                              agent_config=agent['config'],
-                                                             experiment_config=self.config['environment_specific'])
+                                                             experiment_config=self.config['environment_specific'],
+                                                             schedule=self.schedule)
             elif agent['type'] == 'storage':
                 self.traders[agent['name']] = Storage(agent_name=agent['name'],
                                                       agent_type=agent['type'],
                                                       agent_config=agent['config'],
-                                                      experiment_config=self.config['environment_specific'])
+                                                      experiment_config=self.config['environment_specific'],
+                                                      schedule=self.schedule)
             elif agent['type'] == 'heat_exchanger':
                 self.traders[agent['name']] = HeatExchanger(agent_name=agent['name'],
                                                             agent_type=agent['type'],
                                                             agent_config=agent['config'],
-                                                            experiment_config=self.config['environment_specific'])
+                                                            experiment_config=self.config['environment_specific'],
+                                                            schedule=self.schedule)
             elif agent['type'] == 'heat_pump':
                 self.traders[agent['name']] = HeatPump(agent_name=agent['name'],
                                                        agent_type=agent['type'],
                                                        agent_config=agent['config'],
-                                                       experiment_config=self.config['environment_specific'])
+                                                       experiment_config=self.config['environment_specific'],
+                                                       schedule=self.schedule)
+            elif agent['type'] == 'aggregator':
+                self.aggregators[agent['name']] = Aggregator(agent_name=agent['name'],
+                                                             agent_type=agent['type'],
+                                                             agent_config=agent['config'],
+                                                             experiment_config=self.config['environment_specific'],
+                                                             schedule=self.schedule)
             else:
                 print('[ERROR] ', agent['name'], ': agent type does not exist.')
 
@@ -125,8 +151,30 @@ class EtaHeatingSystemsMas(RuleBased):
         # start agents
         for (_, market) in self.markets.items():
             market.setup_agent()
+        # orders of members are sent to markets via their aggregator
+        self.order_routes = {}
+        for (_, aggregator) in self.aggregators.items():
+            aggregator.setup_agent()
+            self.order_routes.update({route: aggregator for route in aggregator.routes()})
+        # traders register their product allocation and participation in product schedule
         for (_, trader) in self.traders.items():
             trader.setup_agent()
+        # curve orders are only placed on markets clearing curve orders
+        curve_order_markets = [name for (name, market) in self.markets.items() if market.is_curve_orders]
+        for (_, trader) in self.traders.items():
+            trader.set_curve_order_markets(curve_order_markets)
+
+        # optional thread or process pool to evaluate traders concurrently within a trading round
+        self.trading_executor = trading_executor(
+            kind=self.config['environment_specific'].get('trading_executor', 'thread'),
+            workers=self.config['environment_specific'].get('trading_workers', 1),
+            model_plugins=self.config['environment_specific'].get('model_plugins', []))
+        # assess quantities of traders sharing a capacity model in one vectorized call
+        self.is_fleet_assessment = self.config['environment_specific'].get('fleet_quantity_assessment', False)
+        # assess quantities of all lead times of a product with disjoint horizons in one vectorized call
+        self.is_batch_assessment = self.config['environment_specific'].get('lead_time_batch_assessment', False)
+        # bill balancing energy of all traders in one vectorized step
+        self.billing = BalancingEnergyBilling(self.traders)
 
         self.fHeatEnergy_WMZ300 = 0
 
@@ -394,56 +442,39 @@ class EtaHeatingSystemsMas(RuleBased):
 
         # trading, clearing, logging
         if self.control_step == 0:
-            # tradable products in this trading time step, 0 entry is always balancing energy
-            if self.trading_step == 0:
-                tradable_products = self.products
-            else:
-                tradable_products = {
-                    product: lead_times for (
-                        product, lead_times) in self.products.items() if (
-                        self.trading_step) %
-                    (product / self.min_product) == 0}
-
-            # descending sorted list of tradable products -> trade and clear longtime product before shorttime product
-            for product in sorted(list(tradable_products.keys()), reverse=True):
-                # lead time of traded product
-                lead_times = self.products[product]
-
-                # iterate over lead time and start with longest lead time
-                for lead_time in sorted(lead_times, reverse=True):
-                    # return bids from trading process as msgs
-                    trader_msgs = [
-                        agent.trade(
-                            product={
-                                'product_type': product,
-                                'lead_time': lead_time}) for _,
-                        agent in self.traders.items()]
-
-                    # iterate over msgs and mpa them to markets
-                    for msg in trader_msgs:
-                        for sub_msg in msg:
-                            eval("self.markets['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
+            # tradable products in this trading step in trading order - longtime product before shorttime product,
+            # longest lead time first. lead times of one product with disjoint horizons form a batch, whose quantities
+            # can be assessed at once before trading
+            for batch in self.schedule.batches[self.trading_step]:
+                quantities = {}
+                if self.is_batch_assessment and len(batch) > 1:
+                    quantities = assess_fleet([(self.traders[name], entry['product'])
+                                               for entry in batch for name in entry['participants']])
+
+                for entry in batch:
+                    product = entry['product']
+
+                    # return bids from trading process of participating traders as msgs
+                    trader_msgs = trade_round(
+                        traders=[self.traders[name] for name in entry['participants']], product=product,
+                        quantities=quantities, executor=self.trading_executor,
+                        is_fleet_assessment=self.is_fleet_assessment)
+
+                    # map msgs to markets - orders of members are merged by aggregators
+                    self.__route_orders(product=product, trader_msgs=trader_msgs)
 
                     # perform clearing and return market messages
                     market_msgs = [
-                        agent.clear(
-                            product={
-                                'product_type': product,
-                                'lead_time': lead_time},
-                            experiment_time=self.scenario_time) for _,
+                        agent.clear(product=product, experiment_time=self.scenario_time) for _,
                         agent in self.markets.items()]
 
-                    # iterate over market messages and map them to traders
-                    for msg in market_msgs:
-                        for sub_msg in msg:
-                            eval("self.traders['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
+                    # map market messages to traders - trades of aggregators are disaggregated to their members
+                    self.__distribute_trades(product=product, market_msgs=market_msgs)
 
             # return balancing energy price from last trading period and pass them to market participants
             balancing_energy_msgs = [agent.return_balancing_energy_price() for _,
                                      agent in self.traders.items() if agent.return_agent_type() == 'system_operator']
-            for msg in balancing_energy_msgs:
-                for sub_msg in msg:
-                    eval("self.traders['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
+            self.billing.bill([sub_msg for msg in balancing_energy_msgs for sub_msg in msg])
 
             # raise trading step
             self.trading_step += 1
@@ -479,6 +510,44 @@ class EtaHeatingSystemsMas(RuleBased):
 
         return action
 
+    def __route_orders(self, product, trader_msgs):
+        """
+        pass order messages of traders to markets - messages of members are passed to their aggregator, which
+        forwards its aggregated bid curve
+
+        Args:
+            product (dict): traded product with product type and lead time
+            trader_msgs (list): list with order messages of every trader
+        """
+        for msg in trader_msgs:
+            for sub_msg in msg:
+                aggregator = self.order_routes.get((sub_msg['sender_id'], sub_msg['reciever_id']))
+                if aggregator is not None:
+                    aggregator.process_msg(msg=sub_msg)
+                else:
+                    eval("self.markets['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
+        for (_, aggregator) in self.aggregators.items():
+            for sub_msg in aggregator.trade(product=product):
+                self.markets[sub_msg['reciever_id']].process_msg(msg=sub_msg)
+
+    def __distribute_trades(self, product, market_msgs):
+        """
+        pass market messages to traders - trades of aggregators are disaggregated to their members
+
+        Args:
+            product (dict): cleared product with product type and lead time
+            market_msgs (list): list with market messages of every market
+        """
+        for msg in market_msgs:
+            for sub_msg in msg:
+                if sub_msg['reciever_id'] in self.aggregators:
+                    self.aggregators[sub_msg['reciever_id']].process_msg(msg=sub_msg)
+                else:
+                    eval("self.traders['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
+        for (_, aggregator) in self.aggregators.items():
+            for sub_msg in aggregator.distribute(product=product, experiment_time=self.scenario_time):
+                self.traders[sub_msg['reciever_id']].process_msg(msg=sub_msg)
+
     def __logging(self):
         """
         save trading results to external file
@@ -499,6 +568,11 @@ class EtaHeatingSystemsMas(RuleBased):
         for agent_name, agent in self.markets.items():
             df = agent.return_trading_table_longtime()
             df.to_excel(writer, sheet_name=agent_name)
+
+        # iterate over aggregators
+        for agent_name, agent in self.aggregators.items():
+            df = agent.return_trading_table_longtime()
+            df.to_excel(writer, sheet_name=agent_name)
         writer.close()
 
     def __terminate_experiment(self):
@@ -517,3 +591,15 @@ class EtaHeatingSystemsMas(RuleBased):
                     eval("self.traders['" + sub_msg['reciever_id'] + "'].process_msg(msg=sub_msg)")
 
         self.__logging()
+
+        if self.trading_executor is not None:
+            self.trading_executor.shutdown()
+
+        # report efficiency of bid memoization
+        for name, agent in self.traders.items():
+            if agent.bid_cache is not None:
+                print('[INFO] Bid cache', name, ':', agent.bid_cache.return_stats())
+
+        # write open rows of streamed longtime logs to disk
+        for _, agent in {**self.traders, **self.markets, **self.aggregators}.items():
+            agent.trading_table_longtime.close()
@@ -8,12 +8,15 @@ __email__ = "f.borst@ptw.tu-darmstadt.de"
 __project__ = "Transactive control of linked heating and cooling system at production sites"
 __subject__ = "base agent"
 
+import os
 from abc import abstractmethod
-import pandas as pd
+from multi_agent_system.base.util import ObservationBuffer
+from multi_agent_system.base.longtime_log import LongtimeLog
+from multi_agent_system.base.schedule import ProductSchedule
 
 
 class BaseAgent():
-    def __init__(self, agent_name, agent_type, agent_config, experiment_config):
+    def __init__(self, agent_name, agent_type, agent_config, experiment_config, schedule=None):
         """
         agent base class
 
@@ -22,16 +25,33 @@ class BaseAgent():
             agent_type (str): agent type (child class)
             agent_config (dict): dictionary with global information about experimental setup
             experiment_config (dict): dictionary with agent specific information
+            schedule (ProductSchedule): product schedule of multi agent system, agent compiles its own if None
         """
 
         self.agent_config = agent_config
         self.type = agent_type
         self.name = agent_name
-        self.observations = []  # list for logging observations of every agent sampling time
         self.experiment_config = experiment_config
-        self.trading_table_longtime = []
         self.products = dict(zip(self.experiment_config["products"][0], self.experiment_config["products"][1]))
         self.trading_time = min(list(self.products.keys()))
+        self.schedule = schedule if schedule is not None else ProductSchedule(self.products)
+
+        # ring buffer for observations of every agent sampling time - observations are only accessed back to the
+        # beginning of the current trading period, optionally all observations are archived on disk
+        num_control_steps = int(self.trading_time / self.experiment_config['sampling_time'])
+        archive_path = None
+        if self.experiment_config.get('observation_archive') is not None:
+            archive_path = os.path.join(self.experiment_config['observation_archive'],
+                                        self.name + '_observations.jsonl')
+        self.observations = ObservationBuffer(maxlen=num_control_steps + 1, archive_path=archive_path)
+
+        # longtime trading log - optionally streamed to disk with bounded in-memory tail
+        log_path = None
+        if self.experiment_config.get('longtime_log') is not None:
+            log_path = os.path.join(self.experiment_config['longtime_log'], self.name)
+        self.trading_table_longtime = LongtimeLog(
+            path=log_path,
+            tail_size=self.experiment_config.get('longtime_log_tail', 96))
 
     def return_agent_type(self):
         """
@@ -49,7 +69,7 @@ class BaseAgent():
         Returns:
             trading_table_longtime (df): longtime trading table as pandsa dataframe
         """
-        df = pd.DataFrame.from_records(self.trading_table_longtime)
+        df = self.trading_table_longtime.to_dataframe()
         return df
 
     @abstractmethod
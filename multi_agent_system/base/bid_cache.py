@@ -0,0 +1,151 @@
+"""
+memoization of bids keyed on quantized model inputs
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "memoization of bids"
+
+import math
+import uuid
+from collections import OrderedDict
+import numpy as np
+
+
+class BidCache():
+    def __init__(self, size=128, resolution=1e-3, resolutions=None):
+        """
+        least recently used cache of quantities and order messages of one trader
+
+        model inputs are quantized by resolution, so inputs which only differ within resolution (e.g. sensor noise)
+        reuse the bids of the first evaluation. resolutions of single model inputs are declared by the models (see
+        register_model) and may be overwritten by resolutions.
+
+        Args:
+            size (int): maximum number of cached bids, least recently used bids are evicted
+            resolution (float): default resolution of numeric model inputs
+            resolutions (dict): resolution of numeric model inputs by input name, e.g. {"fReturnTemperature": 0.5}
+        """
+        self.size = size
+        self.resolution = resolution
+        self.resolutions = dict(resolutions or {})
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *model_inputs):
+        """
+        build hashable key of quantized model inputs - only model inputs read by the models are part of key
+
+        Args:
+            model_inputs (tuple): pairs of model inputs and declared resolution of read model inputs by input name
+                (None for default resolution), all model inputs except quantities are read if declaration is None
+
+        Returns:
+            key (tuple): hashable key
+        """
+        key = []
+        for inputs, declaration in model_inputs:
+            if declaration is None:
+                declaration = {name: None for name in inputs if name != 'quantities'}
+            key.append(tuple(
+                (name, self.__quantize(inputs.get(name), self.resolutions.get(name, resolution or self.resolution)))
+                for name, resolution in sorted(declaration.items())))
+        return tuple(key)
+
+    def get(self, key):
+        """
+        return cached bids and mark them as recently used
+
+        Args:
+            key (tuple): key of model inputs
+
+        Returns:
+            entry (dict): cached quantities and order messages, None if key is not cached
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, quantities, msgs):
+        """
+        cache bids and evict least recently used bids
+
+        Args:
+            key (tuple): key of model inputs
+            quantities (dict): quantities returned by capacity model
+            msgs (list): order messages returned by pricing model
+        """
+        self.entries[key] = {'quantities': quantities, 'msgs': retag_orders(msgs)}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        discard all cached bids, e.g. after model parameters have changed
+        """
+        self.entries.clear()
+
+    def return_stats(self):
+        """
+        return hit and miss counters
+
+        Returns:
+            stats (dict): hits, misses and number of cached bids
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+    def __quantize(self, value, resolution):
+        """
+        quantize value recursively
+
+        Args:
+            value (object): model input
+            resolution (float): resolution of numeric values
+
+        Returns:
+            value (object): hashable quantized value
+        """
+        if isinstance(value, dict):
+            return tuple((name, self.__quantize(value[name], resolution)) for name in sorted(value))
+        if isinstance(value, np.ndarray) and value.ndim == 0:
+            return self.__quantize(value.item(), resolution)
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return tuple(self.__quantize(element, resolution) for element in value)
+        if isinstance(value, (bool, np.bool_)):
+            return bool(value)
+        if isinstance(value, (float, np.floating)):
+            if not math.isfinite(value):
+                return str(value)
+            return round(value / resolution)
+        if isinstance(value, np.integer):
+            return int(value)
+        return value
+
+
+def retag_orders(msgs):
+    """
+    copy order messages with fresh uuids - coupled orders are mapped to the new uuids
+
+    Args:
+        msgs (list): list of order messages
+
+    Returns:
+        msgs (list): list of copied order messages
+    """
+    ids = {msg['id']: uuid.uuid4() for msg in msgs}
+    retagged = []
+    for msg in msgs:
+        msg = dict(msg, id=ids[msg['id']])
+        # curve orders are not coupled
+        if msg.get('coupled_order') is not None:
+            msg['coupled_order'] = [ids.get(coupled_id, coupled_id) for coupled_id in msg['coupled_order']]
+        retagged.append(msg)
+    return retagged
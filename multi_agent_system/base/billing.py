@@ -0,0 +1,100 @@
+"""
+vectorized billing of balancing energy
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "vectorized billing of balancing energy"
+
+import numpy as np
+
+# energies of longtime trading log which are considered for billing - order of billing weights
+BILLING_COLUMNS = ('cleared_energy_pos', 'cleared_energy_neg', 'real_energy_pos', 'real_energy_neg')
+
+
+def compute_balancing_energy(energies, weights, signs, factors, price_pos, price_neg):
+    """
+    calculate balancing energy and specific costs of balancing energy
+
+    the energy difference of every row is sign * ((w0 * e0 + w1 * e1) - (w2 * e2 + w3 * e3)) * factor with weights
+    in {-1, 0, 1}, which reproduces the scalar calculation of every trader type exactly.
+
+    Args:
+        energies (np.ndarray): cleared and real energies in order of BILLING_COLUMNS, shape (n, 4)
+        weights (np.ndarray): billing weights, shape (n, 4)
+        signs (np.ndarray): sign of energy difference, shape (n,)
+        factors (np.ndarray): scaling factor of energy difference, e.g. cop dependent, shape (n,)
+        price_pos (np.ndarray): price of positive balancing energy, shape (n,)
+        price_neg (np.ndarray): price of negative balancing energy, shape (n,)
+
+    Returns:
+        energy_difference (np.ndarray): balancing energy
+        cost_balancing_energy (np.ndarray): specific costs of balancing energy, zero without balancing energy
+    """
+    weighted = weights * energies
+    energy_difference = signs * (((weighted[:, 0] + weighted[:, 1]) - (weighted[:, 2] + weighted[:, 3])) * factors)
+
+    # produced less/consumed more energy than cleared -> price_pos, otherwise price_neg
+    cost = np.where(energy_difference >= 0, energy_difference * price_pos, energy_difference * price_neg)
+    is_balanced = energy_difference == 0
+    cost_balancing_energy = np.where(is_balanced, 0., cost / np.where(is_balanced, 1., energy_difference))
+    return energy_difference, cost_balancing_energy
+
+
+class BalancingEnergyBilling():
+    def __init__(self, traders):
+        """
+        billing of balancing energy for all traders connected to system operators in one vectorized step
+
+        billing weights of every pair of system operator and connected trader are compiled once, only scaling factors
+        (e.g. cop of heat pumps) are requested per billing.
+
+        Args:
+            traders (dict): traders by name
+        """
+        self.traders = traders
+        self.rows = {}  # row of billing weights per sender and reciever
+        weights = []
+        signs = []
+        for name, trader in traders.items():
+            if trader.return_agent_type() != 'system_operator':
+                continue
+            system_id = trader.agent_config['base_config']['connections_markets'][0]
+            for reciever_id in trader.agent_config['base_config']['connections_traders']:
+                weight, sign = traders[reciever_id]._balancing_weights(sender_id=name, system_id=system_id)
+                self.rows[(name, reciever_id)] = len(weights)
+                weights.append(weight)
+                signs.append(sign)
+        self.weights = np.array(weights, dtype=np.float64).reshape(-1, len(BILLING_COLUMNS))
+        self.signs = np.array(signs, dtype=np.float64)
+
+    def bill(self, msgs):
+        """
+        bill balancing energy messages of system operators
+
+        Args:
+            msgs (list): list of balancing energy messages
+        """
+        if not msgs:
+            return
+        recievers = [self.traders[msg['reciever_id']] for msg in msgs]
+        logs = [trader.trading_table_longtime[-1] for trader in recievers]
+        rows = [self.rows[(msg['sender_id'], msg['reciever_id'])] for msg in msgs]
+
+        energy_difference, cost_balancing_energy = compute_balancing_energy(
+            energies=np.array([[log[column] for column in BILLING_COLUMNS] for log in logs], dtype=np.float64),
+            weights=self.weights[rows],
+            signs=self.signs[rows],
+            factors=np.array([trader._balancing_factor(system_id=msg['system_id'])
+                              for trader, msg in zip(recievers, msgs)], dtype=np.float64),
+            price_pos=np.array([msg['price_pos'] for msg in msgs], dtype=np.float64),
+            price_neg=np.array([msg['price_neg'] for msg in msgs], dtype=np.float64))
+
+        # update longtime trading logs with balancing energy costs in order of messages
+        for trader, log, msg, energy, cost in zip(
+                recievers, logs, msgs, energy_difference.tolist(), cost_balancing_energy.tolist()):
+            log['cost_balancing_energy' + '_' + msg['system_id']] = cost
+            log['balancing_energy' + '_' + msg['system_id']] = energy
+            trader._update_after_billing(msg)
@@ -0,0 +1,94 @@
+"""
+adaptive bid discretization driven by market state
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "adaptive bid discretization"
+
+import math
+
+
+class DiscretizationPolicy():
+    def __init__(self, bid_discretization, bounds=None, target_latency=None, target_depth=None, min_discretization=2,
+                 increase=1, decrease=0.5):
+        """
+        additive increase, multiplicative decrease of the bid discretization of one trader - markets publish book
+        depth and clearing latency of recent clearings (see market_state_msg). if any market of the trader exceeds its
+        targets, the discretization is decreased multiplicatively, otherwise it is increased additively within bounds
+
+        clearing latency is measured in wall-clock time, thus simulations with a latency target are not reproducible.
+        a target of book depth only (default) keeps simulations deterministic. at least one target is required.
+
+        Args:
+            bid_discretization (int): configured bid discretization, initial value and upper bound by default
+            bounds (list): minimum and maximum bid discretization, [min_discretization, bid_discretization] if None
+            target_latency (float): target of mean clearing latency in s, not considered if None
+            target_depth (float): target of mean number of orders per order book, not considered if None
+            min_discretization (int): minimum bid discretization if bounds are not given
+            increase (int): additive increase of bid discretization per uncongested market state
+            decrease (float): multiplicative decrease of bid discretization per congested market state
+        """
+        if bounds is None:
+            bounds = [min(min_discretization, bid_discretization), bid_discretization]
+        self.bounds = (int(bounds[0]), int(bounds[1]))
+        if not 1 <= self.bounds[0] <= self.bounds[1]:
+            raise ValueError('Bounds of bid discretization must be ascending and positive, got ' + str(bounds) + '.')
+        if target_latency is None and target_depth is None:
+            raise ValueError('Adaptive bid discretization requires a target of book depth or clearing latency.')
+        if not 0 < decrease < 1 or increase < 1:
+            raise ValueError('Adaptive bid discretization requires increase >= 1 and 0 < decrease < 1.')
+        self.target_latency = target_latency
+        self.target_depth = target_depth
+        self.increase = int(increase)
+        self.decrease = decrease
+        self.bid_discretization = min(max(int(bid_discretization), self.bounds[0]), self.bounds[1])
+
+        # latest market state by market, consumed by next adaptation
+        self.market_states = {}
+
+    def update(self, msg):
+        """
+        store market state of market
+
+        Args:
+            msg (dict): market state message
+        """
+        self.market_states[msg['sender_id']] = msg
+
+    def is_congested(self, msg):
+        """
+        check if market state exceeds targets
+
+        Args:
+            msg (dict): market state message
+
+        Returns:
+            is_congested (bool): True if clearing latency or book depth exceed their targets
+        """
+        if self.target_latency is not None and msg['clearing_latency'] > self.target_latency:
+            return True
+        return self.target_depth is not None and msg['book_depth'] > self.target_depth
+
+    def adapt(self):
+        """
+        adapt bid discretization to market states recieved since last adaptation
+
+        Returns:
+            bid_discretization (int): adapted bid discretization, unchanged without new market states
+        """
+        if not self.market_states:
+            return self.bid_discretization
+        if any(self.is_congested(msg) for msg in self.market_states.values()):
+            bid_discretization = math.floor(self.bid_discretization * self.decrease)
+        else:
+            bid_discretization = self.bid_discretization + self.increase
+        self.bid_discretization = min(max(bid_discretization, self.bounds[0]), self.bounds[1])
+        self.market_states.clear()
+        return self.bid_discretization
+
+
+if __name__ == '__main__':
+    pass
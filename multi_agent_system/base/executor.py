@@ -0,0 +1,102 @@
+"""
+concurrent evaluation of traders within a trading round
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "concurrent evaluation of traders"
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multi_agent_system.base.fleet import assess_fleet
+from multi_agent_system.models import quantity_assessment_models  # noqa: F401
+from multi_agent_system.models.registry import get_model, load_model_plugins
+
+# executors of trading rounds by name
+EXECUTORS = ('thread', 'process')
+
+
+def trading_executor(kind='thread', workers=1, model_plugins=()):
+    """
+    executor evaluating the traders of a trading round concurrently - traders only depend on each other by clearing
+
+    thread pools evaluate complete trading processes of traders, but share the global interpreter lock. process pools
+    evaluate the capacity models of traders in worker processes, while the state of traders (observations, trading
+    tables, bid caches) is kept in the main process, which prepares model inputs and prices the quantities. capacity
+    models of the shipped configs take a few percent of a trading round, so process pools only pay off for expensive
+    (e.g. plugin) models - see supplementary_material/benchmark_trading_round.py
+
+    Args:
+        kind (str): thread or process
+        workers (int): number of workers, sequential evaluation if 1
+        model_plugins (list): importable modules registering additional models, imported by every worker process
+
+    Returns:
+        executor (Executor): thread or process pool, None for sequential evaluation
+    """
+    if kind not in EXECUTORS:
+        raise ValueError('Unknown trading executor: ' + str(kind) + '. Executors: ' + ', '.join(EXECUTORS))
+    if workers <= 1:
+        return None
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers=workers, initializer=load_model_plugins, initargs=(list(model_plugins),))
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _capacity_model(model_name, parameters):
+    """
+    evaluate registered capacity model within worker process
+
+    Args:
+        model_name (str): name of capacity model
+        parameters (dict): dictionary holding model parameters and model inputs
+
+    Returns:
+        quantities (dict): quantities returned by capacity model
+    """
+    return get_model('quantity_assessment', model_name)(parameters)
+
+
+def trade_round(traders, product, quantities=None, executor=None, is_fleet_assessment=False):
+    """
+    execute trading round of traders for one product and lead time
+
+    Args:
+        traders (list): list of participating traders
+        product (dict): traded product with product type and lead time
+        quantities (dict): quantities assessed beforehand by (trader name, product type, lead time), e.g. of a batch
+            of lead times - all other traders assess their quantities
+        executor (Executor): thread or process pool of trading_executor, sequential evaluation if None - bids of
+            traders with bid cache are keyed on the quantities assessed by worker processes
+        is_fleet_assessment (bool): assess quantities of traders sharing a capacity model in one vectorized call
+
+    Returns:
+        trader_msgs (list): list with order messages of every trader in order of traders
+    """
+    def key(trader):
+        return trader.name, product['product_type'], product['lead_time']
+
+    quantities = dict(quantities or {})
+    if is_fleet_assessment:
+        quantities.update(assess_fleet([(trader, product) for trader in traders if key(trader) not in quantities]))
+
+    if isinstance(executor, ProcessPoolExecutor):
+        # capacity models are evaluated in worker processes, pricing in main process
+        pending = [trader for trader in traders if key(trader) not in quantities]
+        parameters = []
+        for trader in pending:
+            trader._quantity_assessment(product=product)
+            parameters.append({'model_parameters': dict(trader.physical_parameters['model_parameters']),
+                               'model_inputs': trader.physical_parameters['model_inputs']})
+        results = executor.map(
+            _capacity_model, [trader.agent_config['model_config']['capacity_model'] for trader in pending], parameters)
+        quantities.update({key(trader): result for trader, result in zip(pending, results)})
+        executor = None
+
+    def trade(trader):
+        return trader.trade(product=product, quantities=quantities.get(key(trader)))
+
+    if executor is not None:
+        return list(executor.map(trade, traders))
+    return [trade(trader) for trader in traders]
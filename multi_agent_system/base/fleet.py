@@ -0,0 +1,45 @@
+"""
+trading of agents grouped to fleets sharing one capacity model
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "trading of agents grouped to fleets"
+
+from multi_agent_system.models import fleet_models  # noqa: F401
+from multi_agent_system.models.registry import MODELS
+
+
+def assess_fleet(assignments):
+    """
+    assess quantities of traders and products with one vectorized model call per capacity model
+
+    assignments are grouped by capacity model - a group may hold one trader with several products (e.g. all lead
+    times of a product type with disjoint horizons), several traders with one product or both. groups without a
+    registered fleet model or with a single assignment are skipped.
+
+    Args:
+        assignments (list): list of (trader, product) pairs
+
+    Returns:
+        quantities (dict): quantities by (trader name, product type, lead time)
+    """
+    fleets = {}
+    for trader, product in assignments:
+        fleets.setdefault(trader.agent_config['model_config']['capacity_model'], []).append((trader, product))
+
+    quantities = {}
+    for model_name, fleet in fleets.items():
+        fleet_model = MODELS['fleet_quantity_assessment'].get(model_name)
+        if fleet_model is None or len(fleet) < 2:
+            continue
+        parameters = []
+        for trader, product in fleet:
+            trader._quantity_assessment(product=product)
+            parameters.append(trader.physical_parameters)
+        results = fleet_model(parameters)
+        quantities.update({(trader.name, product['product_type'], product['lead_time']): result
+                           for (trader, product), result in zip(fleet, results)})
+    return quantities
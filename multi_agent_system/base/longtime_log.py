@@ -0,0 +1,192 @@
+"""
+longtime trading log with append-only streaming to disk
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "longtime trading log with append-only streaming to disk"
+
+import os
+import glob
+import pandas as pd
+import pyarrow as pa
+
+
+class LongtimeLog():
+    def __init__(self, path=None, tail_size=96):
+        """
+        longtime trading log holding one row (dict) per trading period
+
+        rows are kept in memory completely if no path is given. otherwise every row is appended to an arrow ipc
+        stream as soon as the next row is appended (trading period is closed) and only the latest rows are kept in
+        memory. integer and empty columns are written as float64, since values of trading periods are initialized
+        with 0 (or None) and become floats once they are cleared. a new stream segment is only started if the log
+        holds new columns or values which cannot be cast to the schema of the current segment.
+
+        Args:
+            path (str): path prefix of arrow ipc stream segments '<path>.<segment>.arrow', no streaming if None
+            tail_size (int): number of latest rows kept in memory if log is streamed to disk
+        """
+        self.path = path
+        self.tail_size = max(1, tail_size)
+        self.rows = []  # in-memory tail of log, last row is still open for updates (e.g. billing)
+        self.num_dropped = 0  # rows dropped from memory after being written to disk
+        self.num_written = 0  # rows written to disk
+        self.segment = -1
+        self.schema = None
+        self.sink = None
+        self.writer = None
+
+        # remove segments of previous runs
+        if self.path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            for segment_path in self.__segment_paths():
+                os.remove(segment_path)
+
+    def __len__(self):
+        return self.num_dropped + len(self.rows)
+
+    def __getitem__(self, idx):
+        """
+        access rows of in-memory tail, e.g. [-1] for the last (open) row
+
+        Args:
+            idx (int): index within in-memory tail
+        """
+        return self.rows[idx]
+
+    def append(self, row):
+        """
+        append row to log and stream closed rows to disk
+
+        Args:
+            row (dict): log of one trading period
+        """
+        if self.path is not None:
+            # all rows in memory are closed by the new row
+            self.__write(self.rows[self.num_written - self.num_dropped:])
+
+            # keep bounded tail of rows which are already written to disk
+            num_drop = len(self.rows) + 1 - self.tail_size
+            if num_drop > 0:
+                del self.rows[:num_drop]
+                self.num_dropped += num_drop
+
+        self.rows.append(row)
+
+    def close(self):
+        """
+        write open rows to disk and close stream
+        """
+        if self.path is None:
+            return
+        self.__write(self.rows[self.num_written - self.num_dropped:])
+        self.__close_segment()
+
+    def to_dataframe(self):
+        """
+        return complete log from disk and memory
+
+        Returns:
+            df (df): longtime trading log as pandas dataframe
+        """
+        df_memory = pd.DataFrame.from_records(self.rows[max(0, self.num_written - self.num_dropped):])
+        if self.path is None:
+            return df_memory
+
+        tables = []
+        for segment_path in self.__segment_paths():
+            with pa.memory_map(segment_path, 'r') as source:
+                tables.append(pa.ipc.open_stream(source).read_all())
+        if not tables:
+            return df_memory
+        df_disk = pa.concat_tables(tables, promote_options='permissive').to_pandas()
+        return pd.concat([df_disk, df_memory], ignore_index=True)
+
+    def __segment_paths(self):
+        """
+        return paths of written segments in order of writing - sorted by segment index, not by name
+
+        Returns:
+            paths (list): list of segment paths
+        """
+        segments = {}
+        for segment_path in glob.glob(glob.escape(self.path) + '.*.arrow'):
+            segment = segment_path[len(self.path) + 1:-len('.arrow')]
+            if segment.isdigit():
+                segments[int(segment)] = segment_path
+        return [segments[segment] for segment in sorted(segments)]
+
+    def __write(self, rows):
+        """
+        append rows to current segment, start new segment if columns or types are not compatible
+
+        Args:
+            rows (list): list of closed rows
+        """
+        if not rows:
+            return
+        table = pa.Table.from_pylist(rows)
+
+        if self.writer is not None:
+            table = self.__conform(table)
+        if table is None or self.writer is None:
+            table = pa.Table.from_pylist(rows)
+            schema = pa.schema([
+                field.with_type(pa.float64()) if pa.types.is_integer(field.type) or pa.types.is_null(field.type)
+                else field for field in table.schema])
+            table = table.cast(schema)
+            self.__open_segment(schema)
+
+        self.writer.write_table(table)
+        self.sink.flush()  # rows are persistent after every trading period
+        self.num_written += len(rows)
+
+    def __conform(self, table):
+        """
+        conform table to schema of current segment
+
+        Args:
+            table (pyarrow.Table): table of new rows
+
+        Returns:
+            table (pyarrow.Table): conformed table or None if table holds unknown columns or types
+        """
+        schema = self.schema
+        if not set(table.column_names).issubset(schema.names):
+            return None
+
+        # fill missing columns and order columns like schema
+        columns = [
+            table.column(field.name) if field.name in table.column_names else pa.nulls(table.num_rows, field.type)
+            for field in schema]
+        try:
+            return pa.Table.from_arrays(columns, names=schema.names).cast(schema)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            return None
+
+    def __open_segment(self, schema):
+        """
+        start new stream segment
+
+        Args:
+            schema (pyarrow.Schema): schema of segment
+        """
+        self.__close_segment()
+        self.segment += 1
+        self.schema = schema
+        self.sink = pa.OSFile(self.path + '.' + str(self.segment).zfill(4) + '.arrow', 'wb')
+        self.writer = pa.ipc.new_stream(self.sink, schema)
+
+    def __close_segment(self):
+        """
+        close current stream segment
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.sink.close()
+        self.writer = None
+        self.sink = None
+        self.schema = None
@@ -55,6 +55,82 @@ def order_msg(
     return msg
 
 
+def curve_order_msg(
+        sender_id,
+        reciever_id,
+        order_type,
+        product_type,
+        product_lead_time,
+        quantities,
+        prices,
+        min_quantity,
+        id):
+    """
+    piecewise linear bid curve sent by traders to markets - replaces a ladder of coupled orders of one trader. the
+    curve is linear between breakpoints and flat at the price of the first breakpoint between zero and its quantity
+
+    Args:
+        sender_id (str): trader name
+        reciever_id (str): market name
+        order_type (str): order type, e.g. sell or buy
+        product_type (int): product type classified by product duration in seconds
+        product_lead_time (int): lead time before product execution in seconds
+        quantities (list): ascending quantities of breakpoints in kWh
+        prices (list): bid prices of breakpoints in €/kWh, ascending for sells and descending for buys
+        min_quantity (float): minimum cleared quantity in kWh, e.g. minimal load, curve is rejected below
+        id (uuid): unique uuid of order message
+
+    Returns:
+        msg (dict): curve order message holding relevant information as dictionary
+    """
+
+    msg = {
+        'type': 'curve_order_msg',
+        'sender_id': sender_id,
+        'reciever_id': reciever_id,
+        'order_type': order_type,
+        'product_type': product_type,
+        'product_lead_time': product_lead_time,
+        'quantity': quantities[-1] if len(quantities) else 0,
+        'quantities': quantities,
+        'prices': prices,
+        'min_quantity': min_quantity,
+        'id': id
+    }
+    return msg
+
+
+def order_lifecycle_msg(lifecycle, sender_id, reciever_id, product_type, product_lead_time, id, order=None):
+    """
+    lifecycle message of standing order sent by traders to markets - standing orders persist in order book of market
+    across trading rounds of a product, so traders only send changes of their bid ladder
+
+    Args:
+        lifecycle (str): lifecycle event, i.e. new, amend or cancel
+        sender_id (str): trader name
+        reciever_id (str): market name
+        product_type (int): product type classified by product duration in seconds
+        product_lead_time (int): lead time before product execution in seconds
+        id (uuid): unique uuid of standing order
+        order (dict): order message replacing standing order, None for cancel
+
+    Returns:
+        msg (dict): order lifecycle message holding relevant information as dictionary
+    """
+
+    msg = {
+        'type': 'order_lifecycle_msg',
+        'lifecycle': lifecycle,
+        'sender_id': sender_id,
+        'reciever_id': reciever_id,
+        'product_type': product_type,
+        'product_lead_time': product_lead_time,
+        'id': id,
+        'order': order
+    }
+    return msg
+
+
 def trade_msg(sender_id, reciever_id, product_type, product_lead_time, trade_type, quantity, price):
     """
     trade message sent by markets to traders
@@ -85,6 +161,68 @@ def trade_msg(sender_id, reciever_id, product_type, product_lead_time, trade_typ
     return msg
 
 
+def aggregate_trade_msgs(msgs):
+    """
+    net trade messages into one trade message per trader, trade type, product type and lead time carrying total
+    quantity and volume-weighted average price - trades without total quantity carry price of last trade
+
+    Args:
+        msgs (list): trade messages in order of clearing
+
+    Returns:
+        msgs (list): aggregated trade messages in order of first trade per trader, trade type and product
+    """
+    groups = {}
+    for msg in msgs:
+        key = (msg['reciever_id'], msg['trade_type'], msg['product_type'], msg['product_lead_time'])
+        if key not in groups:
+            groups[key] = [msg, 0, 0, msg['price']]
+        group = groups[key]
+        group[1] += msg['quantity']
+        group[2] += msg['quantity'] * msg['price']
+        group[3] = msg['price']
+
+    aggregated_msgs = []
+    for (reciever_id, trade_type, product_type, product_lead_time), (msg, quantity, volume, price) in groups.items():
+        aggregated_msgs.append(trade_msg(
+            sender_id=msg['sender_id'],
+            reciever_id=reciever_id,
+            trade_type=trade_type,
+            product_type=product_type,
+            product_lead_time=product_lead_time,
+            quantity=quantity,
+            price=volume / quantity if quantity != 0 else price))
+    return aggregated_msgs
+
+
+def market_state_msg(sender_id, reciever_id, product_type, product_lead_time, book_depth, clearing_latency):
+    """
+    state of recent clearings sent by markets to traders, e.g. for adaptive bid discretization
+
+    Args:
+        sender_id (str): market name
+        reciever_id (str): trader name
+        product_type (int): product type classified by product duration in seconds
+        product_lead_time (int): lead time before product execution in seconds
+        book_depth (float): mean number of orders per order book of recent clearings
+        clearing_latency (float): mean duration of market model of recent clearings in s
+
+    Returns:
+        msg (dict): market state message holding relevant information as dictionary
+    """
+
+    msg = {
+        'type': 'market_state_msg',
+        'sender_id': sender_id,
+        'reciever_id': reciever_id,
+        'product_type': product_type,
+        'product_lead_time': product_lead_time,
+        'book_depth': book_depth,
+        'clearing_latency': clearing_latency
+    }
+    return msg
+
+
 def balancing_energy_msg(sender_id, reciever_id, system_id, price_pos, price_neg):
     """
     balacing energy message sent by system operators to traders
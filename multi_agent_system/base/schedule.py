@@ -0,0 +1,164 @@
+"""
+product schedule compiled once from product configuration
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "product schedule"
+
+
+class ProductSchedule():
+    def __init__(self, products):
+        """
+        schedule of traded products per trading step, compiled once at startup
+
+        every trading step holds a list of entries in trading order (longest product and longest lead time first).
+        an entry holds the traded product, the covered horizon of the trading table, the product allocation of
+        every registered agent and the registered agents participating in trading the product.
+
+        Args:
+            products (dict): product types in seconds with list of lead times in seconds, shortest product first
+        """
+        self.products = products
+        self.trading_time = min(list(self.products.keys()))
+        self.shorttime_product = list(self.products.keys())[0]
+
+        # number of trading steps between shortest and longest product
+        # longer products must be multiples of shortest product
+        self.num_trading_steps = int(max(list(self.products.keys())) / self.trading_time)
+
+        # length of trading table covering longest product with longest lead time
+        longest_product = max(list(self.products.keys()))
+        longest_lead_time = max(self.products[longest_product])
+        self.horizon_length = int((longest_product + longest_lead_time) / self.trading_time)
+
+        # horizon of trading table that is covered by product and lead time
+        self.horizons = {
+            product_type: {
+                lead_time: slice(
+                    int(lead_time / self.trading_time),
+                    int((lead_time + product_type) / self.trading_time))
+                for lead_time in lead_times}
+            for product_type, lead_times in self.products.items()}
+
+        self.allocations = {}  # product allocation per agent, product type and lead time
+        self.participation = {}  # participation matrix per agent, product type and lead time
+        self.steps = [self.__compile_step(trading_step) for trading_step in range(self.num_trading_steps)]
+        self.batches = [self.__compile_batches(entries) for entries in self.steps]
+
+    def __compile_step(self, trading_step):
+        """
+        compile entries of trading step
+
+        Args:
+            trading_step (int): trading step within longest product
+
+        Returns:
+            entries (list): list of entries in trading order
+        """
+        entries = []
+
+        # descending sorted list of tradable products -> trade and clear longtime product before shorttime product
+        for product_type in sorted(list(self.products.keys()), reverse=True):
+            if trading_step % (product_type / self.trading_time) != 0:
+                continue
+
+            # iterate over lead time and start with longest lead time
+            for lead_time in sorted(self.products[product_type], reverse=True):
+                entries.append({
+                    'product': {'product_type': product_type, 'lead_time': lead_time},
+                    'horizon': self.horizons[product_type][lead_time],
+                    'shorttime_product': product_type == self.shorttime_product,
+                    'allocations': {},
+                    'participants': [],
+                })
+        return entries
+
+    def __compile_batches(self, entries):
+        """
+        group consecutive entries of one product type with disjoint horizons - clearing one entry of a batch does not
+        change the cleared energies within the horizons of the other entries, so their quantities can be assessed
+        at once before trading the first entry
+
+        Args:
+            entries (list): list of entries in trading order
+
+        Returns:
+            batches (list): list of batches (lists of entries) in trading order
+        """
+        batches = []
+        for entry in entries:
+            if batches and batches[-1][0]['product']['product_type'] == entry['product']['product_type'] and all(
+                    entry['horizon'].stop <= other['horizon'].start or other['horizon'].stop <= entry['horizon'].start
+                    for other in batches[-1]):
+                batches[-1].append(entry)
+            else:
+                batches.append([entry])
+        return batches
+
+    def add_allocations(self, agent_name, allocations, participation=None):
+        """
+        register product allocation and participation of agent
+
+        Args:
+            agent_name (str): agent name
+            allocations (dict): product allocation as model inputs per product type and lead time, e.g.
+                {3600: {0: {'product_allocation': 1}}}
+            participation (dict): True per product type and lead time if agent can place non-zero orders, e.g.
+                {3600: {0: True}}, agent participates in every product if None
+        """
+        if participation is None:
+            participation = {product_type: {lead_time: True for lead_time in lead_times}
+                             for product_type, lead_times in self.products.items()}
+        self.allocations[agent_name] = allocations
+        self.participation[agent_name] = participation
+        for entries in self.steps:
+            for entry in entries:
+                product_type = entry['product']['product_type']
+                lead_time = entry['product']['lead_time']
+                entry['allocations'][agent_name] = allocations[product_type][lead_time]
+                if agent_name in entry['participants']:
+                    entry['participants'].remove(agent_name)
+                if participation[product_type][lead_time]:
+                    entry['participants'].append(agent_name)
+
+    def horizon(self, product_type, lead_time):
+        """
+        return horizon of trading table that is covered by product
+
+        Args:
+            product_type (int): product duration in seconds
+            lead_time (int): lead time in seconds
+
+        Returns:
+            horizon (slice): covered indices of trading table
+        """
+        return self.horizons[product_type][lead_time]
+
+    def allocation(self, agent_name, product):
+        """
+        return product allocation of agent
+
+        Args:
+            agent_name (str): agent name
+            product (dict): traded product with product type and lead time
+
+        Returns:
+            allocation (dict): product allocation as model inputs
+        """
+        return self.allocations[agent_name][product['product_type']][product['lead_time']]
+
+    def is_participating(self, agent_name, product):
+        """
+        check if agent participates in trading the product
+
+        Args:
+            agent_name (str): agent name
+            product (dict): traded product with product type and lead time
+
+        Returns:
+            is_participating (bool): True if agent can place non-zero orders
+        """
+        return self.participation[agent_name][product['product_type']][product['lead_time']]
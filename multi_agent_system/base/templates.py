@@ -0,0 +1,112 @@
+"""
+shared immutable templates of agents
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "shared immutable templates of agents"
+
+import json
+from collections import ChainMap
+from types import MappingProxyType
+from multi_agent_system.base.util import DynamicObject, compile_model_parameters
+
+# templates per kind and key, shared by all agents within the process
+TEMPLATES = {}
+
+
+def get_template(kind, key, factory):
+    """
+    return shared template - template is created by factory on first request
+
+    Args:
+        kind (str): kind of template, e.g. 'dynamic_object'
+        key (object): hashable key of template
+        factory (function): function without arguments creating the template
+
+    Returns:
+        template (object): shared template
+    """
+    templates = TEMPLATES.setdefault(kind, {})
+    if key not in templates:
+        templates[key] = factory()
+    return templates[key]
+
+
+def clear_templates():
+    """
+    drop all shared templates, e.g. if files of dynamic objects have changed
+    """
+    TEMPLATES.clear()
+
+
+def shared_dynamic_object(filename, sheet_name):
+    """
+    return dynamic object shared by all agents reading the same sheet
+
+    Args:
+        filename (str): path to external file from root path, static value otherwise
+        sheet_name (str): name of excel sheet in workbook
+
+    Returns:
+        dynamic_object (DynamicObject): shared dynamic object
+    """
+    return get_template(
+        'dynamic_object', (filename, sheet_name),
+        lambda: DynamicObject(filename=filename, sheet_name=sheet_name))
+
+
+def shared_model_context(model_parameters, exclude=(), setup=None, **deltas):
+    """
+    return compiled model context shared by all agents with equal model parameters - per-agent values (e.g. name)
+    are passed as deltas and layered on top of the shared context
+
+    Args:
+        model_parameters (dict): model parameters from agent config
+        exclude (tuple): names of parameters which are kept unchanged
+        setup (function): setup function of model returning additional static model parameters, see register_setup
+        deltas (dict): per-agent parameters
+
+    Returns:
+        context (MappingProxyType): read-only view on compiled model parameters
+    """
+    def compile_context():
+        context = compile_model_parameters(model_parameters, exclude=exclude)
+        if setup is None:
+            return context
+        return MappingProxyType(dict(context, **setup(context)))
+
+    setup_name = None if setup is None else setup.__module__ + '.' + setup.__qualname__
+    key = (_canonical(model_parameters), tuple(exclude), setup_name)
+    context = get_template('model_context', key, compile_context)
+    if not deltas:
+        return context
+    return MappingProxyType(ChainMap(deltas, context))
+
+
+def shared_allocations(allocations):
+    """
+    return product allocations shared by all agents with equal allocations
+
+    Args:
+        allocations (dict): product allocation as model inputs per product type and lead time
+
+    Returns:
+        allocations (dict): shared product allocations, must only be read
+    """
+    return get_template('allocations', _canonical(allocations), lambda: allocations)
+
+
+def _canonical(value):
+    """
+    return canonical string of json compatible value
+
+    Args:
+        value (object): json compatible value
+
+    Returns:
+        key (str): canonical string
+    """
+    return json.dumps(value, sort_keys=True, default=str)
@@ -0,0 +1,199 @@
+"""
+multi-resolution trading table of traders
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "multi-resolution trading table"
+
+
+class TradingTable():
+    def __init__(self, var_names, length, resolution=1, fine_length=None):
+        """
+        trading table with one row (dict) per trading period of the shortest product
+
+        rows are stored as segments of consecutive trading periods sharing one row, so products covering many
+        trading periods (e.g. day-ahead products) are cleared by updating one row per segment instead of one row per
+        trading period. the first row (current trading period) is always stored as a segment of its own.
+
+        trading periods within fine_length are resolved exactly. beyond fine_length, cleared quantities are
+        aggregated to coarse blocks of resolution trading periods - quantities of products covering a block partially
+        are spread over the whole block, so cleared energy is kept. blocks are aligned to the absolute trading
+        period, thus a block keeps its boundaries while it moves towards the current trading period.
+
+        Args:
+            var_names (list): names of variables per row
+            length (int): number of trading periods covered by trading table
+            resolution (int): number of trading periods per coarse block beyond fine_length
+            fine_length (int): number of trading periods resolved exactly, all trading periods if None
+        """
+        self.length = length
+        self.resolution = max(1, resolution)
+        self.fine_length = length if fine_length is None else max(1, fine_length)
+        self.offset = 0  # absolute trading period of first row
+        self.segments = [[1, self.__zero_row(var_names)]]  # segments as [number of trading periods, row]
+        if length > 1:
+            self.segments.append([length - 1, self.__zero_row(var_names)])
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, idx):
+        """
+        access rows, e.g. [0] for current trading period or [horizon] for trading periods covered by product
+
+        a single row is split from its segment, so it can be updated without affecting other trading periods. a
+        slice returns a list with one (shared) row per trading period, which must only be read.
+
+        Args:
+            idx (int, slice): index or horizon of trading periods
+        """
+        if isinstance(idx, slice):
+            rows = []
+            for length, row in self.__iter_segments(idx.start, idx.stop):
+                rows.extend([row] * length)
+            return rows
+        if idx < 0:
+            idx += self.length
+        self.__split_at(idx)
+        self.__split_at(idx + 1)
+        return self.segments[self.__find(idx)[0]][1]
+
+    def column(self, var_name, horizon):
+        """
+        return values of variable for trading periods covered by horizon
+
+        Args:
+            var_name (str): name of variable
+            horizon (slice): covered indices of trading table
+
+        Returns:
+            values (list): one value per trading period
+        """
+        values = []
+        for length, row in self.__iter_segments(horizon.start, horizon.stop):
+            values.extend([row[var_name]] * length)
+        return values
+
+    def split(self, horizon, quantity):
+        """
+        split segments at boundaries of horizon and return rows covering it - quantities beyond fine_length are
+        aggregated to coarse blocks
+
+        Args:
+            horizon (slice): covered indices of trading table
+            quantity (float): quantity per trading period
+
+        Returns:
+            rows (list): list of (row, quantity per trading period) - every row is returned once
+        """
+        start, stop = horizon.start, horizon.stop
+        parts = []
+
+        # exactly resolved trading periods
+        fine_stop = min(stop, max(start, self.fine_length))
+        if fine_stop > start:
+            parts.append((start, fine_stop, quantity))
+
+        # coarse blocks - spread quantity over blocks covered partially
+        if stop > fine_stop:
+            coarse_start = max(self.fine_length, fine_stop - (self.offset + fine_stop) % self.resolution)
+            coarse_stop = min(self.length, stop + (-(self.offset + stop)) % self.resolution)
+            if (coarse_start, coarse_stop) != (fine_stop, stop):
+                quantity = quantity * (stop - fine_stop) / (coarse_stop - coarse_start)
+            parts.append((coarse_start, coarse_stop, quantity))
+
+        rows = []
+        for part_start, part_stop, part_quantity in parts:
+            self.__split_at(part_start)
+            self.__split_at(part_stop)
+            rows.extend((row, part_quantity) for _, row in self.__iter_segments(part_start, part_stop))
+        return rows
+
+    def roll(self):
+        """
+        drop row of current trading period and append empty row with same variables
+
+        Returns:
+            row (dict): dropped row of current trading period
+        """
+        row = self.segments.pop(0)[1]
+        self.offset += 1
+
+        # empty rows are merged into last segment
+        zero_row = self.__zero_row(row)
+        if self.segments and self.segments[-1][1] == zero_row:
+            self.segments[-1][0] += 1
+        else:
+            self.segments.append([1, zero_row])
+
+        # current trading period is always a segment of its own
+        self.__split_at(1)
+        return row
+
+    def __zero_row(self, var_names):
+        """
+        return row with all variables set to zero
+
+        Args:
+            var_names (iterable): names of variables
+        """
+        return {var_name: 0 for var_name in var_names}
+
+    def __find(self, idx):
+        """
+        find segment containing trading period
+
+        Args:
+            idx (int): index of trading period
+
+        Returns:
+            position (int): position of segment
+            start (int): index of first trading period of segment
+        """
+        start = 0
+        for position, (length, _) in enumerate(self.segments):
+            if idx < start + length:
+                return position, start
+            start += length
+        raise IndexError('trading table index out of range')
+
+    def __split_at(self, idx):
+        """
+        split segment so that a segment starts at trading period idx
+
+        Args:
+            idx (int): index of trading period
+        """
+        if idx <= 0 or idx >= self.length:
+            return
+        position, start = self.__find(idx)
+        if start == idx:
+            return
+        length, row = self.segments[position]
+        self.segments[position][0] = idx - start
+        self.segments.insert(position + 1, [start + length - idx, dict(row)])
+
+    def __iter_segments(self, start, stop):
+        """
+        iterate over segments overlapping trading periods from start to stop
+
+        Args:
+            start (int): index of first trading period
+            stop (int): index after last trading period
+
+        Yields:
+            length (int): number of overlapping trading periods
+            row (dict): row of segment
+        """
+        segment_start = 0
+        for length, row in self.segments:
+            segment_stop = segment_start + length
+            overlap = min(stop, segment_stop) - max(start, segment_start)
+            if overlap > 0:
+                yield overlap, row
+            if segment_stop >= stop:
+                return
+            segment_start = segment_stop
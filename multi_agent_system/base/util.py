@@ -10,6 +10,8 @@ __subject__ = "utility functions within project"
 
 import os
 import json
+from collections import deque
+from types import MappingProxyType
 import pandas as pd
 import numpy as np
 
@@ -29,6 +31,63 @@ def read_config(file_path):
     return json_data
 
 
+def compile_model_parameters(model_parameters, exclude=()):
+    """
+    compile static model parameters once into an immutable context - rectangular numeric lists are converted to
+    read-only numpy arrays, all other values (e.g. ragged lists or strings) are kept
+
+    Args:
+        model_parameters (dict): model parameters from agent config
+        exclude (tuple): names of parameters which are kept unchanged
+
+    Returns:
+        context (MappingProxyType): read-only view on compiled model parameters
+    """
+    context = {}
+    for name, value in model_parameters.items():
+        if isinstance(value, list) and name not in exclude:
+            try:
+                array = np.array(value)
+            except ValueError:
+                array = None
+            if array is not None and array.dtype.kind in 'iuf':
+                value = array.astype(np.float64)
+                value.flags.writeable = False
+        context[name] = value
+    return MappingProxyType(context)
+
+
+class ObservationBuffer(deque):
+    def __init__(self, maxlen, archive_path=None):
+        """
+        ring buffer holding the latest observations of an agent with optional archive on disk
+
+        Args:
+            maxlen (int): number of observations kept in memory, older observations are dropped
+            archive_path (str): path to json lines file every observation is appended to, no archive if None
+        """
+        super().__init__(maxlen=maxlen)
+        self.archive_path = archive_path
+
+        # create directory of archive file
+        if self.archive_path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.archive_path)), exist_ok=True)
+
+    def append(self, observation):
+        """
+        append observation to ring buffer and archive
+
+        Args:
+            observation (dict): observed values from environment
+        """
+        super().append(observation)
+
+        # write observation to archive for analysis - datetimes are stored as strings
+        if self.archive_path is not None:
+            with open(self.archive_path, 'a') as file:
+                file.write(json.dumps(observation, default=str) + '\n')
+
+
 class DynamicObject():
     def __init__(self, filename, sheet_name):
         """
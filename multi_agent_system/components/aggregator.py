@@ -0,0 +1,185 @@
+"""
+aggregator agent
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "aggregator agent"
+
+import uuid
+from multi_agent_system.base.base_agent import BaseAgent
+from multi_agent_system.base.messages import order_msg, trade_msg
+
+
+class Aggregator(BaseAgent):
+    """
+    aggregator between a group of traders (members) and markets - bid ladders of members are merged into one
+    aggregated bid curve per market, clearing results are disaggregated back to the members
+
+    only divisible and independent orders (no minimum ratio of acceptance, no coupled orders) are merged into price
+    levels. all other orders (including curve orders) are forwarded unchanged and cleared directly with the member.
+    this includes the bid ladders of converters, storages and heat pumps - a fully cleared step of a ladder removes its
+    coupled steps, i.e. the steps are exclusive alternatives of one member, which a bid curve merged across members
+    cannot represent. aggregating all traders of the shipped config 2024_01_10_1_day_s5 thus reduces the order books
+    by 0.3 % (1.2 % for 2024_01_10_1_day_s3_2), aggregators pay off for groups of consumers with independent orders.
+    within the double auction, orders of one side and sender are cleared in merit order (buys by descending, sells by
+    ascending price), thus trades of the aggregator are assigned to its price levels in merit order and split pro rata
+    to the member orders of a price level.
+
+    members must not send delta orders (order lifecycle messages), since their standing orders would bypass the
+    aggregated bid curve. with trade aggregation of markets, the aggregator recieves one trade with volume-weighted
+    price per market and product - quantities are still assigned to price levels in merit order, but every member
+    order is settled at the volume-weighted price instead of the price of its level, so only the total costs of all
+    members are kept.
+
+    Args:
+        BaseAgent (class): extends BaseAgent
+    """
+
+    def setup_agent(self):
+        """
+        initally executed setup method
+        """
+        self.members = list(self.agent_config['base_config']['connections_traders'])
+        self.market_names = list(self.agent_config['base_config']['connections_markets'])
+        if self.experiment_config.get('delta_orders', False):
+            raise ValueError('Aggregator ' + self.name + ' does not support delta orders of its members, disable '
+                             'delta_orders or remove aggregator.')
+        if self.experiment_config.get('trade_aggregation', False):
+            print('[INFO] Trades of aggregator ' + self.name + ' are aggregated by markets, members are settled at '
+                  'volume-weighted prices.')
+
+        # member orders and trades of aggregator of current trading round by product type and lead time
+        self.member_orders = {}
+        self.price_levels = {}
+        self.trades = {}
+
+    def routes(self):
+        """
+        return routes of order messages which are sent via aggregator
+
+        Returns:
+            routes (list): list of (member name, market name)
+        """
+        return [(member, market) for member in self.members for market in self.market_names]
+
+    def process_msg(self, msg):
+        """
+        implements message processing
+
+        Args:
+            msg (dict): message object
+        """
+        key = (msg['product_type'], msg['product_lead_time'])
+
+        # orders without quantity are not forwarded, equal to markets
+        if msg['type'] in ('order_msg', 'curve_order_msg') and msg['quantity'] != 0:
+            self.member_orders.setdefault(key, []).append(msg)
+        elif msg['type'] == 'trade_msg':
+            self.trades.setdefault(key, []).append(msg)
+        elif msg['type'] == 'order_lifecycle_msg':
+            print('[ERROR] Aggregator ' + self.name + ' does not support order lifecycle message of ' +
+                  msg['sender_id'] + '.')
+
+    def trade(self, product):
+        """
+        merge member orders of product into aggregated bid curve
+
+        Args:
+            product (dict): traded product with product type and lead time
+
+        Returns:
+            msgs (list): list of order messages which are processed to markets - forwarded member orders first,
+                followed by one order per market, order type and price
+        """
+        key = (product['product_type'], product['lead_time'])
+        forwarded_msgs = []
+        price_levels = {}
+        for msg in self.member_orders.pop(key, []):
+            if msg['type'] == 'order_msg' and msg['min_acceptance_ratio'] == 0 and not msg['coupled_order']:
+                price_levels.setdefault((msg['reciever_id'], msg['order_type'], msg['price']), []).append(msg)
+            else:
+                forwarded_msgs.append(msg)
+
+        # one order per price level
+        self.price_levels[key] = []
+        for (market, order_type, price), msgs in price_levels.items():
+            msg = order_msg(
+                sender_id=self.name,
+                reciever_id=market,
+                order_type=order_type,
+                product_type=product['product_type'],
+                product_lead_time=product['lead_time'],
+                quantity=sum(member_msg['quantity'] for member_msg in msgs),
+                price=price,
+                min_acceptance_ratio=0,
+                coupled_order=None,
+                id=uuid.uuid4())
+            self.price_levels[key].append((msg, msgs))
+            forwarded_msgs.append(msg)
+        return forwarded_msgs
+
+    def distribute(self, product, experiment_time=None):
+        """
+        disaggregate trades of aggregated bid curve to member orders
+
+        Args:
+            product (dict): traded product with product type and lead time
+            experiment_time (datetime): clearing time for logging
+
+        Returns:
+            msgs (list): list of trade messages which are processed to members
+        """
+        key = (product['product_type'], product['lead_time'])
+        trades = self.trades.pop(key, [])
+        price_levels = self.price_levels.pop(key, [])
+
+        # price levels per market and order type in merit order with rest quantity
+        merit_orders = {}
+        for msg, member_msgs in price_levels:
+            merit_orders.setdefault((msg['reciever_id'], msg['order_type']), []).append(
+                [msg['price'], msg['quantity'], msg, member_msgs])
+        for (_, order_type), levels in merit_orders.items():
+            levels.sort(key=lambda level: level[0], reverse=order_type == 'buy')
+
+        msgs = []
+        for trade in trades:
+            quantity = trade['quantity']
+            for level in merit_orders.get((trade['sender_id'], trade['trade_type']), []):
+                if quantity <= 0:
+                    break
+                if level[1] <= 0:
+                    continue
+                fill = min(quantity, level[1])
+                level[1] -= fill
+                quantity -= fill
+
+                # split fill of price level pro rata to member orders
+                for member_msg in level[3]:
+                    msgs.append(trade_msg(
+                        sender_id=trade['sender_id'],
+                        reciever_id=member_msg['sender_id'],
+                        trade_type=trade['trade_type'],
+                        product_type=trade['product_type'],
+                        product_lead_time=trade['product_lead_time'],
+                        quantity=fill * member_msg['quantity'] / level[2]['quantity'],
+                        price=trade['price']))
+            if quantity > 1e-9 * max(1, trade['quantity']):
+                print('[ERROR] Trade of aggregator ' + self.name + ' exceeds aggregated quantity by ' +
+                      str(quantity) + '.')
+
+        log = {
+            'time': experiment_time,
+            'product': product,
+            'num_member_orders': sum(len(member_msgs) for _, member_msgs in price_levels),
+            'num_orders': len(price_levels),
+            'quantity': sum(trade['quantity'] for trade in trades),
+        }
+        self.trading_table_longtime.append(log)
+        return msgs
+
+
+if __name__ == '__main__':
+    pass
@@ -10,8 +10,7 @@ __subject__ = "consumer agent"
 
 import numpy as np
 from multi_agent_system.components.trader import Trader
-from multi_agent_system.base.util import DynamicObject
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
+from multi_agent_system.base.templates import shared_dynamic_object
 
 
 class Consumer(Trader):
@@ -22,42 +21,28 @@ class Consumer(Trader):
         Trader (object): extends trader class
     """
 
-    def process_msg(self, msg):
+    def _balancing_weights(self, sender_id, system_id):
         """
-        extend method for message processing
+        extend billing weights if consumer is connected to more than one network
 
         Args:
-            msg (dict): message from markets or system operators
-        """
-        super().process_msg(msg)
-
-        # overwrite results from parent method if consumer is connected to more than one network
-        if len(self.agent_config['base_config']['connections_markets']) > 1 and msg['type'] == 'balancing_energy_msg':
-            log = self.trading_table_longtime[-1]
-            is_hot_network = msg['sender_id'] == self.agent_config['base_config']['connections_markets'][0]
-
-            # difference of cleared to real energy as producer
-            pos_energy_diff = log['cleared_energy_pos'] - log['real_energy_pos']
-            # difference of cleared to real energy as producer
-            neg_energy_diff = log['cleared_energy_neg'] - log['real_energy_neg']
-
-            # considered energy difference depending on heating / cooling use case
-            energy_difference = neg_energy_diff if is_hot_network else pos_energy_diff
+            sender_id (str): name of system operator
+            system_id (str): name of billed network
 
-            if energy_difference >= 0:
-                # produced less/consumed more energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_pos']
-            else:
-                # produced more/consumed less energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_neg']
+        Returns:
+            weights (tuple): weights of cleared_energy_pos, cleared_energy_neg, real_energy_pos and real_energy_neg
+            sign (float): sign of energy difference
+        """
+        if len(self.agent_config['base_config']['connections_markets']) <= 1:
+            return super()._balancing_weights(sender_id=sender_id, system_id=system_id)
 
-            # update longtime trading log with balancing energy costs
-            if energy_difference != 0:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' +
-                                                msg['system_id']] = cost_balancing_energy / energy_difference
-            else:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' + msg['system_id']] = 0
-            self.trading_table_longtime[-1]['balancing_energy' + '_' + msg['system_id']] = energy_difference
+        # considered energy difference depending on heating / cooling use case
+        is_hot_network = sender_id == self.agent_config['base_config']['connections_markets'][0]
+        if is_hot_network:
+            # difference of cleared to real energy as consumer
+            return (0, 1, 0, 1), 1
+        # difference of cleared to real energy as producer
+        return (1, 0, 1, 0), 1
 
     def setup_agent(self):
         """
@@ -69,7 +54,7 @@ class Consumer(Trader):
 
         # additional demand information if demand cannot be forecasted by global parameters, e.g. ambient temperature
         try:
-            self.demands = DynamicObject(
+            self.demands = shared_dynamic_object(
                 filename=self.agent_config['model_config']['model_parameters']['demand'],
                 sheet_name=self.name)
             self.has_demand = True
@@ -140,40 +125,29 @@ class Consumer(Trader):
 
         return action
 
-    def trade(self, product):
+    def _is_participating(self, product, allocation):
         """
-        method to call trading process
+        extend participation - consumers always execute forecast of shorttime product for minimum demand
 
         Args:
-            product (int): traded product defined by product duration in seconds
+            product (dict): traded product with product type and lead time
+            allocation (dict): product allocation as model inputs
 
         Returns:
-            msgs (list): list of order messages which are processed to market
+            is_participating (bool): True if consumer trades product
         """
+        return super()._is_participating(product=product, allocation=allocation) or \
+            product['product_type'] == self.shorttime_product
 
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities to pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
+    def _quantity_assessment(self, product):
         """
-        quantity_assessment
+        extend quantity assessment by agent specific model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
-
-        Returns:
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
         """
         super()._quantity_assessment(product=product)
 
-        self.physical_parameters['model_inputs']['product_allocation'] = self.product_allocation[
-            product['product_type']][product['lead_time']]
-
         # pass demand to model if demand exists
         if self.has_demand:
             start_time = self.experiment_time + product['lead_time']
@@ -182,33 +156,19 @@ class Consumer(Trader):
             mean_demand = np.mean(df_demand['value'].to_numpy())
             self.physical_parameters['model_inputs']['demand'] = mean_demand
 
-        # execute model and return quantities
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-
-        # save forecast before execution - consumers always execute forecast for minimum energy
-        if self.physical_parameters['model_inputs']['shorttime_product']:
-            self.min_demand = quantities['thermal_energy_min'][0]
-
-        return quantities
-
-    def __pricing(self, product, quantities):
+    def _process_quantities(self, quantities):
         """
-        pricing
+        save forecast before execution - consumers always execute forecast for minimum energy
 
         Args:
-            product (int): traded product defined by product duration in seconds
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
 
         Returns:
-            msgs (list): list of order messages which are processed to market
+            quantities (dict): unchanged quantities
         """
-        super()._pricing(product=product, quantities=quantities)
-
-        # execute pricing model and return order messages
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
+        if self.physical_parameters['model_inputs']['shorttime_product']:
+            self.min_demand = quantities['thermal_energy_min'][0]
+        return quantities
 
 
 if __name__ == '__main__':
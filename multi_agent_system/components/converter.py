@@ -10,8 +10,7 @@ __subject__ = "converter agent"
 
 import numpy as np
 from multi_agent_system.components.trader import Trader
-from multi_agent_system.base.util import DynamicObject
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
+from multi_agent_system.base.templates import shared_dynamic_object
 
 
 class Converter(Trader):
@@ -29,11 +28,11 @@ class Converter(Trader):
         super().setup_agent()
 
         # initalize dynamic price and demand objects
-        self.electricity_prices = DynamicObject(
+        self.electricity_prices = shared_dynamic_object(
             filename=self.experiment_config['cost_electricity'],
             sheet_name='electricity_price')
-        self.fuel_prices = DynamicObject(filename=self.experiment_config['cost_fuel'], sheet_name='fuel_price')
-        self.electricity_demand = DynamicObject(
+        self.fuel_prices = shared_dynamic_object(filename=self.experiment_config['cost_fuel'], sheet_name='fuel_price')
+        self.electricity_demand = shared_dynamic_object(
             filename=self.experiment_config['electricity_demand'],
             sheet_name='electricity_demand')
 
@@ -60,55 +59,14 @@ class Converter(Trader):
             # consumed cold, produced heat
             self.trading_table[0]['real_energy_pos'] = abs(energy_difference)
 
-    def trade(self, product):
+    def _pricing(self, product, quantities):
         """
-        method to call trading process
+        extend pricing by agent specific model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
-
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities ot pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
-        """
-        quantity_assessment
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
         """
-        super()._quantity_assessment(product=product)
-
-        self.physical_parameters['model_inputs']['product_allocation'] = self.product_allocation[
-            product['product_type']][product['lead_time']]
-
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-        return quantities
-
-    def __pricing(self, product, quantities):
-        """
-        pricing
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
         super()._pricing(product=product, quantities=quantities)
         last_log = self.trading_table_longtime[-1]
 
@@ -129,10 +87,6 @@ class Converter(Trader):
         self.pricing_parameters['model_inputs']['electricity_demand'] = mean_electricity_demand
         self.pricing_parameters['model_inputs']['chp_renumeration'] = self.experiment_config['chp_renumeration']
 
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
-
 
 if __name__ == '__main__':
     pass
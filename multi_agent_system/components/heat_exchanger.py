@@ -9,7 +9,6 @@ __project__ = "Transactive control of linked heating and cooling system at produ
 __subject__ = "heat exchanger agent"
 
 from multi_agent_system.components.trader import Trader
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
 
 
 class HeatExchanger(Trader):
@@ -20,39 +19,22 @@ class HeatExchanger(Trader):
         Trader (object): extends trader class
     """
 
-    def process_msg(self, msg):
+    def _balancing_weights(self, sender_id, system_id):
         """
-        implements message processing
+        implements billing weights - heat counter is implemented on producer network and counts only positive energy
 
         Args:
-            msg (dict): message object
-        """
-        super().process_msg(msg)
-
-        # overwrite results from parent method if consumer is connected to more than one network
-        if msg['type'] == 'balancing_energy_msg':
-            log = self.trading_table_longtime[-1]
-            is_hot_network = msg['system_id'] == self.agent_config['base_config']['connections_markets'][0]
-            # heat counter is implemented on producer network - heat counter counts only positive energy
-            if is_hot_network:
-                energy_difference = -(log['cleared_energy_neg'] - log['real_energy_pos'])
-            else:
-                energy_difference = log['cleared_energy_pos'] - log['real_energy_pos']
-
-            if energy_difference >= 0:
-                # produced less/consumed more energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_pos']
-            else:
-                # produced more/consumed less energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_neg']
+            sender_id (str): name of system operator
+            system_id (str): name of billed network
 
-            # update longtime trading log with balancing energy costs
-            if energy_difference != 0:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' +
-                                                msg['system_id']] = cost_balancing_energy / energy_difference
-            else:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' + msg['system_id']] = 0
-            self.trading_table_longtime[-1]['balancing_energy' + '_' + msg['system_id']] = energy_difference
+        Returns:
+            weights (tuple): weights of cleared_energy_pos, cleared_energy_neg, real_energy_pos and real_energy_neg
+            sign (float): sign of energy difference
+        """
+        is_hot_network = system_id == self.agent_config['base_config']['connections_markets'][0]
+        if is_hot_network:
+            return (0, 1, 1, 0), -1
+        return (1, 0, 1, 0), 1
 
     def get_state(self, observation, control_step):
         """
@@ -125,55 +107,13 @@ class HeatExchanger(Trader):
         action = {output_vars['bSetStatusOn']: bSetStatusOn, output_vars['fSetPoint']: fSetPoint}
         return action
 
-    def trade(self, product):
-        """
-        method to call trading process
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
-
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities to pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
-        """
-        quantity_assessment
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-        """
-        super()._quantity_assessment(product=product)
-
-        # append product allocation and use case to pricing model inputs
-        self.physical_parameters['model_inputs']['product_allocation'] = self.product_allocation[
-            product['product_type']][product['lead_time']]
-
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-        return quantities
-
-    def __pricing(self, product, quantities):
+    def _pricing(self, product, quantities):
         """
-        pricing
+        extend pricing by agent specific model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
         """
         super()._pricing(product=product, quantities=quantities)
         last_log = self.trading_table_longtime[-1]
@@ -184,10 +124,6 @@ class HeatExchanger(Trader):
         else:
             self.pricing_parameters['model_inputs']['is_running'] = False
 
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
-
 
 if __name__ == '__main__':
     pass
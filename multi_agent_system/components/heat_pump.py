@@ -10,8 +10,7 @@ __subject__ = "heat pump agent"
 
 import numpy as np
 from multi_agent_system.components.trader import Trader
-from multi_agent_system.base.util import DynamicObject
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
+from multi_agent_system.base.templates import shared_dynamic_object
 
 
 class HeatPump(Trader):
@@ -30,43 +29,37 @@ class HeatPump(Trader):
 
         # initialize cop and electricity price object
         self.cop = 1
-        self.electricity_prices = DynamicObject(
+        self.electricity_prices = shared_dynamic_object(
             filename=self.experiment_config['cost_electricity'],
             sheet_name='electricity_price')
 
-    def process_msg(self, msg):
+    def _balancing_weights(self, sender_id, system_id):
         """
-        implements message processing
+        implements billing weights - heat counter is implemented on producer network
 
         Args:
-            msg (dict): message object
+            sender_id (str): name of system operator
+            system_id (str): name of billed network
+
+        Returns:
+            weights (tuple): weights of cleared_energy_pos, cleared_energy_neg, real_energy_pos and real_energy_neg
+            sign (float): sign of energy difference
         """
-        super().process_msg(msg)
-
-        # overwrite results from parent method if consumer is connected to more than one network
-        if msg['type'] == 'balancing_energy_msg':
-            log = self.trading_table_longtime[-1]
-            is_hot_network = msg['system_id'] == self.agent_config['base_config']['connections_markets'][0]
-            # heat counter is implemented on producer network and
-            if is_hot_network:
-                energy_difference = (log['cleared_energy_pos'] - log['real_energy_pos'])
-            else:
-                energy_difference = -((log['cleared_energy_pos'] - log['real_energy_pos']) * (1 - 1 / self.cop))
+        is_hot_network = system_id == self.agent_config['base_config']['connections_markets'][0]
+        return (1, 0, 1, 0), 1 if is_hot_network else -1
 
-            if energy_difference >= 0:
-                # produced less/consumed more energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_pos']
-            else:
-                # produced more/consumed less energy than cleared
-                cost_balancing_energy = energy_difference * msg['price_neg']
+    def _balancing_factor(self, system_id):
+        """
+        implements scaling of balancing energy on consumer network by current cop
 
-            # update longtime trading log with balancing energy costs
-            if energy_difference != 0:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' +
-                                                msg['system_id']] = cost_balancing_energy / energy_difference
-            else:
-                self.trading_table_longtime[-1]['cost_balancing_energy' + '_' + msg['system_id']] = 0
-            self.trading_table_longtime[-1]['balancing_energy' + '_' + msg['system_id']] = energy_difference
+        Args:
+            system_id (str): name of billed network
+
+        Returns:
+            factor (float): scaling factor of energy difference
+        """
+        is_hot_network = system_id == self.agent_config['base_config']['connections_markets'][0]
+        return 1 if is_hot_network else (1 - 1 / self.cop)
 
     def get_state(self, observation, control_step):
         """
@@ -148,56 +141,14 @@ class HeatPump(Trader):
         action = {output_vars['bSetStatusOn']: bSetStatusOn, output_vars['fSetPoint']: fSetPoint}
         return action
 
-    def trade(self, product):
+    def _pricing(self, product, quantities):
         """
-        method to call trading process
+        extend pricing by agent specific model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
-
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities to pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
-        """
-        quantity_assessment
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
         """
-        super()._quantity_assessment(product=product)
-
-        # append product allocation and use cases to model inputs
-        self.physical_parameters['model_inputs']['product_allocation'] = self.product_allocation[
-            product['product_type']][product['lead_time']]
-
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-        return quantities
-
-    def __pricing(self, product, quantities):
-        """
-        pricing
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
         super()._pricing(product=product, quantities=quantities)
         last_log = self.trading_table_longtime[-1]
 
@@ -212,10 +163,6 @@ class HeatPump(Trader):
         mean_electricity_price = np.mean(df_electricity_price['value'].to_numpy())
         self.pricing_parameters['model_inputs']['electricity_price'] = mean_electricity_price
 
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
-
 
 if __name__ == '__main__':
     pass
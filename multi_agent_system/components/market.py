@@ -8,9 +8,14 @@ __email__ = "f.borst@ptw.tu-darmstadt.de"
 __project__ = "Transactive control of linked heating and cooling system at production sites"
 __subject__ = "market agent"
 
+import time
+from collections import deque
 import numpy as np
 from multi_agent_system.base.base_agent import BaseAgent
+from multi_agent_system.base.messages import aggregate_trade_msgs, market_state_msg
 import multi_agent_system.models.market_models as market_models  # noqa: F401
+from multi_agent_system.models.clearing_kernel import IS_NUMBA_AVAILABLE
+from multi_agent_system.models.registry import get_model
 
 
 class Market(BaseAgent):
@@ -26,11 +31,40 @@ class Market(BaseAgent):
         initally executed setup method
         """
 
+        # resolve market model once - unknown models fail at startup
+        self.market_model = get_model('market', self.agent_config['pricing_config']['model_type'])
+        self.is_curve_orders = self.agent_config['pricing_config']['model_type'] in market_models.CURVE_ORDER_MODELS
+
+        # optional compiled matching kernel of double auctions, falls back to pure python without numba
+        self.is_compiled_clearing = self.experiment_config.get('compiled_clearing', False)
+        if self.is_compiled_clearing and not IS_NUMBA_AVAILABLE:
+            print('[INFO] Numba is not available, market ' + self.name + ' is cleared in pure python.')
+        # repeated matchings of compiled clearing continue from first trade of unaccepted orders
+        self.is_warm_start = self.experiment_config.get('warm_start_clearing', False)
+        if self.is_warm_start and not self.is_compiled_clearing:
+            print('[INFO] Warm start requires compiled clearing, market ' + self.name + ' is cleared from scratch.')
+        self.clearing_statistics = {}  # number of matchings and price comparisons of compiled clearing
+
+        # optional netting of trades into one trade per trader, trade type and product with volume-weighted price
+        self.is_trade_aggregation = self.experiment_config.get('trade_aggregation', False)
+
+        # optional market state of recent clearings sent to traders of order book, see DiscretizationPolicy
+        adaptive_config = self.experiment_config.get('adaptive_discretization')
+        self.is_market_state = bool(adaptive_config)
+        self.market_states = None  # book depth and clearing latency of recent clearings
+        if self.is_market_state:
+            window = adaptive_config.get('window', 10) if isinstance(adaptive_config, dict) else 10
+            self.market_states = deque(maxlen=window)
+
         # initialize order books by lead times and products
         self.order_books = {product_type: None for product_type in list(self.products.keys())}
         for order_book in self.order_books:
             self.order_books[order_book] = {lead_time: [] for lead_time in self.products[order_book]}
 
+        # standing orders by product, lead time and trader - persist across trading rounds, see order_lifecycle_msg
+        self.standing_order_books = {product_type: {lead_time: {} for lead_time in lead_times}
+                                     for product_type, lead_times in self.products.items()}
+
     def process_msg(self, msg):
         """
         implements message processing
@@ -42,6 +76,27 @@ class Market(BaseAgent):
         # append only bids which do not hold zero quantities to order book
         if msg['type'] == 'order_msg' and msg['quantity'] != 0:
             self.__process_order(msg)
+        elif msg['type'] == 'curve_order_msg' and msg['quantity'] != 0:
+            if self.__is_admitted(msg):
+                self.__process_order(msg)
+        elif msg['type'] == 'order_lifecycle_msg':
+            self.__process_order_lifecycle(msg)
+
+    def __is_admitted(self, order):
+        """
+        check if market model clears order - curve orders are only cleared by curve order models
+
+        Args:
+            order (dict): order or curve order message
+
+        Returns:
+            is_admitted (bool): true if order is admitted to order book
+        """
+        if order['type'] == 'curve_order_msg' and not self.is_curve_orders:
+            print('[ERROR] Market model of market ' + self.name + ' does not clear curve orders, order of ' +
+                  order['sender_id'] + ' is dropped.')
+            return False
+        return True
 
     def __process_order(self, msg):
         """
@@ -52,6 +107,27 @@ class Market(BaseAgent):
         """
         self.order_books[msg['product_type']][msg['product_lead_time']].append(msg)
 
+    def __process_order_lifecycle(self, msg):
+        """
+        implements processing of order lifecycle messages - new and amended orders replace the standing order with
+        the same uuid at its position, cancelled orders are removed
+
+        Args:
+            msg (dict): order lifecycle message
+        """
+        standing_orders = self.standing_order_books[msg['product_type']][msg['product_lead_time']].setdefault(
+            msg['sender_id'], {})
+        if msg['lifecycle'] in ('new', 'amend'):
+            # rejected amendments withdraw the standing order
+            if self.__is_admitted(msg['order']):
+                standing_orders[msg['id']] = msg['order']
+            else:
+                standing_orders.pop(msg['id'], None)
+        elif msg['lifecycle'] == 'cancel':
+            standing_orders.pop(msg['id'], None)
+        else:
+            print(['[ERROR] Undefined order lifecycle: ', msg['lifecycle']])
+
     def __logging(self, experiment_time, trades, product):
         """
         log market clearing informations
@@ -89,21 +165,63 @@ class Market(BaseAgent):
         Returns:
             msgs (list): list of successful clearing results as list of trade messages
         """
-        # get order_book
+        # get order_book - standing orders without quantity are kept for later amendments but not cleared
         order_book = self.order_books[product['product_type']][product['lead_time']]
+        standing_order_book = self.standing_order_books[product['product_type']][product['lead_time']]
+        if standing_order_book:
+            # standing orders in trading order of traders (order of registration in shared product schedule)
+            ranks = {agent_name: rank for rank, agent_name in enumerate(self.schedule.allocations)}
+            senders = sorted(standing_order_book, key=lambda sender: ranks.get(sender, len(ranks)))
+            order_book = order_book + [order for sender in senders
+                                       for order in standing_order_book[sender].values() if order['quantity'] != 0]
 
         # market model
-        market_model_inputs = {"order_book": order_book, "market_id": self.name}
-
-        market_attr = {  # noqa: F841
+        market_model_inputs = {
+            "order_book": order_book,
+            "market_id": self.name,
+            "is_compiled_clearing": self.is_compiled_clearing,
+            "is_warm_start": self.is_warm_start,
+            "clearing_statistics": self.clearing_statistics}
+
+        market_attr = {
             'model_parameters': self.agent_config['pricing_config']['model_parameters'],
             'model_inputs': market_model_inputs,
         }
-        model_type = "market_models." + self.agent_config['pricing_config']['model_type']
-        msgs = eval(model_type + "(market_attr)")  # returns list with trade messages
+        if self.is_market_state:
+            start_time = time.perf_counter()
+            msgs = self.market_model(market_attr)  # returns list with trade messages
+            self.market_states.append((len(order_book), time.perf_counter() - start_time))
+            state_msgs = self.__market_state_msgs(product=product, order_book=order_book)
+        else:
+            msgs = self.market_model(market_attr)  # returns list with trade messages
+            state_msgs = []
 
-        # delete values from order books after clearing
+        # delete values from order books after clearing, standing orders persist
         self.order_books[product['product_type']][product['lead_time']].clear()
 
         self.__logging(experiment_time=experiment_time, trades=msgs, product=product)
-        return msgs
+        if self.is_trade_aggregation:
+            msgs = aggregate_trade_msgs(msgs)
+        return msgs + state_msgs
+
+    def __market_state_msgs(self, product, order_book):
+        """
+        market state of recent clearings for every trader of order book
+
+        Args:
+            product (dict): cleared product
+            order_book (list): cleared order book
+
+        Returns:
+            msgs (list): list of market state messages
+        """
+        book_depth = sum(depth for depth, _ in self.market_states) / len(self.market_states)
+        clearing_latency = sum(latency for _, latency in self.market_states) / len(self.market_states)
+        senders = dict.fromkeys(order['sender_id'] for order in order_book)
+        return [market_state_msg(
+            sender_id=self.name,
+            reciever_id=sender_id,
+            product_type=product['product_type'],
+            product_lead_time=product['lead_time'],
+            book_depth=book_depth,
+            clearing_latency=clearing_latency) for sender_id in senders]
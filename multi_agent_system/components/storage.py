@@ -9,7 +9,6 @@ __project__ = "Transactive control of linked heating and cooling system at produ
 __subject__ = "active storage agent"
 
 from multi_agent_system.components.trader import Trader
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
 
 
 class Storage(Trader):
@@ -29,20 +28,16 @@ class Storage(Trader):
         # define intial costs for stored energy, typically zero
         self.energy_costs = 0
 
-    def process_msg(self, msg):
+    def _update_after_billing(self, msg):
         """
-        extend method for message processing
+        calculate costs for stored energy after billing balancing energy
 
         Args:
-            msg (dict): message from markets or system operators
+            msg (dict): balancing energy message
         """
-        super().process_msg(msg)
-
-        # calculate costs for stored energy after billing balancing energy
-        if msg['type'] == 'balancing_energy_msg':
-            log = self.trading_table_longtime[-1]
-            cost = log['cleared_energy_neg'] * log['price_neg'] - log['cleared_energy_pos'] * log['price_pos']
-            self.energy_costs += cost
+        log = self.trading_table_longtime[-1]
+        cost = log['cleared_energy_neg'] * log['price_neg'] - log['cleared_energy_pos'] * log['price_pos']
+        self.energy_costs += cost
 
     def get_state(self, observation, control_step):
         """
@@ -96,69 +91,33 @@ class Storage(Trader):
 
         return action
 
-    def trade(self, product):
+    def _is_participating(self, product, allocation):
         """
-        method to call trading process
+        extend participation - active storages sell stored energy on shorttime product independent of allocation
 
         Args:
-            product (int): traded product defined by product duration in seconds
+            product (dict): traded product with product type and lead time
+            allocation (dict): product allocation as model inputs
 
         Returns:
-            msgs (list): list of order messages which are processed to market
+            is_participating (bool): True if storage trades product
         """
+        return super()._is_participating(product=product, allocation=allocation) or \
+            product['product_type'] == self.shorttime_product
 
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities to pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
+    def _pricing(self, product, quantities):
         """
-        quantity_assessment
+        extend pricing by agent specific model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
-
-        Returns:
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
         """
-        super()._quantity_assessment(product=product)
-
-        # extend model inputs for active storage
-        self.physical_parameters['model_inputs']['buy_product_allocation'] = self.buy_product_allocation[
-            product['product_type']][product['lead_time']]
-        self.physical_parameters['model_inputs']['sell_product_allocation'] = self.sell_product_allocation[
-            product['product_type']][product['lead_time']]
-
-        # execute model and return quantities
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-        return quantities
-
-    def __pricing(self, product, quantities):
-        """
-        pricing
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
         super()._pricing(product=product, quantities=quantities)
 
         # extends model inputs with active storage specific informations, e.g. costs for stored energy
         self.pricing_parameters['model_inputs']['energy_costs'] = self.energy_costs
 
-        # execute pricing model and return order messages
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
-
 
 if __name__ == '__main__':
     pass
@@ -10,7 +10,6 @@ __subject__ = "buffer storage agent"
 
 from multi_agent_system.components.trader import Trader
 from multi_agent_system.base.messages import balancing_energy_msg
-from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
 
 
 class SystemOperator(Trader):
@@ -87,65 +86,6 @@ class SystemOperator(Trader):
             ))
         return msgs
 
-    def trade(self, product):
-        """
-        method to call trading process
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
-
-        # perform capacity assessment
-        quantities = self.__quantity_assessment(product=product)
-
-        # pass quantities to pricing assessment
-        msgs = self.__pricing(product=product, quantities=quantities)
-
-        return msgs
-
-    def __quantity_assessment(self, product):
-        """
-        quantity_assessment
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-
-        Returns:
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-        """
-        super()._quantity_assessment(product=product)
-
-        self.physical_parameters['model_inputs']['buy_product_allocation'] = self.buy_product_allocation[
-            product['product_type']][product['lead_time']]
-        self.physical_parameters['model_inputs']['sell_product_allocation'] = self.sell_product_allocation[
-            product['product_type']][product['lead_time']]
-
-        # # execute pmodel and return quantities
-        model_type = "quantity_assessment_models." + self.agent_config['model_config']['capacity_model']
-        quantities = eval(model_type + "(self.physical_parameters)")
-        return quantities
-
-    def __pricing(self, product, quantities):
-        """
-        pricing
-
-        Args:
-            product (int): traded product defined by product duration in seconds
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
-
-        Returns:
-            msgs (list): list of order messages which are processed to market
-        """
-        super()._pricing(product=product, quantities=quantities)
-
-        # execute pricing model and return order messages
-        model_type = "pricing_models." + self.agent_config['model_config']['pricing_model']
-        order_msgs = eval(model_type + "(self.pricing_parameters)")
-        return order_msgs
-
 
 if __name__ == '__main__':
     pass
@@ -11,7 +11,20 @@ __subject__ = "trader agent (base)"
 from abc import abstractmethod
 import numpy as np
 from multi_agent_system.base.base_agent import BaseAgent
-from multi_agent_system.base.util import DynamicObject
+from multi_agent_system.base.bid_cache import BidCache, retag_orders
+from multi_agent_system.base.billing import BILLING_COLUMNS, compute_balancing_energy
+from multi_agent_system.base.discretization import DiscretizationPolicy
+from multi_agent_system.base.messages import order_lifecycle_msg
+from multi_agent_system.base.trading_table import TradingTable
+from multi_agent_system.base.templates import shared_allocations, shared_dynamic_object, shared_model_context
+from multi_agent_system.models import pricing_models, quantity_assessment_models  # noqa: F401
+from multi_agent_system.models.registry import get_inputs, get_model, get_setup
+
+# names of product allocations within model parameters
+ALLOCATION_NAMES = ('product_allocation', 'buy_product_allocation', 'sell_product_allocation')
+
+# agent types which adapt their bid discretization to market states
+ADAPTIVE_DISCRETIZATION_TYPES = ('converter', 'heat_pump')
 
 
 class Trader(BaseAgent):
@@ -27,8 +40,12 @@ class Trader(BaseAgent):
         initally executed setup method
         """
 
+        # resolve capacity and pricing models once - unknown models fail at startup
+        self.capacity_model = get_model('quantity_assessment', self.agent_config['model_config']['capacity_model'])
+        self.pricing_model = get_model('pricing', self.agent_config['model_config']['pricing_model'])
+
         # initialize price objects
-        self.ambient_temperature = DynamicObject(
+        self.ambient_temperature = shared_dynamic_object(
             filename=self.experiment_config['ambient_temperature'],
             sheet_name='ambient_temperature')
 
@@ -47,34 +64,127 @@ class Trader(BaseAgent):
                 var_name_list.append(str(product) + '_' + market)
                 var_name_list.append("price_" + str(product) + '_' + market)
 
-        # create trading table as data frame
-        longest_product = max(list(self.products.keys()))
-        shortest_product = min(list(self.products.keys()))
-        longest_lead_time = max(self.products[longest_product])
-        horizon = int((longest_product + longest_lead_time) / shortest_product)
-        self.trading_table = [{var_name: 0 for var_name in var_name_list} for _ in range(horizon)]
+        # create trading table covering longest product with longest lead time - optionally with coarse resolution
+        # far-term, e.g. {"fine_horizon": 86400, "resolution": 3600} in seconds
+        resolution_config = self.experiment_config.get('trading_table_resolution')
+        if resolution_config:
+            self.trading_table = TradingTable(
+                var_name_list, self.schedule.horizon_length,
+                resolution=int(resolution_config['resolution'] / self.trading_time),
+                fine_length=int(resolution_config['fine_horizon'] / self.trading_time))
+        else:
+            self.trading_table = TradingTable(var_name_list, self.schedule.horizon_length)
 
-        # create nested dictionary for product allocation
+        # register product allocation as model inputs per product and lead time in product schedule
         if self.type in ['system_operator', 'storage']:
-            self.buy_product_allocation = {}
-            self.sell_product_allocation = {}
-            for product, lead_time, allocation in zip(list(self.products.keys()),
-                                                      list(self.products.values()),
-                                                      self.agent_config['model_config'][
-                                                          'model_parameters']['buy_product_allocation']):
-                self.buy_product_allocation[product] = dict(zip(lead_time, allocation))
-            for product, lead_time, allocation in zip(list(self.products.keys()),
-                                                      list(self.products.values()),
-                                                      self.agent_config['model_config'][
-                                                          'model_parameters']['sell_product_allocation']):
-                self.sell_product_allocation[product] = dict(zip(lead_time, allocation))
+            allocation_names = ['buy_product_allocation', 'sell_product_allocation']
+        else:
+            allocation_names = ['product_allocation']
+        allocations = {product: {lead_time: {} for lead_time in lead_times}
+                       for product, lead_times in self.products.items()}
+        for allocation_name in allocation_names:
+            for product, lead_times, allocation in zip(list(self.products.keys()),
+                                                       list(self.products.values()),
+                                                       self.agent_config['model_config'][
+                                                           'model_parameters'][allocation_name]):
+                for lead_time, value in zip(lead_times, allocation):
+                    allocations[product][lead_time][allocation_name] = value
+        allocations = shared_allocations(allocations)  # identical agents share their product allocation
+        self.shorttime_product = self.schedule.shorttime_product
+
+        # participation matrix - products which can only produce zero orders are not traded (enabled by default)
+        participation = None
+        if self.experiment_config.get('participation_matrix', True):
+            participation = {product: {lead_time: self._is_participating(
+                product={'product_type': product, 'lead_time': lead_time},
+                allocation=allocations[product][lead_time]) for lead_time in lead_times}
+                for product, lead_times in self.products.items()}
+        self.schedule.add_allocations(self.name, allocations, participation)
+
+        # immutable static context of capacity and pricing model compiled once and shared by agents with equal model
+        # parameters - product allocations are compiled in product schedule, pricing context is extended by connected
+        # markets and agent name
+        model_parameters = self.agent_config['model_config']['model_parameters']
+        self.physical_context = shared_model_context(
+            model_parameters, exclude=ALLOCATION_NAMES,
+            setup=get_setup('quantity_assessment', self.agent_config['model_config']['capacity_model']))
+        self.pricing_context = shared_model_context(
+            model_parameters, exclude=ALLOCATION_NAMES,
+            setup=get_setup('pricing', self.agent_config['model_config']['pricing_model']),
+            markets=self.agent_config['base_config']['connections_markets'],
+            name=self.name)
+
+        # optional memoization of bids keyed on model inputs read by capacity and pricing model, e.g. {"size": 128,
+        # "resolution": 0.001, "resolutions": {"fReturnTemperature": 0.5}} or true for defaults
+        self.capacity_inputs = get_inputs('quantity_assessment', self.agent_config['model_config']['capacity_model'])
+        self.pricing_inputs = get_inputs('pricing', self.agent_config['model_config']['pricing_model'])
+        bid_cache_config = self.experiment_config.get('bid_cache')
+        if isinstance(bid_cache_config, dict):
+            self.bid_cache = BidCache(**bid_cache_config)
+        elif bid_cache_config:
+            self.bid_cache = BidCache()
+        else:
+            self.bid_cache = None
+
+        # optional adaptive bid discretization within bounds, e.g. {"target_depth": 40, "window": 10} - a target of
+        # clearing latency (e.g. "target_latency": 0.01) is measured in wall-clock time and not reproducible. the
+        # capacity context is compiled per bid discretization
+        adaptive_config = self.experiment_config.get('adaptive_discretization')
+        if (adaptive_config and self.type in ADAPTIVE_DISCRETIZATION_TYPES and
+                model_parameters.get('bid_discretization', 1) > 1):
+            policy_config = dict(adaptive_config) if isinstance(adaptive_config, dict) else {}
+            policy_config.pop('window', None)  # window of recent clearings is evaluated by markets
+            self.discretization_policy = DiscretizationPolicy(
+                bid_discretization=model_parameters['bid_discretization'],
+                bounds=model_parameters.get('bid_discretization_range'),
+                **policy_config)
+            self.__set_discretization(self.discretization_policy.bid_discretization)
         else:
-            self.product_allocation = {}
-            for product, lead_time, allocation in zip(list(self.products.keys()), list(
-                    self.products.values()), self.agent_config['model_config'][
-                        'model_parameters']['product_allocation']):
-                self.product_allocation[product] = dict(zip(lead_time, allocation))
-        self.shorttime_product = list(self.products.keys())[0]
+            self.discretization_policy = None
+
+        # optional order lifecycle - bid ladders persist in order books of markets and only changes are sent
+        self.is_delta_orders = self.experiment_config.get('delta_orders', False)
+        self.standing_orders = {}  # standing orders by product type, lead time and market
+
+        # static model inputs and names of observed model inputs
+        self.env_input_names = tuple(self.agent_config['base_config']['env_inputs'])
+        self.static_physical_inputs = {'trading_time': self.trading_time}
+        self.static_pricing_inputs = {
+            'positive_market_limit': self.experiment_config['positive_market_limit'],
+            'negative_market_limit': self.experiment_config['negative_market_limit']}
+        # optional piecewise linear bid curves instead of coupled orders of pricing models reading is_curve_order (e.g.
+        # converters), restricted to markets clearing curve orders by set_curve_order_markets
+        if self.experiment_config.get('curve_orders', False) and (
+                self.pricing_inputs is None or 'is_curve_order' in self.pricing_inputs):
+            self.static_pricing_inputs['is_curve_order'] = True
+
+    def set_curve_order_markets(self, markets):
+        """
+        restrict curve orders to markets clearing curve orders - bid ladders of coupled orders are placed on all other
+        markets, so no orders are dropped by markets
+
+        Args:
+            markets (list): names of markets clearing curve orders
+        """
+        market = self.agent_config['base_config']['connections_markets'][0]
+        if self.static_pricing_inputs.get('is_curve_order') and market not in markets:
+            del self.static_pricing_inputs['is_curve_order']
+            print('[INFO] Market model of market ' + market + ' does not clear curve orders, ' + self.name +
+                  ' places bid ladders.')
+
+    def _is_participating(self, product, allocation):
+        """
+        check if trader can place non-zero orders for product - quantities of capacity models are scaled by product
+        allocation, so orders of products without allocation are always dropped by markets
+
+        Args:
+            product (dict): traded product with product type and lead time
+            allocation (dict): product allocation as model inputs
+
+        Returns:
+            is_participating (bool): True if trader can place non-zero orders
+        """
+        return any(value != 0 for value in allocation.values())
 
     def process_msg(self, msg):
         """
@@ -88,6 +198,8 @@ class Trader(BaseAgent):
             self.__process_clearing(msg)
         elif msg['type'] == 'balancing_energy_msg':
             self.__billing(msg)
+        elif msg['type'] == 'market_state_msg' and self.discretization_policy is not None:
+            self.discretization_policy.update(msg)
 
     def __billing(self, msg):
         """
@@ -99,25 +211,56 @@ class Trader(BaseAgent):
         # recieve price for balancing energy for last trading period - influences
         # only longtime trading log, because trading log has already been updated
         log = self.trading_table_longtime[-1]
+        weights, sign = self._balancing_weights(sender_id=msg['sender_id'], system_id=msg['system_id'])
 
-        # Connection to one network: combination of positive and negative clearing, e.g., storages
-        energy_difference = (log['cleared_energy_pos'] - log['cleared_energy_neg']) - \
-                            (log['real_energy_pos'] - log['real_energy_neg'])
-
-        if energy_difference >= 0:
-            # produced less/consumed more energy than cleared
-            cost_balancing_energy = energy_difference * msg['price_pos']
-        else:
-            # produced more/consumed less energy than cleared
-            cost_balancing_energy = energy_difference * msg['price_neg']
+        energy_difference, cost_balancing_energy = compute_balancing_energy(
+            energies=np.array([[log[column] for column in BILLING_COLUMNS]], dtype=np.float64),
+            weights=np.array([weights], dtype=np.float64),
+            signs=np.array([sign], dtype=np.float64),
+            factors=np.array([self._balancing_factor(system_id=msg['system_id'])], dtype=np.float64),
+            price_pos=np.array([msg['price_pos']], dtype=np.float64),
+            price_neg=np.array([msg['price_neg']], dtype=np.float64))
 
         # update longtime trading log with balancing energy costs
-        if energy_difference != 0:
-            self.trading_table_longtime[-1]['cost_balancing_energy' + '_' +
-                                            msg['system_id']] = cost_balancing_energy / energy_difference
-        else:
-            self.trading_table_longtime[-1]['cost_balancing_energy' + '_' + msg['system_id']] = 0
-        self.trading_table_longtime[-1]['balancing_energy' + '_' + msg['system_id']] = energy_difference
+        log['cost_balancing_energy' + '_' + msg['system_id']] = cost_balancing_energy.tolist()[0]
+        log['balancing_energy' + '_' + msg['system_id']] = energy_difference.tolist()[0]
+        self._update_after_billing(msg)
+
+    def _balancing_weights(self, sender_id, system_id):
+        """
+        return billing weights of cleared and real energy, see compute_balancing_energy
+
+        Args:
+            sender_id (str): name of system operator
+            system_id (str): name of billed network
+
+        Returns:
+            weights (tuple): weights of cleared_energy_pos, cleared_energy_neg, real_energy_pos and real_energy_neg
+            sign (float): sign of energy difference
+        """
+        # connection to one network: combination of positive and negative clearing, e.g., storages
+        return (1, -1, 1, -1), 1
+
+    def _balancing_factor(self, system_id):
+        """
+        return scaling factor of balancing energy at time of billing
+
+        Args:
+            system_id (str): name of billed network
+
+        Returns:
+            factor (float): scaling factor of energy difference
+        """
+        return 1
+
+    def _update_after_billing(self, msg):
+        """
+        hook executed after balancing energy has been billed
+
+        Args:
+            msg (dict): balancing energy message
+        """
+        pass
 
     def __process_clearing(self, msg):
         """
@@ -136,32 +279,30 @@ class Trader(BaseAgent):
         else:
             print(['[ERROR] Undefined trade type: ', msg['trade_type']])
 
-        # minimum horizon that is covered by product, minimum 0
-        min_horizon = int(msg['product_lead_time'] / self.trading_time)
-        # maximum horizon that is covered by product
-        max_horizon = int((msg['product_lead_time'] + msg['product_type']) / self.trading_time)
+        # horizon that is covered by product
+        horizon = self.schedule.horizon(msg['product_type'], msg['product_lead_time'])
         # split quantity depending on product length
-        quantity = msg['quantity'] / (max_horizon - min_horizon)
+        quantity = msg['quantity'] / (horizon.stop - horizon.start)
 
-        for idx in range(min_horizon, max_horizon):
+        # rows of trading table are shared by consecutive trading periods with equal values
+        for row, quantity in self.trading_table.split(horizon, quantity):
             # calculate mean price and cleared energy
-            if self.trading_table[idx]['cleared_energy' + trade_type] != 0:
-                self.trading_table[idx]['price' + trade_type] = (
-                    self.trading_table[idx]['cleared_energy' + trade_type] *
-                    self.trading_table[idx]['price' + trade_type] +
+            if row['cleared_energy' + trade_type] != 0:
+                row['price' + trade_type] = (
+                    row['cleared_energy' + trade_type] *
+                    row['price' + trade_type] +
                     quantity * msg['price']) / (
-                        self.trading_table[idx]['cleared_energy' + trade_type] + quantity)
-                self.trading_table[idx]['price_' + str(product_type) + '_' + msg['sender_id']] = (
-                    self.trading_table[idx][str(product_type) + '_' + msg['sender_id']] *
-                    self.trading_table[idx]['price_' + str(product_type) + '_' + msg['sender_id']] +
+                        row['cleared_energy' + trade_type] + quantity)
+                row['price_' + str(product_type) + '_' + msg['sender_id']] = (
+                    row[str(product_type) + '_' + msg['sender_id']] *
+                    row['price_' + str(product_type) + '_' + msg['sender_id']] +
                     quantity * msg['price'])/(
-                        self.trading_table[idx][str(product_type) + '_' + msg['sender_id']] + quantity)
+                        row[str(product_type) + '_' + msg['sender_id']] + quantity)
             else:
-                self.trading_table[idx]['price' + trade_type] = msg['price']
-                self.trading_table[idx]['price_' + str(product_type) + '_' + msg['sender_id']] = msg['price']
-            self.trading_table[idx]['cleared_energy' +
-                                    trade_type] = self.trading_table[idx]['cleared_energy' + trade_type] + quantity
-            self.trading_table[idx][str(product_type) + '_' + msg['sender_id']] += quantity
+                row['price' + trade_type] = msg['price']
+                row['price_' + str(product_type) + '_' + msg['sender_id']] = msg['price']
+            row['cleared_energy' + trade_type] = row['cleared_energy' + trade_type] + quantity
+            row[str(product_type) + '_' + msg['sender_id']] += quantity
 
     @abstractmethod
     def get_state(self, observation, control_step):
@@ -172,7 +313,7 @@ class Trader(BaseAgent):
             observation (dict): observed values from environment
             control_step (int): number of control within trading trading time
         """
-        # append observation to longtime log
+        # append observation to ring buffer (and archive if configured)
         self.observations.append(observation)
         self.experiment_time = observation['time']
         self.scenario_time = observation['scenario_time']
@@ -184,8 +325,7 @@ class Trader(BaseAgent):
             log['time'] = self.experiment_time
             log['scneario_time'] = self.scenario_time
             self.trading_table_longtime.append(log)
-            self.trading_table.append({var_name: 0 for var_name in self.trading_table[0]})
-            self.trading_table.pop(0)
+            self.trading_table.roll()
 
     def set_actions(self):
         """
@@ -225,50 +365,172 @@ class Trader(BaseAgent):
         action = {output_vars['bSetStatusOn']: bSetStatusOn, output_vars['fSetPoint']: fSetPoint}
         return action
 
-    @abstractmethod
-    def trade(self, product):
+    def trade(self, product, quantities=None):
         """
         method to call trading process
 
         Args:
             product (int): traded product defined by product duration in seconds
+            quantities (dict): quantities assessed beforehand (e.g. for a fleet of traders), assessed if None
 
         Returns:
-            msgs (list): list of order messages which are processed to market
+            msgs (list): list of order messages (order lifecycle messages with delta orders) which are processed to
+                market
         """
 
-    def _quantity_assessment(self, product):
+        if self.bid_cache is not None:
+            msgs = self.__trade_cached(product=product, quantities=quantities)
+        else:
+            # perform capacity assessment
+            if quantities is None:
+                self._quantity_assessment(product=product)
+                quantities = self.capacity_model(self.physical_parameters)
+            quantities = self._process_quantities(quantities=quantities)
+
+            # pass quantities to pricing assessment
+            self._pricing(product=product, quantities=quantities)
+            msgs = self.pricing_model(self.pricing_parameters)
+
+        if self.is_delta_orders:
+            return self.__order_deltas(product=product, msgs=msgs)
+        return msgs
+
+    def __order_deltas(self, product, msgs):
         """
-        quantity_assessment
+        replace bid ladder by lifecycle messages changing standing orders of last trading round of product
+
+        orders are matched to standing orders by position within bid ladder per market. matched orders keep the uuid
+        of the standing order (coupled orders are mapped accordingly) and are amended if they have changed, additional
+        orders are new and standing orders beyond the bid ladder are cancelled.
+
+        Args:
+            product (dict): traded product with product type and lead time
+            msgs (list): order messages of bid ladder
+
+        Returns:
+            msgs (list): order lifecycle messages
+        """
+        standing_orders = self.standing_orders.setdefault((product['product_type'], product['lead_time']), {})
+        ladders = {}
+        for msg in msgs:
+            ladders.setdefault(msg['reciever_id'], []).append(msg)
+
+        # uuids of standing orders at same position
+        ids = {}
+        for market, ladder in ladders.items():
+            for msg, standing_order in zip(ladder, standing_orders.get(market, [])):
+                ids[msg['id']] = standing_order['id']
+
+        lifecycle_msgs = []
+        for market in list(standing_orders) + [market for market in ladders if market not in standing_orders]:
+            ladder = ladders.get(market, [])
+            standing_ladder = standing_orders.get(market, [])
+            orders = []
+            for position, msg in enumerate(ladder):
+                order = dict(msg, id=ids.get(msg['id'], msg['id']))
+                if isinstance(msg.get('coupled_order'), list):
+                    order['coupled_order'] = [ids.get(order_id, order_id) for order_id in msg['coupled_order']]
+                orders.append(order)
+                if position >= len(standing_ladder):
+                    lifecycle = 'new'
+                elif order != standing_ladder[position]:
+                    lifecycle = 'amend'
+                else:
+                    continue
+                lifecycle_msgs.append(order_lifecycle_msg(
+                    lifecycle=lifecycle, sender_id=self.name, reciever_id=market,
+                    product_type=product['product_type'], product_lead_time=product['lead_time'],
+                    id=order['id'], order=order))
+            for standing_order in standing_ladder[len(ladder):]:
+                lifecycle_msgs.append(order_lifecycle_msg(
+                    lifecycle='cancel', sender_id=self.name, reciever_id=market,
+                    product_type=product['product_type'], product_lead_time=product['lead_time'],
+                    id=standing_order['id']))
+            standing_orders[market] = orders
+        return lifecycle_msgs
+
+    def __trade_cached(self, product, quantities=None):
+        """
+        trading process reusing bids of previous trading rounds with equal (quantized) model inputs
 
         Args:
             product (int): traded product defined by product duration in seconds
+            quantities (dict): quantities assessed beforehand (e.g. for a fleet of traders), assessed if None
 
         Returns:
-            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
+            msgs (list): list of order messages which are processed to market
         """
-        # minimum horizon that is covered by product, minimum 0
-        min_horizon = int(product['lead_time'] / self.trading_time)
-        # maximum horizon that is covered by product
-        max_horizon = int((product['lead_time'] + product['product_type']) / self.trading_time)
+        # prepare pricing inputs, which do not depend on quantities
+        self._pricing(product=product, quantities=None)
+        pricing_key = (self.pricing_parameters['model_inputs'], self.pricing_inputs)
+        if quantities is None:
+            # quantities follow from the read inputs of capacity model
+            self._quantity_assessment(product=product)
+            key = self.bid_cache.key((self.physical_parameters['model_inputs'], self.capacity_inputs), pricing_key)
+        else:
+            # quantities assessed beforehand are keyed themselves
+            key = self.bid_cache.key(({'quantities': quantities}, {'quantities': None}), pricing_key)
+
+        # reuse cached bids with fresh uuids
+        entry = self.bid_cache.get(key)
+        if entry is not None:
+            self._process_quantities(quantities=entry['quantities'])
+            return retag_orders(entry['msgs'])
+
+        if quantities is None:
+            quantities = self.capacity_model(self.physical_parameters)
+        quantities = self._process_quantities(quantities=quantities)
+        self.pricing_parameters['model_inputs']['quantities'] = quantities
+        msgs = self.pricing_model(self.pricing_parameters)
+
+        self.bid_cache.put(key, quantities=quantities, msgs=msgs)
+        return msgs
+
+    def __set_discretization(self, bid_discretization):
+        """
+        compile capacity context with bid discretization - cached bids of other discretizations are discarded
+
+        Args:
+            bid_discretization (int): number of quantities of bid ladder
+        """
+        if self.physical_context['bid_discretization'] == bid_discretization:
+            return
+        model_parameters = dict(self.agent_config['model_config']['model_parameters'],
+                                bid_discretization=bid_discretization)
+        self.physical_context = shared_model_context(
+            model_parameters, exclude=ALLOCATION_NAMES,
+            setup=get_setup('quantity_assessment', self.agent_config['model_config']['capacity_model']))
+        if self.bid_cache is not None:
+            self.bid_cache.clear()
+
+    def _quantity_assessment(self, product):
+        """
+        quantity_assessment - prepares parameters of capacity model (extended by child classes)
+
+        Args:
+            product (int): traded product defined by product duration in seconds
+        """
+        # adapt bid discretization to market states recieved since last assessment
+        if self.discretization_policy is not None and self.discretization_policy.market_states:
+            self.__set_discretization(self.discretization_policy.adapt())
+
+        # horizon that is covered by product
+        horizon = self.schedule.horizon(product['product_type'], product['lead_time'])
 
         # get cleared energy and calculate maximum cleared power for these horizons
-        cleared_energy_pos = [element['cleared_energy_pos'] for element in self.trading_table]
-        cleared_energy_neg = [element['cleared_energy_neg'] for element in self.trading_table]
+        cleared_energy_pos = self.trading_table.column('cleared_energy_pos', horizon)
+        cleared_energy_neg = self.trading_table.column('cleared_energy_neg', horizon)
 
         # get observation from last step
         observation = self.observations[-1]
 
-        # get static model parameters
-        physical_model_parameters = self.agent_config['model_config']['model_parameters']
-
-        # get model inputs at this time step
-        physical_model_inputs = {model_input: observation[model_input]
-                                 for model_input in self.agent_config['base_config']['env_inputs']}
-        physical_model_inputs['cleared_energy_pos'] = cleared_energy_pos[min_horizon:max_horizon]
-        physical_model_inputs['cleared_energy_neg'] = cleared_energy_neg[min_horizon:max_horizon]
-        physical_model_inputs['trading_time'] = self.trading_time
+        # per-call model inputs at this time step, static parameters are taken from compiled context
+        physical_model_inputs = {model_input: observation[model_input] for model_input in self.env_input_names}
+        physical_model_inputs.update(self.static_physical_inputs)
+        physical_model_inputs['cleared_energy_pos'] = cleared_energy_pos
+        physical_model_inputs['cleared_energy_neg'] = cleared_energy_neg
         physical_model_inputs['product_type'] = product['product_type']
+        physical_model_inputs.update(self.schedule.allocation(self.name, product))
 
         # get index of product in list
         if product['product_type'] == self.shorttime_product:
@@ -285,60 +547,52 @@ class Trader(BaseAgent):
 
         # create dictionary with model parameters
         self.physical_parameters = {
-            'model_parameters': physical_model_parameters,
+            'model_parameters': self.physical_context,
             'model_inputs': physical_model_inputs
         }
 
-    def _pricing(self, product, quantities):
+    def _process_quantities(self, quantities):
         """
-        pricing
+        process quantities returned by capacity model before pricing
 
         Args:
-            product (int): traded product defined by product duration in seconds
             quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
 
         Returns:
-            msgs (list): list of order messages which are processed to market
+            quantities (dict): processed quantities
+        """
+        return quantities
+
+    def _pricing(self, product, quantities):
+        """
+        pricing - prepares parameters of pricing model (extended by child classes)
+
+        Args:
+            product (int): traded product defined by product duration in seconds
+            quantities (dict): dictionary holding tradable quantities and further information for pricing (e.g. soc)
         """
 
         # get observation from last step
         observation = self.observations[-1]
 
-        # get static model parameters
-        trading_model_parameters = self.agent_config['model_config']['model_parameters']
-        trading_model_parameters['markets'] = self.agent_config['base_config']['connections_markets']
-        trading_model_parameters['name'] = self.name
-
-        # get model inputs at this time step
-        trading_model_inputs = {model_input: observation[model_input]
-                                for model_input in self.agent_config['base_config']['env_inputs']}
+        # per-call model inputs at this time step, static parameters are taken from compiled context
+        trading_model_inputs = {model_input: observation[model_input] for model_input in self.env_input_names}
+        trading_model_inputs.update(self.static_pricing_inputs)
         trading_model_inputs['quantities'] = quantities
         trading_model_inputs['product_type'] = product['product_type']
         trading_model_inputs['product_lead_time'] = product['lead_time']
-        trading_model_inputs['positive_market_limit'] = self.experiment_config['positive_market_limit']
-        trading_model_inputs['negative_market_limit'] = self.experiment_config['negative_market_limit']
         if product['product_type'] == self.shorttime_product:
             trading_model_inputs['shorttime_product'] = True
         else:
             trading_model_inputs['shorttime_product'] = False
 
-        # minimum horizon that is covered by product, minimum 0
-        min_horizon = int(product['lead_time'] / self.trading_time)
-        # maximum horizon that is covered by product
-        max_horizon = int((product['lead_time'] + product['product_type']) / self.trading_time)
-
-        # get cleared energy and calculate maximum cleared power for these horizons
-        cleared_energy_pos = [element['cleared_energy_pos'] for element in self.trading_table]
-        cleared_energy_neg = [element['cleared_energy_neg'] for element in self.trading_table]
-        price_pos = [element['price_pos'] for element in self.trading_table]
-        price_neg = [element['price_neg'] for element in self.trading_table]
-        trading_model_inputs['cleared_energy_pos'] = cleared_energy_pos[min_horizon:max_horizon]
-        trading_model_inputs['cleared_energy_neg'] = cleared_energy_neg[min_horizon:max_horizon]
-        trading_model_inputs['price_pos'] = price_pos[min_horizon:max_horizon]
-        trading_model_inputs['price_neg'] = price_neg[min_horizon:max_horizon]
+        # get cleared energy and prices for horizon that is covered by product
+        horizon = self.schedule.horizon(product['product_type'], product['lead_time'])
+        for var_name in ['cleared_energy_pos', 'cleared_energy_neg', 'price_pos', 'price_neg']:
+            trading_model_inputs[var_name] = self.trading_table.column(var_name, horizon)
 
         self.pricing_parameters = {
-            'model_parameters': trading_model_parameters,
+            'model_parameters': self.pricing_context,
             'model_inputs': trading_model_inputs
         }
 
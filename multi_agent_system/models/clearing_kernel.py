@@ -0,0 +1,408 @@
+"""
+compiled matching kernel of double auction clearing
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "compiled matching kernel of double auction clearing"
+
+import numpy as np
+
+# numba is optional - without numba the clearing of market models is executed in pure python
+try:
+    from numba import njit
+    IS_NUMBA_AVAILABLE = True
+except ImportError:
+    IS_NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+# structured array of one side of order book in clearing order
+ORDER_DTYPE = np.dtype([
+    ('price', np.float64),
+    ('quantity', np.float64),
+    ('rest_quantity', np.float64),
+    ('coupled_start', np.int64),  # coupled orders of order are coupled[coupled_start:coupled_stop]
+    ('coupled_stop', np.int64),
+    ('is_open', np.bool_),
+])
+
+
+# structured array of trades with state of matched orders before trade - allows to roll back matching
+TRADE_DTYPE = np.dtype([
+    ('buy', np.int64),
+    ('sell', np.int64),
+    ('quantity', np.float64),
+    ('price', np.float64),
+    ('buy_rest_quantity', np.float64),  # rest quantity of buy before trade
+    ('sell_rest_quantity', np.float64),  # rest quantity of sell before trade
+    ('closed_start', np.int64),  # orders closed by trade are closed[closed_start:closed_stop]
+    ('closed_stop', np.int64),
+])
+
+
+@njit(cache=True)
+def __close(is_open, idx, side, closed_idx, closed_side, num_closed):
+    """
+    close order and record it in log of closed orders
+
+    Args:
+        is_open (np.ndarray): open state of orders
+        idx (int): index of order
+        side (int): side of order, 0 for buys and 1 for sells
+        closed_idx (np.ndarray): indices of closed orders
+        closed_side (np.ndarray): sides of closed orders
+        num_closed (int): number of closed orders
+
+    Returns:
+        num_closed (int): number of closed orders
+    """
+    is_open[idx] = False
+    closed_idx[num_closed] = idx
+    closed_side[num_closed] = side
+    return num_closed + 1
+
+
+@njit(cache=True)
+def __close_coupled(is_open, start, stop, coupled, side, closed_idx, closed_side, num_closed):
+    """
+    close coupled orders - closing stops at first coupled order which is unknown or already closed
+
+    Args:
+        is_open (np.ndarray): open state of orders
+        start (int): first index of coupled orders
+        stop (int): index after last coupled order
+        coupled (np.ndarray): indices of coupled orders, -1 for unknown orders
+        side (int): side of orders, 0 for buys and 1 for sells
+        closed_idx (np.ndarray): indices of closed orders
+        closed_side (np.ndarray): sides of closed orders
+        num_closed (int): number of closed orders
+
+    Returns:
+        num_closed (int): number of closed orders
+    """
+    for position in range(start, stop):
+        idx = coupled[position]
+        if idx < 0 or not is_open[idx]:
+            return num_closed
+        num_closed = __close(is_open, idx, side, closed_idx, closed_side, num_closed)
+    return num_closed
+
+
+@njit(cache=True)
+def match_orders(buy_price, buy_rest, buy_coupled_start, buy_coupled_stop, buy_coupled, buy_open,
+                 sell_price, sell_rest, sell_coupled_start, sell_coupled_stop, sell_coupled, sell_open,
+                 trade_buy, trade_sell, trade_quantity, trade_price, trade_buy_rest, trade_sell_rest,
+                 trade_closed_start, trade_closed_stop, closed_idx, closed_side,
+                 start_sell, start_buy, num_trades, num_closed):
+    """
+    match sorted buys and sells - equal to the matching loop of the double auction in pure python
+
+    matching starts at buy start_buy of sell start_sell, so a matching rolled back to a trade (see rollback_orders)
+    continues exactly as the matching from scratch would. every trade closes at least one order, thus trade and
+    closed arrays must hold number of buys + number of sells entries.
+
+    Args:
+        buy_price (np.ndarray): prices of buys, descending
+        buy_rest (np.ndarray): rest quantities of buys, updated during matching
+        buy_coupled_start (np.ndarray): first index of coupled buys per buy
+        buy_coupled_stop (np.ndarray): index after last coupled buy per buy
+        buy_coupled (np.ndarray): indices of coupled buys, -1 for unknown orders
+        buy_open (np.ndarray): open state of buys, updated during matching
+        sell_price (np.ndarray): prices of sells, ascending
+        sell_rest (np.ndarray): rest quantities of sells, updated during matching
+        sell_coupled_start (np.ndarray): first index of coupled sells per sell
+        sell_coupled_stop (np.ndarray): index after last coupled sell per sell
+        sell_coupled (np.ndarray): indices of coupled sells, -1 for unknown orders
+        sell_open (np.ndarray): open state of sells, updated during matching
+        trade_buy (np.ndarray): index of buy per trade, output
+        trade_sell (np.ndarray): index of sell per trade, output
+        trade_quantity (np.ndarray): quantity per trade, output
+        trade_price (np.ndarray): price per trade, output
+        trade_buy_rest (np.ndarray): rest quantity of buy before trade, output
+        trade_sell_rest (np.ndarray): rest quantity of sell before trade, output
+        trade_closed_start (np.ndarray): first index of orders closed by trade, output
+        trade_closed_stop (np.ndarray): index after last order closed by trade, output
+        closed_idx (np.ndarray): indices of closed orders, output
+        closed_side (np.ndarray): sides of closed orders (0 for buys, 1 for sells), output
+        start_sell (int): index of first sell
+        start_buy (int): index of first buy of first sell
+        num_trades (int): number of trades before start
+        num_closed (int): number of closed orders before start
+
+    Returns:
+        num_trades (int): number of trades
+        num_closed (int): number of closed orders
+        num_comparisons (int): number of price comparisons
+    """
+    num_comparisons = 0
+    for sell in range(start_sell, len(sell_price)):
+        if not sell_open[sell]:
+            continue
+        for buy in range(start_buy if sell == start_sell else 0, len(buy_price)):
+            if not buy_open[buy]:
+                continue
+
+            # stop iteration over buys if price condition is not fulfilled
+            num_comparisons += 1
+            if buy_price[buy] < sell_price[sell]:
+                break
+
+            trade_buy[num_trades] = buy
+            trade_sell[num_trades] = sell
+            trade_buy_rest[num_trades] = buy_rest[buy]
+            trade_sell_rest[num_trades] = sell_rest[sell]
+            trade_closed_start[num_trades] = num_closed
+
+            clearing_price = (buy_price[buy] + sell_price[sell]) / 2
+            is_sell_cleared = False
+            if buy_rest[buy] <= sell_rest[sell]:
+                # buy can be fully cleared against sell
+                clearing_quantity = buy_rest[buy]
+                buy_rest[buy] -= clearing_quantity
+                sell_rest[sell] -= clearing_quantity
+                num_closed = __close_coupled(buy_open, buy_coupled_start[buy], buy_coupled_stop[buy], buy_coupled,
+                                             0, closed_idx, closed_side, num_closed)
+                num_closed = __close(buy_open, buy, 0, closed_idx, closed_side, num_closed)
+            else:
+                # sell can be fully cleared against buy
+                clearing_quantity = sell_rest[sell]
+                buy_rest[buy] -= clearing_quantity
+                sell_rest[sell] -= clearing_quantity
+                num_closed = __close_coupled(sell_open, sell_coupled_start[sell], sell_coupled_stop[sell],
+                                             sell_coupled, 1, closed_idx, closed_side, num_closed)
+                num_closed = __close(sell_open, sell, 1, closed_idx, closed_side, num_closed)
+                is_sell_cleared = True
+
+            trade_quantity[num_trades] = clearing_quantity
+            trade_price[num_trades] = clearing_price
+            trade_closed_stop[num_trades] = num_closed
+            num_trades += 1
+
+            # break buy loop if sell has been fully cleared
+            if is_sell_cleared:
+                break
+
+    return num_trades, num_closed, num_comparisons
+
+
+@njit(cache=True)
+def rollback_orders(to_trade, num_trades, trade_buy, trade_sell, trade_buy_rest, trade_sell_rest,
+                    trade_closed_start, trade_closed_stop, closed_idx, closed_side,
+                    buy_rest, sell_rest, buy_open, sell_open):
+    """
+    roll back matching to state before trade to_trade
+
+    Args:
+        to_trade (int): index of first trade which is rolled back
+        num_trades (int): number of trades
+        trade_buy (np.ndarray): index of buy per trade
+        trade_sell (np.ndarray): index of sell per trade
+        trade_buy_rest (np.ndarray): rest quantity of buy before trade
+        trade_sell_rest (np.ndarray): rest quantity of sell before trade
+        trade_closed_start (np.ndarray): first index of orders closed by trade
+        trade_closed_stop (np.ndarray): index after last order closed by trade
+        closed_idx (np.ndarray): indices of closed orders
+        closed_side (np.ndarray): sides of closed orders (0 for buys, 1 for sells)
+        buy_rest (np.ndarray): rest quantities of buys, updated
+        sell_rest (np.ndarray): rest quantities of sells, updated
+        buy_open (np.ndarray): open state of buys, updated
+        sell_open (np.ndarray): open state of sells, updated
+
+    Returns:
+        num_closed (int): number of closed orders before trade to_trade
+    """
+    for trade in range(num_trades - 1, to_trade - 1, -1):
+        buy_rest[trade_buy[trade]] = trade_buy_rest[trade]
+        sell_rest[trade_sell[trade]] = trade_sell_rest[trade]
+        for position in range(trade_closed_start[trade], trade_closed_stop[trade]):
+            if closed_side[position] == 0:
+                buy_open[closed_idx[position]] = True
+            else:
+                sell_open[closed_idx[position]] = True
+    return trade_closed_start[to_trade]
+
+
+def __sort(prices, ascending):
+    """
+    sort order of prices equal to sorting of order book dataframes (quicksort, reversed for descending order)
+
+    Args:
+        prices (np.ndarray): prices
+        ascending (bool): ascending or descending order
+
+    Returns:
+        indices (np.ndarray): indices of orders in clearing order
+    """
+    if ascending:
+        return prices.argsort(kind='quicksort')
+    indices = np.arange(len(prices))[::-1]
+    return indices[prices[::-1].argsort(kind='quicksort')][::-1]
+
+
+def __order_book(orders, prices, ascending):
+    """
+    create structured array of one side of order book in clearing order
+
+    Args:
+        orders (list): order messages
+        prices (np.ndarray): prices of orders
+        ascending (bool): ascending (sells) or descending (buys) order of prices
+
+    Returns:
+        book (np.ndarray): structured array with ORDER_DTYPE
+        coupled (np.ndarray): indices of coupled orders
+        orders (list): order messages in clearing order
+        (None if orders cannot be represented, e.g. orders coupled to themselves or orders without unique id)
+    """
+    order = __sort(prices, ascending=ascending)
+    orders = [orders[idx] for idx in order.tolist()]
+    positions = {}
+    for position, msg in enumerate(orders):
+        positions[msg['id']] = position
+    if len(positions) != len(orders):
+        return None
+
+    book = np.zeros(len(orders), dtype=ORDER_DTYPE)
+    book['price'] = prices[order]
+    book['quantity'] = [msg['quantity'] for msg in orders]
+    book['rest_quantity'] = book['quantity']
+    book['is_open'] = True
+    coupled = []
+    for position, msg in enumerate(orders):
+        book['coupled_start'][position] = len(coupled)
+        coupled_order = msg['coupled_order']
+        if isinstance(coupled_order, (list, tuple)):
+            for coupled_id in coupled_order:
+                try:
+                    idx = positions.get(coupled_id, -1)
+                except TypeError:
+                    idx = -1
+                if idx == position:
+                    return None
+                coupled.append(idx)
+        book['coupled_stop'][position] = len(coupled)
+    return book, np.array(coupled, dtype=np.int64), orders
+
+
+def double_auction_clearing(order_book, is_warm_start=False, statistics=None):
+    """
+    clearing of double auction with compiled matching kernel considering minimum ratio of acceptance
+
+    unaccepted orders are removed and the matching is repeated until the first open buy and sell are accepted - equal
+    to the clearing of the double auction market model in pure python.
+
+    with warm start, repeated matchings are not started from scratch. an unaccepted order does not influence the
+    matching before its first trade, so the matching is rolled back to the first trade of the removed orders and
+    continued from there with equal results.
+
+    Args:
+        order_book (list): order messages
+        is_warm_start (bool): continue repeated matchings from first trade of removed orders
+        statistics (dict): updated with number of matchings and price comparisons if given
+
+    Returns:
+        matches (list): list of (buy, sell, quantity, price), None if order book cannot be cleared with kernel (e.g.
+            orders without price) - pure python clearing is used instead
+    """
+    if not order_book:
+        return []
+    if any('coupled_order' not in msg for msg in order_book):
+        return None
+    prices = np.array([msg['price'] for msg in order_book])
+    ratios = np.array([msg['min_acceptance_ratio'] for msg in order_book])
+    if prices.dtype.kind not in 'iuf' or ratios.dtype.kind not in 'iuf' or \
+            np.isnan(prices).any() or np.isnan(ratios).any():
+        return None
+    is_buy = np.array([msg['order_type'] == 'buy' for msg in order_book], dtype=np.bool_)
+    is_sell = np.array([msg['order_type'] == 'sell' for msg in order_book], dtype=np.bool_)
+    if not is_buy.any() or not is_sell.any():
+        return []
+    buys = __order_book([msg for msg, flag in zip(order_book, is_buy.tolist()) if flag], prices[is_buy],
+                        ascending=False)
+    sells = __order_book([msg for msg, flag in zip(order_book, is_sell.tolist()) if flag], prices[is_sell],
+                         ascending=True)
+    if buys is None or sells is None:
+        return None
+    (buy_book, buy_coupled, buy_orders), (sell_book, sell_coupled, sell_orders) = buys, sells
+    if np.isnan(buy_book['quantity']).any() or np.isnan(sell_book['quantity']).any():
+        return None
+
+    num_orders = len(buy_book) + len(sell_book)
+    trades = np.empty(num_orders, dtype=TRADE_DTYPE)
+    closed_idx = np.empty(num_orders, dtype=np.int64)
+    closed_side = np.empty(num_orders, dtype=np.int8)
+    buy_stored = buy_book['is_open'].copy()
+    sell_stored = sell_book['is_open'].copy()
+    num_trades = 0
+    num_closed = 0
+    start_sell = 0
+    start_buy = 0
+    is_cold_start = True
+    num_matchings = 0
+    num_comparisons = 0
+
+    # iterative clearing until rest quantities are accepted by both sides or no buys/sells left
+    while buy_stored.any() or sell_stored.any():
+        if is_cold_start:
+            num_trades, num_closed, start_sell, start_buy = 0, 0, 0, 0
+            buy_book['rest_quantity'] = buy_book['quantity']
+            sell_book['rest_quantity'] = sell_book['quantity']
+            buy_book['is_open'] = buy_stored
+            sell_book['is_open'] = sell_stored
+        num_trades, num_closed, comparisons = match_orders(
+            buy_book['price'], buy_book['rest_quantity'], buy_book['coupled_start'], buy_book['coupled_stop'],
+            buy_coupled, buy_book['is_open'],
+            sell_book['price'], sell_book['rest_quantity'], sell_book['coupled_start'], sell_book['coupled_stop'],
+            sell_coupled, sell_book['is_open'],
+            trades['buy'], trades['sell'], trades['quantity'], trades['price'], trades['buy_rest_quantity'],
+            trades['sell_rest_quantity'], trades['closed_start'], trades['closed_stop'], closed_idx, closed_side,
+            start_sell, start_buy, num_trades, num_closed)
+        num_matchings += 1
+        num_comparisons += comparisons
+
+        # check minimum ratio of acceptance for first open buy/sell and remove unaccepted order for next iteration
+        removed = []
+        for book, orders, stored, side in ((sell_book, sell_orders, sell_stored, 'sell'),
+                                           (buy_book, buy_orders, buy_stored, 'buy')):
+            open_orders = np.flatnonzero(book['is_open'])
+            if len(open_orders) == 0:
+                continue
+            idx = int(open_orders[0])
+            ratio = 1 - float(book['rest_quantity'][idx]) / float(book['quantity'][idx])
+            if not (ratio >= orders[idx]['min_acceptance_ratio'] or ratio == 0):
+                stored[idx] = False
+                removed.append((book, side, idx))
+
+        if not removed:
+            if statistics is not None:
+                statistics['matchings'] = statistics.get('matchings', 0) + num_matchings
+                statistics['comparisons'] = statistics.get('comparisons', 0) + num_comparisons
+            return [(buy_orders[buy], sell_orders[sell], quantity, price) for buy, sell, quantity, price in zip(
+                trades['buy'][:num_trades].tolist(), trades['sell'][:num_trades].tolist(),
+                trades['quantity'][:num_trades].tolist(), trades['price'][:num_trades].tolist())]
+
+        if not is_warm_start:
+            continue
+
+        # unaccepted orders have been partially cleared - roll back to their first trade and continue from there
+        to_trade = min(int(np.flatnonzero(trades[side][:num_trades] == idx)[0]) for _, side, idx in removed)
+        num_closed = rollback_orders(
+            to_trade, num_trades, trades['buy'], trades['sell'], trades['buy_rest_quantity'],
+            trades['sell_rest_quantity'], trades['closed_start'], trades['closed_stop'], closed_idx, closed_side,
+            buy_book['rest_quantity'], sell_book['rest_quantity'], buy_book['is_open'], sell_book['is_open'])
+        for book, _, idx in removed:
+            book['is_open'][idx] = False
+        start_sell, start_buy = int(trades['sell'][to_trade]), int(trades['buy'][to_trade])
+        num_trades = to_trade
+        is_cold_start = False
+
+    # no buys or sells left
+    return []
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,204 @@
+"""
+precompiled efficiency lookup tables of models
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "efficiency lookup tables"
+
+from bisect import bisect_right
+import numpy as np
+
+
+class EfficiencyCurve():
+    def __init__(self, x, y):
+        """
+        piecewise linear efficiency curve with precomputed contiguous arrays, slopes and bounds - evaluation is equal
+        to np.interp(value, x, y), values outside of the curve are clamped to its bounds
+
+        Args:
+            x (list): ascending sampling points, e.g. ambient temperatures or operating points
+            y (list): values at sampling points, e.g. efficiencies
+        """
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        if self.x.ndim != 1 or self.x.shape != self.y.shape or len(self.x) == 0:
+            raise ValueError('Efficiency curve requires sampling points and values of equal length.')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.slopes = np.diff(self.y) / np.diff(self.x)
+        self.bounds = (self.x[0], self.x[-1])
+
+        # python lists for scalar evaluation without numpy overhead
+        self.__x = self.x.tolist()
+        self.__y = self.y.tolist()
+        self.__slopes = self.slopes.tolist()
+
+    def __call__(self, value, y=None):
+        """
+        evaluate efficiency curve
+
+        Args:
+            value (float, np.ndarray): scalar or array of values
+            y (list): values at sampling points replacing the compiled values, e.g. for prices depending on market
+                limits, compiled values if None
+
+        Returns:
+            result (float, np.ndarray): interpolated value(s)
+        """
+        if y is None and isinstance(value, float):
+            return self.__interp(value, self.__y, self.__slopes)
+        if np.ndim(value) > 0:
+            return self.evaluate(value, y=y)
+        if y is None:
+            return self.__interp(float(value), self.__y, self.__slopes)
+        y = [float(element) for element in y]
+        slopes = [(y[idx + 1] - y[idx]) / (self.__x[idx + 1] - self.__x[idx]) if self.__x[idx + 1] != self.__x[idx]
+                  else float('nan') for idx in range(len(y) - 1)]
+        return self.__interp(float(value), y, slopes)
+
+    def evaluate(self, values, y=None):
+        """
+        evaluate efficiency curve for array of values
+
+        Args:
+            values (np.ndarray): values
+            y (list): values at sampling points replacing the compiled values, compiled values if None
+
+        Returns:
+            result (np.ndarray): interpolated values
+        """
+        return np.interp(values, self.x, self.y if y is None else y)
+
+    def __interp(self, value, y, slopes):
+        """
+        scalar interpolation equal to np.interp
+
+        Args:
+            value (float): value
+            y (list): values at sampling points
+            slopes (list): slopes between sampling points
+
+        Returns:
+            result (float): interpolated value
+        """
+        x = self.__x
+        if value != value:
+            return value
+        if value < x[0]:
+            return y[0]
+        if value > x[-1]:
+            return y[-1]
+        idx = bisect_right(x, value) - 1
+        if idx >= len(x) - 1 or x[idx] == value:
+            return y[idx]
+        slope = slopes[idx]
+        result = slope * (value - x[idx]) + y[idx]
+        if result != result:
+            # avoid non-finite interpolation between infinite values like np.interp
+            result = slope * (value - x[idx + 1]) + y[idx + 1]
+            if result != result and y[idx] == y[idx + 1]:
+                result = y[idx]
+        return result
+
+
+class EfficiencyMap():
+    def __init__(self, efficiencies):
+        """
+        bilinear lookup table of an efficiency map on a regular grid with clamped extrapolation - inputs outside of
+        the grid are clamped to its bounds
+
+        Args:
+            efficiencies (list): efficiency map, first row holds the grid of the first input (e.g. return temperature
+                of hot thermal grid), first column holds the grid of the second input (e.g. return temperature of cold
+                thermal grid), e.g. [[0, 35, 45], [-5, 0.52, 0.46], [0, 0.63, 0.57]]
+        """
+        efficiencies = np.array(efficiencies, dtype=np.float64)
+        self.grid_x = np.ascontiguousarray(efficiencies[0, 1:])
+        self.grid_y = np.ascontiguousarray(efficiencies[1:, 0])
+        self.values = np.ascontiguousarray(efficiencies[1:, 1:])  # rows along grid_y, columns along grid_x
+        if np.any(np.diff(self.grid_x) <= 0) or np.any(np.diff(self.grid_y) <= 0):
+            raise ValueError('Grid of efficiency map must be strictly ascending.')
+
+        # python lists for scalar evaluation without numpy overhead
+        self.__grid_x = self.grid_x.tolist()
+        self.__grid_y = self.grid_y.tolist()
+        self.__values = self.values.tolist()
+
+    def __call__(self, x, y):
+        """
+        evaluate efficiency map for scalar inputs
+
+        Args:
+            x (float): first input
+            y (float): second input
+
+        Returns:
+            efficiency (float): interpolated efficiency
+        """
+        i, i_next, t_x = self.__locate(self.__grid_x, float(x))
+        j, j_next, t_y = self.__locate(self.__grid_y, float(y))
+        values, values_next = self.__values[j], self.__values[j_next]
+        return ((1 - t_y) * ((1 - t_x) * values[i] + t_x * values[i_next]) +
+                t_y * ((1 - t_x) * values_next[i] + t_x * values_next[i_next]))
+
+    def evaluate(self, x, y):
+        """
+        evaluate efficiency map for arrays of inputs
+
+        Args:
+            x (np.ndarray): first input
+            y (np.ndarray): second input
+
+        Returns:
+            efficiency (np.ndarray): interpolated efficiencies
+        """
+        i, i_next, t_x = self.__locate_batch(self.grid_x, np.asarray(x, dtype=np.float64))
+        j, j_next, t_y = self.__locate_batch(self.grid_y, np.asarray(y, dtype=np.float64))
+        return ((1 - t_y) * ((1 - t_x) * self.values[j, i] + t_x * self.values[j, i_next]) +
+                t_y * ((1 - t_x) * self.values[j_next, i] + t_x * self.values[j_next, i_next]))
+
+    def __locate(self, grid, value):
+        """
+        locate clamped value within grid
+
+        Args:
+            grid (list): ascending grid
+            value (float): value
+
+        Returns:
+            idx (int): index of lower grid point
+            idx_next (int): index of upper grid point
+            weight (float): weight of upper grid point
+        """
+        if value <= grid[0]:
+            return 0, 0, 0.
+        if value >= grid[-1]:
+            return len(grid) - 1, len(grid) - 1, 0.
+        idx = bisect_right(grid, value) - 1
+        return idx, idx + 1, (value - grid[idx]) / (grid[idx + 1] - grid[idx])
+
+    def __locate_batch(self, grid, values):
+        """
+        locate clamped values within grid
+
+        Args:
+            grid (np.ndarray): ascending grid
+            values (np.ndarray): values
+
+        Returns:
+            idx (np.ndarray): indices of lower grid points
+            idx_next (np.ndarray): indices of upper grid points
+            weight (np.ndarray): weights of upper grid points
+        """
+        values = np.clip(values, grid[0], grid[-1])
+        idx = np.clip(np.searchsorted(grid, values, side='right') - 1, 0, len(grid) - 1)
+        idx_next = np.minimum(idx + 1, len(grid) - 1)
+        spacing = grid[idx_next] - grid[idx]
+        weight = np.divide(values - grid[idx], spacing, out=np.zeros_like(values), where=spacing > 0)
+        return idx, idx_next, weight
+
+
+if __name__ == '__main__':
+    pass
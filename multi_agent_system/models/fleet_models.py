@@ -0,0 +1,663 @@
+"""
+fleet models for quantity assessment - vectorized over all agents sharing one capacity model
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "fleet models for capacity assessment"
+
+import numpy as np
+from multi_agent_system.models.efficiency import EfficiencyMap
+from multi_agent_system.models.quantity_assessment_models import _heat_exchanger_effectiveness
+from multi_agent_system.models.registry import register_model
+
+
+def _column(parameters, section, key):
+    """
+    stack scalar parameter or input of all agents
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+        section (str): model_parameters or model_inputs
+        key (str): name of parameter or input
+
+    Returns:
+        column (np.array): array with one value per agent
+    """
+    return np.array([agent_parameters[section][key] for agent_parameters in parameters], dtype=np.float64)
+
+
+def _stack(rows, fill):
+    """
+    stack rows of different length into padded array
+
+    Args:
+        rows (list): list of lists or arrays
+        fill (float): value of padded elements
+
+    Returns:
+        stacked (np.array): padded array with one row per agent
+        lengths (np.array): length of every row
+    """
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    stacked = np.full((len(rows), max(1, lengths.max(initial=0))), fill, dtype=np.float64)
+    for idx, row in enumerate(rows):
+        stacked[idx, :lengths[idx]] = row
+    return stacked, lengths
+
+
+def _horizon(parameters, key):
+    """
+    stack cleared energies of product horizon of all agents
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+        key (str): name of input, e.g. cleared_energy_pos
+
+    Returns:
+        stacked (np.array): padded array with one row per agent
+        lengths (np.array): horizon length of every agent
+    """
+    return _stack([agent_parameters['model_inputs'][key] for agent_parameters in parameters], fill=0)
+
+
+def _batch_max(values, lengths):
+    """
+    maximum of padded rows
+
+    Args:
+        values (np.array): padded array with one row per agent
+        lengths (np.array): length of every row
+
+    Returns:
+        maximum (np.array): maximum of every row
+    """
+    mask = np.arange(values.shape[1]) < lengths[:, None]
+    return np.where(mask, values, -np.inf).max(axis=1)
+
+
+def _batch_interp(x, curves):
+    """
+    piecewise linear interpolation of individual curves, equal to np.interp per agent
+
+    Args:
+        x (np.array): values with one row (or value) per agent
+        curves (list): list of curves [[x values], [y values]] per agent
+
+    Returns:
+        y (np.array): interpolated values with shape of x
+    """
+    xp, lengths = _stack([curve[0] for curve in curves], fill=np.inf)
+    fp, _ = _stack([curve[1] for curve in curves], fill=np.nan)
+    x = np.asarray(x, dtype=np.float64)
+    squeeze = x.ndim == 1
+    if squeeze:
+        x = x[:, None]
+
+    # index of first sampling point greater than x (padded points are never smaller or equal)
+    idx = (xp[:, None, :] <= x[..., None]).sum(axis=-1)
+    last = (lengths - 1)[:, None]
+    lower = np.clip(idx - 1, 0, np.maximum(last - 1, 0))
+    upper = np.minimum(lower + 1, last)
+    xp_lower = np.take_along_axis(xp, lower, axis=1)
+    xp_upper = np.take_along_axis(xp, upper, axis=1)
+    fp_lower = np.take_along_axis(fp, lower, axis=1)
+    fp_upper = np.take_along_axis(fp, upper, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (fp_upper - fp_lower) / (xp_upper - xp_lower)
+        y = slope * (x - xp_lower) + fp_lower
+    y = np.where(x == xp_lower, fp_lower, y)
+    y = np.where(idx == 0, fp[:, :1], y)
+    y = np.where(idx > last, np.take_along_axis(fp, last, axis=1), y)
+    return y[:, 0] if squeeze else y
+
+
+def _batch_linspace(start, stop, num):
+    """
+    evenly spaced values between start and stop, equal to np.linspace per agent and [stop] if num is 1
+
+    Args:
+        start (np.array): first value per agent
+        stop (np.array): last value per agent
+        num (np.array): number of values per agent
+
+    Returns:
+        values (np.array): padded array with one row per agent
+    """
+    num = num.astype(np.int64)
+    steps = np.arange(max(1, num.max(initial=0)), dtype=np.float64)
+
+    # single values have no step and are set to stop below
+    step = np.zeros(len(num), dtype=np.float64)
+    is_range = num > 1
+    step[is_range] = (stop[is_range] - start[is_range]) / (num[is_range] - 1)
+    values = steps[None, :] * step[:, None] + start[:, None]
+
+    # endpoint is exactly stop, like np.linspace
+    rows = np.arange(len(num))
+    values[rows, np.maximum(num - 1, 0)] = stop
+    return values
+
+
+def _utility(parameters, temperature, nominal_power, cleared_energy):
+    """
+    residual thermal powers of heating or cooling utilities
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+        temperature (str): input of thermal efficiency curve
+        nominal_power (str): parameter scaled by thermal efficiency
+        cleared_energy (str): cleared energy reducing residual power
+
+    Returns:
+        thermal_efficiency (np.array): thermal efficiency per agent
+        nominal_thermal_power (np.array): nominal thermal power per agent
+        thermal_powers (np.array): padded array of thermal powers per agent
+        operating_points (np.array): padded array of operating points per agent
+        electric_efficiencies (np.array): padded array of electric efficiencies per agent
+    """
+    thermal_efficiency = _batch_interp(
+        _column(parameters, 'model_inputs', temperature),
+        [agent_parameters['model_parameters']['thermal_efficiencies'] for agent_parameters in parameters])
+    nominal_thermal_power = thermal_efficiency*_column(parameters, 'model_parameters', nominal_power)
+
+    # maximum residual power - trading time in seconds and energy in kWh
+    cleared_energy, lengths = _horizon(parameters, cleared_energy)
+    cleared_power = _batch_max(cleared_energy, lengths)/(_column(parameters, 'model_inputs', 'trading_time')/3600)
+    power_max = np.clip(nominal_thermal_power - cleared_power, 0, nominal_thermal_power)
+
+    # minimum residual power
+    minimal_load = _column(parameters, 'model_parameters', 'minimal_load')
+    power_min = np.where(minimal_load*nominal_thermal_power > cleared_power, minimal_load*nominal_thermal_power, 0)
+
+    thermal_powers = _batch_linspace(power_min, power_max, _column(
+        parameters, 'model_parameters', 'bid_discretization'))
+
+    # consider product allocation
+    thermal_powers *= _column(parameters, 'model_inputs', 'product_allocation')[:, None]
+
+    # calculate electric efficiency
+    with np.errstate(divide='ignore', invalid='ignore'):
+        operating_points = thermal_powers/nominal_thermal_power[:, None]
+    electric_efficiencies = _batch_interp(
+        operating_points,
+        [agent_parameters['model_parameters']['electric_efficiencies'] for agent_parameters in parameters])
+
+    return thermal_efficiency, nominal_thermal_power, thermal_powers, operating_points, electric_efficiencies
+
+
+def _bid_discretization(parameters):
+    """
+    number of bids per agent
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        num (list): number of bids per agent
+    """
+    return [int(agent_parameters['model_parameters']['bid_discretization']) for agent_parameters in parameters]
+
+
+@register_model('fleet_quantity_assessment')
+def cooling_utility(parameters):
+    """
+    utilities generating cooling energy, see quantity_assessment_models.cooling_utility
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal and electric energies per agent
+    """
+    _, _, thermal_powers, operating_points, electric_efficiencies = _utility(
+        parameters, 'ambient_temperature', 'nominal_electric_power', 'cleared_energy_neg')
+    electric_powers = operating_points*electric_efficiencies*_column(
+        parameters, 'model_parameters', 'nominal_electric_power')[:, None]
+
+    # calculate energy based on powers and product
+    product_type = _column(parameters, 'model_inputs', 'product_type')[:, None]
+    thermal_energy = thermal_powers*product_type/3600
+    electric_energy = electric_powers*product_type/3600
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx, :num], dtype=np.float64),
+        'electric_energy': np.array(electric_energy[idx, :num], dtype=np.float64)
+        } for idx, num in enumerate(_bid_discretization(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def heating_utility(parameters):
+    """
+    utilities generating heating energy, see quantity_assessment_models.heating_utility
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal, electric and fuel energies per agent
+    """
+    thermal_efficiency, _, thermal_powers, operating_points, electric_efficiencies = _utility(
+        parameters, 'fReturnTemperature', 'nominal_fuel_power', 'cleared_energy_pos')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fuel_powers = thermal_powers/thermal_efficiency[:, None]
+    electric_powers = -operating_points*electric_efficiencies*_column(
+        parameters, 'model_parameters', 'nominal_fuel_power')[:, None]
+
+    # calculate energies based on power and product
+    product_type = _column(parameters, 'model_inputs', 'product_type')[:, None]
+    thermal_energy = thermal_powers*product_type/3600
+    electric_energy = electric_powers*product_type/3600
+    fuel_energy = fuel_powers*product_type/3600
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx, :num], dtype=np.float64),
+        'electric_energy': np.array(electric_energy[idx, :num], dtype=np.float64),
+        'fuel_energy': np.array(fuel_energy[idx, :num], dtype=np.float64)
+        } for idx, num in enumerate(_bid_discretization(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def demand_prescribed(parameters):
+    """
+    external prescribed heating or cooling demands, see quantity_assessment_models.demand_prescribed
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal energy per agent
+    """
+    # positive if waste heat/cool demand, negative if heat demand
+    demand = _column(parameters, 'model_inputs', 'demand')
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_power = _batch_max(cleared_energy_pos - cleared_energy_neg, lengths)/(
+        _column(parameters, 'model_inputs', 'trading_time')/3600)
+
+    # consider heating and cooling demands
+    thermal_power = np.where(
+        demand > 0, np.maximum(0, demand - cleared_power), np.minimum(0, demand - cleared_power))
+
+    thermal_energy_min = thermal_power*_column(parameters, 'model_inputs', 'product_type')/3600
+    thermal_energy = thermal_energy_min * _column(parameters, 'model_inputs', 'product_allocation')
+
+    return [{
+        'thermal_energy': np.array([thermal_energy[idx]], dtype=np.float64),
+        'thermal_energy_min': np.array([thermal_energy_min[idx]], dtype=np.float64)
+        } for idx in range(len(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def demand_building(parameters):
+    """
+    building demands which are calculated by ambient temperature, see quantity_assessment_models.demand_building
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal energies and current soc per agent
+    """
+    actual_temperature = _column(parameters, 'model_inputs', 'fRoomTemperature')
+    target_temperature = _column(parameters, 'model_parameters', 'target_temperature')
+    mean_temperature = (target_temperature + actual_temperature)/2
+    heat_capacity = _column(parameters, 'model_parameters', 'heat_capacity')
+    temperature_limits = np.array(
+        [agent_parameters['model_parameters']['temperature_limits'] for agent_parameters in parameters],
+        dtype=np.float64)
+    product_type = _column(parameters, 'model_inputs', 'product_type')
+
+    # demand means ambient temperature
+    demand = (heat_capacity*(target_temperature-actual_temperature))/product_type+(
+        mean_temperature-_column(parameters, 'model_inputs', 'ambient_temperature'))/_column(
+            parameters, 'model_parameters', 'thermal_resistance_to_ambient')
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_power = _batch_max(cleared_energy_pos - cleared_energy_neg, lengths)/(
+        _column(parameters, 'model_inputs', 'trading_time')/3600)
+
+    # residual power - possible [load reduction, load raise], none for shorttime product
+    is_shorttime_product = _column(parameters, 'model_inputs', 'shorttime_product') != 0
+    load_reduction = np.where(
+        is_shorttime_product, 0, (heat_capacity*(target_temperature-temperature_limits[:, 0]))/product_type)
+    load_raise = np.where(
+        is_shorttime_product, 0, (heat_capacity*(temperature_limits[:, 1]-target_temperature))/product_type)
+
+    # heating or cooling mode
+    is_heating_mode = _column(parameters, 'model_inputs', 'bHeatingMode') == 1
+    power_max = np.where(
+        is_heating_mode,
+        np.maximum(demand + load_raise + cleared_power, 0),
+        np.minimum(demand - load_reduction - cleared_power, 0))
+    power_min = np.where(
+        is_heating_mode,
+        np.maximum(demand - load_reduction + cleared_power, 0),
+        np.minimum(demand + load_raise - cleared_power, 0))
+    thermal_powers = np.column_stack([power_min, power_max])
+    thermal_energy_min = thermal_powers[:, 0]*product_type/3600
+    thermal_energy = thermal_powers*product_type[:, None]*_column(
+        parameters, 'model_inputs', 'product_allocation')[:, None]/3600
+
+    storage_capacity = heat_capacity*(temperature_limits[:, 1] - temperature_limits[:, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        soc = np.where(
+            storage_capacity != 0,
+            heat_capacity*(actual_temperature - temperature_limits[:, 0])/storage_capacity,
+            0)
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx], dtype=np.float64),
+        'thermal_energy_min': np.array([max(0, thermal_energy_min[idx])], dtype=np.float64),
+        'soc': soc[idx],
+        } for idx in range(len(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def demand_building_one_product(parameters):
+    """
+    building demands which are calculated by ambient temperature, see
+    quantity_assessment_models.demand_building_one_product
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal energies and current soc per agent
+    """
+    actual_temperature = _column(parameters, 'model_inputs', 'fRoomTemperature')
+    target_temperature = _column(parameters, 'model_parameters', 'target_temperature')
+    mean_temperature = (target_temperature + actual_temperature)/2
+    heat_capacity = _column(parameters, 'model_parameters', 'heat_capacity')
+    temperature_limits = np.array(
+        [agent_parameters['model_parameters']['temperature_limits'] for agent_parameters in parameters],
+        dtype=np.float64)
+    product_type = _column(parameters, 'model_inputs', 'product_type')
+
+    # demand means ambient temperature
+    demand = (heat_capacity*(target_temperature-actual_temperature))/product_type+(
+        mean_temperature-_column(parameters, 'model_inputs', 'ambient_temperature'))/_column(
+            parameters, 'model_parameters', 'thermal_resistance_to_ambient')
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_power = _batch_max(cleared_energy_pos - cleared_energy_neg, lengths)/(
+        _column(parameters, 'model_inputs', 'trading_time')/3600)
+
+    # residual power - possible [load reduction, load raise] by actual temperature
+    load_reduction = (heat_capacity*(actual_temperature-temperature_limits[:, 0]))/product_type
+    load_raise = (heat_capacity*(temperature_limits[:, 1]-actual_temperature))/product_type
+
+    # heating or cooling mode
+    is_heating_mode = _column(parameters, 'model_inputs', 'bHeatingMode') == 1
+    power_max = np.where(
+        is_heating_mode,
+        np.maximum(demand + load_raise, 0) + cleared_power,
+        np.minimum(demand - load_reduction, 0) - cleared_power)
+    power_min = np.where(
+        is_heating_mode,
+        np.maximum(demand - load_reduction, 0) + cleared_power,
+        np.minimum(demand + load_raise, 0) - cleared_power)
+    thermal_powers = np.column_stack([power_min, power_max])
+    thermal_energy_min = thermal_powers[:, 0]*product_type/3600
+    thermal_energy = thermal_powers*product_type[:, None]*_column(
+        parameters, 'model_inputs', 'product_allocation')[:, None]/3600
+
+    storage_capacity = heat_capacity*(temperature_limits[:, 1] - temperature_limits[:, 0])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        soc = np.where(
+            storage_capacity != 0,
+            heat_capacity*(actual_temperature - temperature_limits[:, 0])/storage_capacity,
+            0)
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx], dtype=np.float64),
+        'thermal_energy_min': np.array([max(0, thermal_energy_min[idx])], dtype=np.float64),
+        'soc': soc[idx],
+        } for idx in range(len(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def thermal_network(parameters):
+    """
+    thermal networks acting as system operators, see quantity_assessment_models.thermal_network
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal energy and soc per agent
+    """
+    actual_temperature = (
+        _column(parameters, 'model_inputs', 'fUpperTemperature') +
+        _column(parameters, 'model_inputs', 'fLowerTemperature'))/2
+    heat_capacity = _column(parameters, 'model_parameters', 'heat_capacity')
+    temperature_limits = np.array(
+        [agent_parameters['model_parameters']['temperature_limits'] for agent_parameters in parameters],
+        dtype=np.float64)
+    product_type = _column(parameters, 'model_inputs', 'product_type')
+
+    demand_power = (heat_capacity*(
+        _column(parameters, 'model_parameters', 'target_temperature')-actual_temperature))/product_type
+
+    storage_capacity = heat_capacity*(temperature_limits[:, 1] - temperature_limits[:, 0])
+    soc = heat_capacity*(actual_temperature - temperature_limits[:, 0])/storage_capacity
+
+    # buy if network has to be charged, sell otherwise
+    product_allocation = np.where(
+        demand_power > 0,
+        _column(parameters, 'model_inputs', 'buy_product_allocation'),
+        _column(parameters, 'model_inputs', 'sell_product_allocation'))
+    thermal_energy = demand_power*product_type*product_allocation/3600
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx], dtype=np.float64),
+        'soc': soc[idx]
+        } for idx in range(len(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def storage(parameters):
+    """
+    active heat or cold storages, see quantity_assessment_models.storage
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding traded thermal energy, stored energy and soc per agent
+    """
+    actual_temperature = (
+        _column(parameters, 'model_inputs', 'fUpperTemperature') +
+        _column(parameters, 'model_inputs', 'fLowerTemperature'))/2
+    heat_capacity = _column(parameters, 'model_parameters', 'heat_capacity')
+    temperature_limits = np.array(
+        [agent_parameters['model_parameters']['temperature_limits'] for agent_parameters in parameters],
+        dtype=np.float64)
+    storage_capacity = heat_capacity*(temperature_limits[:, 1] - temperature_limits[:, 0])
+    stored_energy = np.maximum(0, heat_capacity*(actual_temperature - temperature_limits[:, 0]))
+    soc = stored_energy/storage_capacity
+
+    stored_energy = stored_energy/3600
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_energy = abs(cleared_energy_pos - cleared_energy_neg)
+
+    # buy fixed ratio of heat capacity on longtime products, sell traded energy on shortterm market
+    is_shorttime_product = _column(parameters, 'model_inputs', 'shorttime_product') != 0
+    is_heat_storage = _column(parameters, 'model_parameters', 'is_heat_storage') != 0
+    buy_product_allocation = _column(parameters, 'model_inputs', 'buy_product_allocation')
+    sell_product_allocation = _column(parameters, 'model_inputs', 'sell_product_allocation')
+    product_allocation = np.where(
+        is_shorttime_product == is_heat_storage, sell_product_allocation, buy_product_allocation)
+    thermal_energy = np.where(
+        is_shorttime_product[:, None],
+        cleared_energy,
+        storage_capacity[:, None]/3600/lengths[:, None] - cleared_energy)*product_allocation[:, None]
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx, :num], dtype=np.float64),
+        'stored_energy': np.array([stored_energy[idx]], dtype=np.float64),
+        'soc': soc[idx]
+        } for idx, num in enumerate(lengths)]
+
+
+@register_model('fleet_quantity_assessment')
+def storage_one_product(parameters):
+    """
+    active heat or cold storages, see quantity_assessment_models.storage_one_product
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding traded thermal energy, stored energy and soc per agent
+    """
+    actual_temperature = (
+        _column(parameters, 'model_inputs', 'fUpperTemperature') +
+        _column(parameters, 'model_inputs', 'fLowerTemperature'))/2
+    heat_capacity = _column(parameters, 'model_parameters', 'heat_capacity')
+    temperature_limits = np.array(
+        [agent_parameters['model_parameters']['temperature_limits'] for agent_parameters in parameters],
+        dtype=np.float64)
+    storage_capacity = heat_capacity*(temperature_limits[:, 1] - temperature_limits[:, 0])
+    stored_energy = np.maximum(0, heat_capacity*(actual_temperature - temperature_limits[:, 0]))
+    soc = stored_energy/storage_capacity
+
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_energy = abs(cleared_energy_pos - cleared_energy_neg)
+
+    # buy fixed ratio of heat capacity - kJ in kWh and sell only stored energy
+    product_allocation = np.where(
+        _column(parameters, 'model_parameters', 'is_heat_storage') != 0,
+        _column(parameters, 'model_inputs', 'buy_product_allocation'),
+        _column(parameters, 'model_inputs', 'sell_product_allocation'))
+    thermal_energy = (storage_capacity[:, None]/3600/lengths[:, None] - cleared_energy)*product_allocation[:, None]
+
+    return [{
+        'thermal_energy': np.array(thermal_energy[idx, :num], dtype=np.float64),
+        'stored_energy': np.array([stored_energy[idx]], dtype=np.float64),
+        'soc': soc[idx]
+        } for idx, num in enumerate(lengths)]
+
+
+@register_model('fleet_quantity_assessment')
+def heat_exchanger(parameters):
+    """
+    heat exchangers, see quantity_assessment_models.heat_exchanger
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal energies per agent
+    """
+    # effectiveness of heat exchangers - compiled once by setup, evaluated by capacity flows otherwise
+    effectiveness = []
+    for agent_parameters in parameters:
+        model_parameters = agent_parameters['model_parameters']
+        if model_parameters.get('min_capacity_flow') is None or model_parameters.get('effectiveness') is None:
+            effectiveness.append(_heat_exchanger_effectiveness(
+                model_parameters['max_capacity_flow_hot'], model_parameters['max_capacity_flow_cold'],
+                model_parameters['heat_transfer_coefficient'], model_parameters['heat_exchanger_area']))
+        else:
+            effectiveness.append((model_parameters['min_capacity_flow'], model_parameters['effectiveness']))
+    c_min_flow, eps = np.array(effectiveness, dtype=np.float64).reshape(-1, 2).T
+
+    thermal_power_max = c_min_flow*(
+        _column(parameters, 'model_inputs', 'fFeedTemperature_hot') -
+        _column(parameters, 'model_inputs', 'fReturnTemperature_cold'))
+
+    # cleared energy of use case heating or cooling
+    cleared_energy_pos, lengths = _horizon(parameters, 'cleared_energy_pos')
+    cleared_energy_neg, _ = _horizon(parameters, 'cleared_energy_neg')
+    cleared_energy = np.where(
+        _column(parameters, 'model_parameters', 'heating_use_case')[:, None] != 0, cleared_energy_pos,
+        cleared_energy_neg)
+    cleared_power = _batch_max(cleared_energy, lengths)/(_column(parameters, 'model_inputs', 'trading_time')/3600)
+    thermal_power = np.maximum(thermal_power_max*eps - cleared_power, 0)
+
+    thermal_energy = thermal_power*_column(parameters, 'model_inputs', 'product_type')*_column(
+        parameters, 'model_inputs', 'product_allocation')/3600
+
+    return [{
+        'thermal_energy': np.array([thermal_energy[idx]], dtype=np.float64),
+        } for idx in range(len(parameters))]
+
+
+@register_model('fleet_quantity_assessment')
+def heat_pump(parameters):
+    """
+    heat pumps, see quantity_assessment_models.heat_pump
+
+    Args:
+        parameters (list): list of dictionaries holding model parameters and model inputs per agent
+
+    Returns:
+        results (list): list of dictionaries holding thermal and electric energies per agent
+    """
+    # thermal and electric efficiency from individual efficiency maps
+    efficiencies = []
+    for agent_parameters in parameters:
+        model_parameters = agent_parameters['model_parameters']
+        temperatures = (agent_parameters['model_inputs']['fReturnTemperature_hot'],
+                        agent_parameters['model_inputs']['fReturnTemperature_cold'])
+        thermal_efficiency_map = model_parameters.get('thermal_efficiency_map')
+        if thermal_efficiency_map is None:
+            thermal_efficiency_map = EfficiencyMap(model_parameters['thermal_efficiencies'])
+        electric_efficiency_map = model_parameters.get('electric_efficiency_map')
+        if electric_efficiency_map is None:
+            electric_efficiency_map = EfficiencyMap(model_parameters['electric_efficiencies'])
+        efficiencies.append((thermal_efficiency_map(*temperatures), electric_efficiency_map(*temperatures)))
+    thermal_efficiency, electric_efficiency = np.array(efficiencies, dtype=np.float64).reshape(-1, 2).T
+
+    nominal_cooling_power = thermal_efficiency*_column(parameters, 'model_parameters', 'nominal_cooling_power')
+    nominal_electric_power = electric_efficiency*_column(parameters, 'model_parameters', 'nominal_electric_power')
+    nominal_heating_power = nominal_cooling_power+nominal_electric_power
+    trading_time = _column(parameters, 'model_inputs', 'trading_time')/3600
+    minimal_load = _column(parameters, 'model_parameters', 'minimal_load')
+    is_heating_use_case = _column(parameters, 'model_parameters', 'heating_use_case') != 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # use case heating
+        cleared_energy, lengths = _horizon(parameters, 'cleared_energy_pos')
+        cleared_power_heat = _batch_max(cleared_energy, lengths)/trading_time
+        heat_power_max_heat = np.clip(nominal_heating_power-cleared_power_heat, 0, nominal_heating_power)
+        heat_power_max_electric = heat_power_max_heat/nominal_heating_power*nominal_electric_power
+        heat_power_max_cool = heat_power_max_heat-heat_power_max_electric
+        heat_min_operating_point = np.where(minimal_load*heat_power_max_heat > cleared_power_heat, minimal_load, 0)
+
+        # use case cooling
+        cleared_energy, lengths = _horizon(parameters, 'cleared_energy_neg')
+        cleared_power_cool = _batch_max(cleared_energy, lengths)/trading_time
+        cool_power_max_cool = np.clip(nominal_cooling_power-cleared_power_cool, 0, nominal_cooling_power)
+        cool_power_max_electric = cool_power_max_cool/nominal_cooling_power*nominal_electric_power
+        cool_power_max_heat = cool_power_max_cool+cool_power_max_electric
+        cool_min_operating_point = np.where(minimal_load > np.divide(
+            cleared_power_cool, cool_power_max_cool, out=np.zeros_like(cool_power_max_cool),
+            where=cool_power_max_cool != 0), minimal_load, 0)
+
+    power_max_heat = np.where(is_heating_use_case, heat_power_max_heat, cool_power_max_heat)
+    power_max_cool = np.where(is_heating_use_case, heat_power_max_cool, cool_power_max_cool)
+    power_max_electric = np.where(is_heating_use_case, heat_power_max_electric, cool_power_max_electric)
+    min_operating_point = np.where(is_heating_use_case, heat_min_operating_point, cool_min_operating_point)
+
+    # calculate energies based on powers, product and product allocation
+    num = _column(parameters, 'model_parameters', 'bid_discretization')
+    product_type = _column(parameters, 'model_inputs', 'product_type')[:, None]
+    product_allocation = _column(parameters, 'model_inputs', 'product_allocation')[:, None]
+    thermal_energy_heat = _batch_linspace(
+        min_operating_point*power_max_heat, power_max_heat, num)*product_type*product_allocation/3600
+    thermal_energy_cool = _batch_linspace(
+        min_operating_point*power_max_cool, power_max_cool, num)*product_type*product_allocation/3600
+    electric_energy = _batch_linspace(
+        min_operating_point*power_max_electric, power_max_electric, num)*product_type*product_allocation/3600
+
+    return [{
+        'thermal_energy_heat': np.array(thermal_energy_heat[idx, :num], dtype=np.float64),
+        'thermal_energy_cool': np.array(thermal_energy_cool[idx, :num], dtype=np.float64),
+        'electric_energy': np.array(electric_energy[idx, :num], dtype=np.float64)
+        } for idx, num in enumerate(_bid_discretization(parameters))]
@@ -11,8 +11,13 @@ __subject__ = "models for market clearing"
 import pandas as pd
 from copy import deepcopy
 from multi_agent_system.base.messages import trade_msg
+from multi_agent_system.models.clearing_kernel import IS_NUMBA_AVAILABLE, double_auction_clearing
+from multi_agent_system.models.registry import register_model
 pd.options.mode.chained_assignment = None  # default='warn'
 
+# market models clearing curve order messages besides order messages
+CURVE_ORDER_MODELS = {'piecewise_linear_auction'}
+
 
 def __double_auction_clearing(market_id, buys, sells):
     """
@@ -106,6 +111,7 @@ def __double_auction_clearing(market_id, buys, sells):
     return trades
 
 
+@register_model('market')
 def double_auction(parameters):
     """
     double auction with pay-as-bid prices considering minimum ratio of acceptance
@@ -117,8 +123,37 @@ def double_auction(parameters):
         trades (list): list with trade messages
     """
 
-    # create dataframe from order book
     market_id = parameters['model_inputs']['market_id']
+
+    # optional compiled matching kernel on structured arrays - order books which cannot be represented as arrays
+    # (e.g. orders without price) are cleared in pure python
+    if parameters['model_inputs'].get('is_compiled_clearing', False) and IS_NUMBA_AVAILABLE:
+        matches = double_auction_clearing(
+            parameters['model_inputs']['order_book'],
+            is_warm_start=parameters['model_inputs'].get('is_warm_start', False),
+            statistics=parameters['model_inputs'].get('clearing_statistics'))
+        if matches is not None:
+            trades = []
+            for buy, sell, clearing_quantity, clearing_price in matches:
+                trades.append(trade_msg(
+                    sender_id=market_id,
+                    reciever_id=buy['sender_id'],
+                    trade_type='buy',
+                    product_type=buy['product_type'],
+                    product_lead_time=buy['product_lead_time'],
+                    quantity=clearing_quantity,
+                    price=clearing_price))
+                trades.append(trade_msg(
+                    sender_id=market_id,
+                    reciever_id=sell['sender_id'],
+                    trade_type='sell',
+                    product_type=sell['product_type'],
+                    product_lead_time=sell['product_lead_time'],
+                    quantity=clearing_quantity,
+                    price=clearing_price))
+            return trades
+
+    # create dataframe from order book
     order_book = pd.DataFrame(parameters['model_inputs']['order_book'])
 
     # terminate function if there are no orders at all
@@ -190,6 +225,7 @@ def double_auction(parameters):
     return []
 
 
+@register_model('market')
 def double_auction_uniform_pricing(parameters):
     """
     double auction with uniform prices considering minimum ratio of acceptance
@@ -212,3 +248,206 @@ def double_auction_uniform_pricing(parameters):
             trade['price'] = uniform_price
 
     return trades
+
+
+def _bid_curve(order):
+    """
+    breakpoints of order as bid curve starting at zero quantity - order messages are flat curves, prices of buys are
+    negated so that all curves hold ascending prices
+
+    Args:
+        order (dict): order message or curve order message
+
+    Returns:
+        quantities (list): ascending quantities of breakpoints
+        prices (list): ascending (sells) or negated (buys) prices of breakpoints
+    """
+    if order['type'] == 'curve_order_msg':
+        quantities = [0] + [float(quantity) for quantity in order['quantities']]
+        prices = [float(order['prices'][0])] + [float(price) for price in order['prices']]
+    else:
+        quantities = [0, float(order['quantity'])]
+        prices = [float(order['price'])] * 2
+    if order['order_type'] == 'buy':
+        prices = [-price for price in prices]
+    return quantities, prices
+
+
+def _curve_quantity(curve, price, is_upper):
+    """
+    quantity of bid curve at price - the curve is a step at flat segments, thus the quantity is given as lower
+    (quantity at prices slightly below) or upper (quantity at prices slightly above) limit
+
+    Args:
+        curve (tuple): quantities and ascending prices of breakpoints
+        price (float): price, negated for buys
+        is_upper (bool): upper limit if True, lower limit otherwise
+
+    Returns:
+        quantity (float): quantity of bid curve
+    """
+    quantities, prices = curve
+    quantity = 0.
+    for idx in range(len(quantities) - 1):
+        price_start, price_end = prices[idx], prices[idx + 1]
+        if price_end < price or (price_end == price and (is_upper or price_start < price)):
+            quantity = quantities[idx + 1]
+            continue
+        if price_start < price < price_end:
+            quantity = quantities[idx] + (price - price_start) / (price_end - price_start) * (
+                quantities[idx + 1] - quantities[idx])
+        break
+    return quantity
+
+
+def _curve_clearing(curves, is_buy):
+    """
+    intersection of aggregated supply and demand of piecewise linear bid curves - aggregated curves are linear between
+    breakpoint prices, thus the uniform price is found by bisection over breakpoint prices and linear interpolation
+    within the enclosing interval. at steps of aggregated curves (flat segments of bid curves) the traded quantity is
+    maximized and the marginal quantities of the long side are split pro rata
+
+    Args:
+        curves (list): bid curves per order
+        is_buy (list): order is buy per order
+
+    Returns:
+        price (float): uniform clearing price, None if nothing is traded
+        quantities (list): cleared quantity per order
+    """
+    candidates = sorted({price if not buy else -price
+                         for curve, buy in zip(curves, is_buy) for price in curve[1]})
+    if not candidates:
+        return None, [0.] * len(curves)
+
+    def quantities_at(price, is_upper_sell, is_upper_buy):
+        # quantities per order at price, buy curves are evaluated at negated price
+        return [_curve_quantity(curve, -price, is_upper_buy) if buy else _curve_quantity(curve, price, is_upper_sell)
+                for curve, buy in zip(curves, is_buy)]
+
+    def excess(position):
+        # excess demand at left (even position) or right (odd position) limit of candidate price, non-increasing
+        price = candidates[position // 2]
+        is_right = position % 2 == 1
+        quantities = quantities_at(price, is_upper_sell=is_right, is_upper_buy=not is_right)
+        return sum(quantity if buy else -quantity for quantity, buy in zip(quantities, is_buy))
+
+    # first position without excess demand
+    low, high = 0, 2 * len(candidates) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if excess(middle) <= 0:
+            high = middle
+        else:
+            low = middle + 1
+    index = low // 2
+
+    if low % 2 == 0:
+        # no demand at all or intersection between two candidate prices, aggregated curves are linear in between
+        if index == 0:
+            return None, [0.] * len(curves)
+        excess_start = excess(low - 1)
+        excess_end = excess(low)
+        price = candidates[index - 1] + excess_start / (excess_start - excess_end) * (
+            candidates[index] - candidates[index - 1])
+        return price, quantities_at(price, is_upper_sell=False, is_upper_buy=True)
+
+    # intersection at step of aggregated curves - maximum traded quantity, marginal quantities split pro rata
+    price = candidates[index]
+    lower = quantities_at(price, is_upper_sell=False, is_upper_buy=False)
+    upper = quantities_at(price, is_upper_sell=True, is_upper_buy=True)
+    total = {}
+    for buy in (True, False):
+        total[buy] = (sum(quantity for quantity, order_buy in zip(lower, is_buy) if order_buy == buy),
+                      sum(quantity for quantity, order_buy in zip(upper, is_buy) if order_buy == buy))
+    traded_quantity = min(total[True][1], total[False][1])
+    quantities = []
+    for quantity_lower, quantity_upper, buy in zip(lower, upper, is_buy):
+        total_lower, total_upper = total[buy]
+        share = (traded_quantity - total_lower) / (total_upper - total_lower) if total_upper > total_lower else 0
+        quantities.append(quantity_lower + share * (quantity_upper - quantity_lower))
+    return price, quantities
+
+
+def _curve_rejections(order_book, quantities):
+    """
+    orders which cannot be executed with cleared quantities - minimum ratio of acceptance or minimum quantity is
+    violated, or coupled orders are cleared together (the order with the larger quantity is kept)
+
+    Args:
+        order_book (list): order messages and curve order messages
+        quantities (list): cleared quantity per order
+
+    Returns:
+        rejections (set): indices of rejected orders
+    """
+    tolerance = 1e-9
+    rejections = set()
+    for idx, (order, quantity) in enumerate(zip(order_book, quantities)):
+        if quantity <= tolerance:
+            continue
+        if order['type'] == 'curve_order_msg':
+            min_quantity = order['min_quantity']
+        else:
+            min_quantity = order['min_acceptance_ratio'] * order['quantity']
+        if quantity < min_quantity - tolerance * max(1, min_quantity):
+            rejections.add(idx)
+
+    indices = {order['id']: idx for idx, order in enumerate(order_book)}
+    kept = set()
+    for idx in sorted(range(len(order_book)), key=lambda idx: -quantities[idx]):
+        if quantities[idx] <= tolerance or idx in rejections:
+            continue
+        kept.add(idx)
+        for order_id in order_book[idx].get('coupled_order') or []:
+            coupled_idx = indices.get(order_id)
+            if coupled_idx is not None and coupled_idx not in kept and quantities[coupled_idx] > tolerance:
+                rejections.add(coupled_idx)
+    return rejections
+
+
+@register_model('market')
+def piecewise_linear_auction(parameters):
+    """
+    uniform price auction of piecewise linear bid curves - order messages and curve order messages are intersected
+    analytically, thus converters may send one curve order instead of a discretized ladder of coupled orders. orders
+    which violate their minimum ratio of acceptance, minimum quantity or coupling are removed and the auction is
+    cleared again
+
+    Args:
+        parameters (dict): standardized parameter dict holding model parameters/inputs according .json file
+
+    Returns:
+        trades (list): list with trade messages
+    """
+
+    market_id = parameters['model_inputs']['market_id']
+    order_book = [order for order in parameters['model_inputs']['order_book'] if order['quantity'] > 0]
+
+    while order_book:
+        curves = [_bid_curve(order) for order in order_book]
+        is_buy = [order['order_type'] == 'buy' for order in order_book]
+        price, quantities = _curve_clearing(curves, is_buy)
+        if price is None:
+            return []
+
+        rejections = _curve_rejections(order_book, quantities)
+        if rejections:
+            order_book = [order for idx, order in enumerate(order_book) if idx not in rejections]
+            continue
+
+        trades = []
+        for order, quantity in zip(order_book, quantities):
+            if quantity <= 0:
+                continue
+            trades.append(trade_msg(
+                sender_id=market_id,
+                reciever_id=order['sender_id'],
+                trade_type=order['order_type'],
+                product_type=order['product_type'],
+                product_lead_time=order['product_lead_time'],
+                quantity=quantity,
+                price=price))
+        return trades
+
+    return []
@@ -10,9 +10,124 @@ __subject__ = "models for pricing assessment"
 
 import uuid
 import numpy as np
-from multi_agent_system.base.messages import order_msg
+from multi_agent_system.base.messages import curve_order_msg, order_msg
+from multi_agent_system.models.efficiency import EfficiencyCurve
+from multi_agent_system.models.registry import register_model, register_setup
 
 
+def _soc_curve(parameters):
+    """
+    return curve over soc range - compiled once by setup, built on demand otherwise. values of the curve (prices)
+    depend on market limits and are passed per evaluation
+
+    Args:
+        parameters (dict): dictionary holding model parameters and model inputs
+
+    Returns:
+        curve (EfficiencyCurve): curve over soc range
+    """
+    curve = parameters['model_parameters'].get('soc_curve')
+    if curve is None:
+        curve = soc_setup(parameters['model_parameters'])['soc_curve']
+    return curve
+
+
+def _bid_ladder(quantities, min_acceptance_ratio, minimal_load):
+    """
+    vectorized minimum acceptance ratios and coupling structure of a bid ladder of one converter - an order is
+    coupled with every other order of the ladder which exceeds the maximum quantity if both orders are executed
+
+    Args:
+        quantities (np.ndarray): quantities of bid ladder
+        min_acceptance_ratio (float): minimum acceptance ratio of orders
+        minimal_load (float): minimal load as ratio of maximum quantity
+
+    Returns:
+        min_acceptance_ratios (np.ndarray): minimum acceptance ratio per order
+        indptr (np.ndarray): coupled orders of order idx are indices[indptr[idx]:indptr[idx + 1]]
+        indices (np.ndarray): indices of coupled orders
+    """
+    quantities = np.asarray(quantities)
+    max_quantity = max(quantities)
+
+    # consider minimum ratio of acceptance regarding the minimal load
+    is_above_minimal_load = quantities*min_acceptance_ratio >= max_quantity*minimal_load
+    is_nonzero = quantities != 0
+    ratios = np.minimum(1, np.divide(minimal_load*max_quantity, quantities,
+                                     out=np.zeros(len(quantities)), where=is_nonzero))
+    min_acceptance_ratios = np.where(is_above_minimal_load, min_acceptance_ratio, np.where(is_nonzero, ratios, 0))
+
+    # identify unexecutable orders if a specific order is excuted because of maximum load - without self coupling
+    is_coupled = quantities[None, :] + quantities[:, None] > max_quantity
+    np.fill_diagonal(is_coupled, False)
+    rows, indices = np.nonzero(is_coupled)
+    indptr = np.zeros(len(quantities) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(quantities)), out=indptr[1:])
+    return min_acceptance_ratios, indptr, indices
+
+
+def _coupled_orders(uuids, indptr, indices):
+    """
+    map coupling structure of bid ladder to uuids of coupled orders
+
+    Args:
+        uuids (list): uuid per order
+        indptr (np.ndarray): pointers into indices per order
+        indices (np.ndarray): indices of coupled orders
+
+    Returns:
+        coupled_orders (list): list of uuids of coupled orders per order
+    """
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    return [[uuids[idx] for idx in indices[indptr[order]:indptr[order + 1]]] for order in range(len(uuids))]
+
+
+def _curve_order(parameters, order_type, quantities, prices):
+    """
+    piecewise linear bid curve replacing a bid ladder of coupled orders - breakpoints are the nonzero quantities of
+    the ladder in ascending order. each breakpoint holds the most favourable price of all larger quantities (lower
+    envelope for sells, upper envelope for buys), thus prices are monotone along the curve. quantities below minimal
+    load are rejected by the market
+
+    Args:
+        parameters (dict): dictionary holding model parameters and model inputs
+        order_type (str): order type, e.g. sell or buy
+        quantities (np.ndarray): quantities of bid ladder
+        prices (np.ndarray): prices of bid ladder
+
+    Returns:
+        msgs (list): list with one curve order message, empty if the ladder holds no quantity
+    """
+    quantities = np.abs(np.asarray(quantities, dtype=float))
+    prices = np.asarray(prices, dtype=float)
+    order = np.argsort(quantities, kind='stable')
+    is_nonzero = quantities[order] != 0
+    quantities, prices = quantities[order][is_nonzero], prices[order][is_nonzero]
+    if len(quantities) == 0:
+        return []
+
+    if order_type == 'sell':
+        prices = np.minimum.accumulate(prices[::-1])[::-1]
+    else:
+        prices = np.maximum.accumulate(prices[::-1])[::-1]
+
+    return [curve_order_msg(
+        sender_id=parameters['model_parameters']['name'],
+        reciever_id=parameters['model_parameters']['markets'][0],
+        order_type=order_type,
+        product_type=parameters['model_inputs']['product_type'],
+        product_lead_time=parameters['model_inputs']['product_lead_time'],
+        quantities=quantities.tolist(),
+        prices=prices.tolist(),
+        min_quantity=parameters['model_parameters']['minimal_load']*quantities[-1],
+        id=uuid.uuid4()
+    )]
+
+
+@register_model('pricing', inputs={
+    'electricity_price': None, 'is_curve_order': None, 'is_running': None, 'negative_market_limit': None,
+    'positive_market_limit': None, 'product_lead_time': None, 'product_type': None})
 def cool_producer_pricing(parameters):
     """
     pricing assessment for cooling converter
@@ -35,36 +150,25 @@ def cool_producer_pricing(parameters):
     # negative buy price
     total_costs = -cost_electricity-cost_operating_hours-cost_ramp_up
 
-    # consider minimum ratio of acceptance regading the minimal
-    max_quantity = max(quantities)
-    min_acceptance_ratios = []
-    for quantity in quantities:
-        if quantity*parameters['model_parameters']['min_acceptance_ratio'] >= (
-                max_quantity*parameters['model_parameters']['minimal_load']):
-            min_acceptance_ratios.append(parameters['model_parameters']['min_acceptance_ratio'])
-        else:
-            if quantity != 0:
-                min_acceptance_ratios.append(min(
-                    1,
-                    (parameters['model_parameters']['minimal_load']*max_quantity)/quantity))
-            else:
-                min_acceptance_ratios.append(0)
+    # minimum acceptance ratios and coupled orders of bid ladder regarding minimal and maximum load
+    min_acceptance_ratios, coupled_indptr, coupled_indices = _bid_ladder(
+        quantities,
+        min_acceptance_ratio=parameters['model_parameters']['min_acceptance_ratio'],
+        minimal_load=parameters['model_parameters']['minimal_load'])
+    min_acceptance_ratios = min_acceptance_ratios.tolist()
     # calculate prices for quantities unequal to zero, return 0 for zero bids
     prices = np.minimum(
         np.divide(total_costs, quantities, out=np.zeros_like(total_costs), where=quantities != 0),
         parameters['model_inputs']['positive_market_limit'])
     prices = np.maximum(prices, parameters['model_inputs']['negative_market_limit'])
+
+    # optional piecewise linear bid curve instead of coupled orders, requires a market clearing bid curves
+    if parameters['model_inputs'].get('is_curve_order', False):
+        return _curve_order(parameters, 'buy', quantities, prices)
+
     uuids = [uuid.uuid4() for _ in range(len(quantities))]
 
-    # identify unexecutable orders if a specific order is excuted because of maximum load
-    coupled_orders = []
-    for idx, quantity in enumerate(quantities):
-        quantities_add = quantities + quantity
-        # find indices of quantitites + considered order larger than max quantity
-        idx_coupled_orders = np.nonzero(quantities_add > max_quantity)
-        # delete self coupling
-        idx_coupled_orders = idx_coupled_orders[0][idx_coupled_orders[0] != idx]
-        coupled_orders.append([uuids[idx] for idx in idx_coupled_orders])
+    coupled_orders = _coupled_orders(uuids, coupled_indptr, coupled_indices)
 
     msgs = []
     for idx in range(len(quantities)):
@@ -84,6 +188,10 @@ def cool_producer_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'chp_renumeration': None, 'electricity_demand': None, 'electricity_price': None, 'fuel_price': None,
+    'is_curve_order': None, 'is_running': None, 'negative_market_limit': None, 'positive_market_limit': None,
+    'product_lead_time': None, 'product_type': None})
 def heat_producer_pricing(parameters):
     """
     pricing assessment for heating converter
@@ -123,36 +231,25 @@ def heat_producer_pricing(parameters):
     cost_ramp_up = (not parameters['model_inputs']['is_running'])*parameters['model_parameters']['cost_ramp_up']
     total_costs = cost_fuel+cost_electricity+cost_operating_hours+cost_ramp_up
 
-    # consider minimum ratio of acceptance regading the minimal
-    max_quantity = max(quantities)
-    min_acceptance_ratios = []
-    for quantity in quantities:
-        if quantity*parameters['model_parameters']['min_acceptance_ratio'] >= max_quantity*parameters[
-                'model_parameters']['minimal_load']:
-            min_acceptance_ratios.append(parameters['model_parameters']['min_acceptance_ratio'])
-        else:
-            if quantity != 0:
-                min_acceptance_ratios.append(min(
-                    1,
-                    (parameters['model_parameters']['minimal_load']*max_quantity)/quantity))
-            else:
-                min_acceptance_ratios.append(0)
+    # minimum acceptance ratios and coupled orders of bid ladder regarding minimal and maximum load
+    min_acceptance_ratios, coupled_indptr, coupled_indices = _bid_ladder(
+        quantities,
+        min_acceptance_ratio=parameters['model_parameters']['min_acceptance_ratio'],
+        minimal_load=parameters['model_parameters']['minimal_load'])
+    min_acceptance_ratios = min_acceptance_ratios.tolist()
     # calculate prices for quantities unequal to zero, return 0 for zero bids
     prices = np.minimum(
         np.divide(total_costs, quantities, out=np.zeros_like(total_costs), where=quantities != 0),
         parameters['model_inputs']['positive_market_limit'])
     prices = np.maximum(prices, parameters['model_inputs']['negative_market_limit'])
+
+    # optional piecewise linear bid curve instead of coupled orders, requires a market clearing bid curves
+    if parameters['model_inputs'].get('is_curve_order', False):
+        return _curve_order(parameters, 'sell', quantities, prices)
+
     uuids = [uuid.uuid4() for _ in range(len(quantities))]
 
-    # identify unexecutable orders if a specific order is excuted because of maximum load
-    coupled_orders = []
-    for idx, quantity in enumerate(quantities):
-        quantities_add = quantities + quantity
-        # find indices of quantitites + considered order larger than max quantity
-        idx_coupled_orders = np.nonzero(quantities_add > max_quantity)
-        # delete self coupling
-        idx_coupled_orders = idx_coupled_orders[0][idx_coupled_orders[0] != idx]
-        coupled_orders.append([uuids[idx] for idx in idx_coupled_orders])
+    coupled_orders = _coupled_orders(uuids, coupled_indptr, coupled_indices)
 
     msgs = []
     for idx in range(len(quantities)):
@@ -172,6 +269,9 @@ def heat_producer_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'bHeatingMode': None, 'negative_market_limit': None, 'positive_market_limit': None, 'product_lead_time': None,
+    'product_type': None, 'shorttime_product': None})
 def inherent_storage_pricing(parameters):
     """
     pricing assessment for inherent storages
@@ -195,18 +295,16 @@ def inherent_storage_pricing(parameters):
 
     # heat demand
     if parameters['model_inputs']['bHeatingMode']:
-        diff_quantity_price = np.interp(
+        diff_quantity_price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [parameters['model_inputs']['positive_market_limit'], 0])
         minimum_quantity_price = parameters['model_inputs']['positive_market_limit']
         market = market_heat
         order_type = 'buy'
     # cool demand
     else:
-        diff_quantity_price = np.interp(
+        diff_quantity_price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [0, parameters['model_inputs']['negative_market_limit']])
         minimum_quantity_price = parameters['model_inputs']['negative_market_limit']
         market = market_cool
@@ -239,6 +337,9 @@ def inherent_storage_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'bHeatingMode': None, 'negative_market_limit': None, 'positive_market_limit': None, 'product_lead_time': None,
+    'product_type': None})
 def inherent_storage_pricing_one_product(parameters):
     """
     pricing assessment for inherent storages
@@ -262,18 +363,16 @@ def inherent_storage_pricing_one_product(parameters):
 
     # heat demand
     if parameters['model_inputs']['bHeatingMode']:
-        diff_quantity_price = np.interp(
+        diff_quantity_price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [parameters['model_inputs']['positive_market_limit'], 0])
         minimum_quantity_price = parameters['model_inputs']['positive_market_limit']
         market = market_heat
         order_type = 'buy'
     # cool demand
     else:
-        diff_quantity_price = np.interp(
+        diff_quantity_price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [0, parameters['model_inputs']['negative_market_limit']])
         minimum_quantity_price = parameters['model_inputs']['negative_market_limit']
         market = market_cool
@@ -302,6 +401,8 @@ def inherent_storage_pricing_one_product(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'negative_market_limit': None, 'positive_market_limit': None, 'product_lead_time': None, 'product_type': None})
 def demand_pricing(parameters):
     """
     pricing assessment for demands without inherent storage capacity
@@ -342,6 +443,8 @@ def demand_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'negative_market_limit': None, 'positive_market_limit': None, 'product_lead_time': None, 'product_type': None})
 def thermal_network_pricing(parameters):
     """
     pricing assessment for thermal network
@@ -355,9 +458,8 @@ def thermal_network_pricing(parameters):
     quantities = parameters['model_inputs']['quantities']['thermal_energy']
 
     # price for complete storage loading -> will be cleared after minimum quantity
-    price = np.interp(
+    price = _soc_curve(parameters)(
         parameters['model_inputs']['quantities']['soc'],
-        parameters['model_parameters']['soc_range'],
         [parameters['model_inputs']['positive_market_limit'], parameters['model_inputs']['negative_market_limit']])
 
     if quantities > 0:
@@ -385,6 +487,7 @@ def thermal_network_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={})
 def no_pricing(parameters):
     """
     no pricing assessment
@@ -399,6 +502,9 @@ def no_pricing(parameters):
     return []
 
 
+@register_model('pricing', inputs={
+    'energy_costs': None, 'negative_market_limit': None, 'positive_market_limit': None, 'price_neg': None,
+    'price_pos': None, 'product_lead_time': None, 'product_type': None, 'shorttime_product': None})
 def storage_pricing(parameters):
     """
     pricing assessment for active storages
@@ -417,9 +523,8 @@ def storage_pricing(parameters):
             market_limit = parameters['model_inputs']['positive_market_limit']*parameters[
                 'model_parameters']['market_limit_ratio']
             # active storage does not trade under 0 (no usage of negative market limit)
-            price = np.interp(
+            price = _soc_curve(parameters)(
                 parameters['model_inputs']['quantities']['soc'],
-                parameters['model_parameters']['soc_range'],
                 [market_limit, 0])
             order_type = 'buy'
         # cold storage
@@ -427,9 +532,8 @@ def storage_pricing(parameters):
             market_limit = parameters['model_inputs']['negative_market_limit']*parameters[
                 'model_parameters']['market_limit_ratio']
             # active storage does not trade under 0 (no usage of negative market limit)
-            price = np.interp(
+            price = _soc_curve(parameters)(
                 parameters['model_inputs']['quantities']['soc'],
-                parameters['model_parameters']['soc_range'],
                 [0, market_limit])
             order_type = 'sell'
         quantity = np.sum(quantities['thermal_energy'])
@@ -479,6 +583,9 @@ def storage_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'energy_costs': None, 'negative_market_limit': None, 'positive_market_limit': None, 'product_lead_time': None,
+    'product_type': None})
 def storage_pricing_one_product(parameters):
     """
     pricing assessment for active storages
@@ -497,9 +604,8 @@ def storage_pricing_one_product(parameters):
         market_limit = parameters['model_inputs']['positive_market_limit']*parameters[
             'model_parameters']['market_limit_ratio']
         # active storage does not trade under 0 (no usage of negative market limit)
-        price = np.interp(
+        price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [market_limit, 0])
         order_type = 'buy'
     # cold storage
@@ -507,9 +613,8 @@ def storage_pricing_one_product(parameters):
         market_limit = parameters['model_inputs']['negative_market_limit']*parameters[
             'model_parameters']['market_limit_ratio']
         # active storage does not trade under 0 (no usage of negative market limit)
-        price = np.interp(
+        price = _soc_curve(parameters)(
             parameters['model_inputs']['quantities']['soc'],
-            parameters['model_parameters']['soc_range'],
             [0, market_limit])
         order_type = 'sell'
     quantity = np.sum(quantities['thermal_energy'])
@@ -570,6 +675,8 @@ def storage_pricing_one_product(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'positive_market_limit': None, 'product_lead_time': None, 'product_type': None})
 def heat_exchanger_pricing(parameters):
     """
     pricing assessment for heat exchangers
@@ -629,6 +736,9 @@ def heat_exchanger_pricing(parameters):
     return msgs
 
 
+@register_model('pricing', inputs={
+    'electricity_price': None, 'is_running': None, 'negative_market_limit': None, 'positive_market_limit': None,
+    'product_lead_time': None, 'product_type': None})
 def heat_pump_pricing(parameters):
     """
     pricing assessment for heat pumps
@@ -648,31 +758,15 @@ def heat_pump_pricing(parameters):
     cost_ramp_up = (not parameters['model_inputs']['is_running'])*parameters['model_parameters']['cost_ramp_up']
     total_electric_costs = cost_electricity+cost_operating_hours+cost_ramp_up
 
-    # consider minimum ratio of acceptance regading the minimal
-    max_quantity = max(quantities)
-    min_acceptance_ratios = []
-    for quantity in quantities:
-        if quantity*parameters['model_parameters']['min_acceptance_ratio'] >= (
-                max_quantity*parameters['model_parameters']['minimal_load']):
-            min_acceptance_ratios.append(parameters['model_parameters']['min_acceptance_ratio'])
-        else:
-            if quantity != 0:
-                min_acceptance_ratios.append(min(
-                    1,
-                    (parameters['model_parameters']['minimal_load']*max_quantity)/quantity))
-            else:
-                min_acceptance_ratios.append(0)
+    # minimum acceptance ratios and coupled orders of bid ladder regarding minimal and maximum load
+    min_acceptance_ratios, coupled_indptr, coupled_indices = _bid_ladder(
+        quantities,
+        min_acceptance_ratio=parameters['model_parameters']['min_acceptance_ratio'],
+        minimal_load=parameters['model_parameters']['minimal_load'])
+    min_acceptance_ratios = min_acceptance_ratios.tolist()
     uuids = [uuid.uuid4() for _ in range(len(quantities))]
 
-    # identify unexecutable orders if a specific order is excuted because of maximum load
-    coupled_orders = []
-    for idx, quantity in enumerate(quantities):
-        quantities_add = quantities + quantity
-        # find indices of quantitites + considered order larger than max quantity
-        idx_coupled_orders = np.nonzero(quantities_add > max_quantity)
-        # delete self coupling
-        idx_coupled_orders = idx_coupled_orders[0][idx_coupled_orders[0] != idx]
-        coupled_orders.append([uuids[idx] for idx in idx_coupled_orders])
+    coupled_orders = _coupled_orders(uuids, coupled_indptr, coupled_indices)
 
     msgs = []
     # use case 3a - single heat producer
@@ -747,3 +841,22 @@ def heat_pump_pricing(parameters):
             ))
 
     return msgs
+
+
+@register_setup('pricing', 'inherent_storage_pricing')
+@register_setup('pricing', 'inherent_storage_pricing_one_product')
+@register_setup('pricing', 'thermal_network_pricing')
+@register_setup('pricing', 'storage_pricing')
+@register_setup('pricing', 'storage_pricing_one_product')
+def soc_setup(model_parameters):
+    """
+    compile soc range of soc-based pricing once
+
+    Args:
+        model_parameters (dict): compiled model parameters
+
+    Returns:
+        model_parameters (dict): additional static model parameters
+    """
+    soc_range = model_parameters['soc_range']
+    return {'soc_curve': EfficiencyCurve(soc_range, np.zeros(len(soc_range)))}
@@ -8,10 +8,35 @@ __email__ = "f.borst@ptw.tu-darmstadt.de"
 __project__ = "Transactive control of linked heating and cooling system at production sites"
 __subject__ = "models for capacity assessment"
 
+from functools import lru_cache
 import numpy as np
-from scipy.interpolate import griddata
+from multi_agent_system.models.efficiency import EfficiencyCurve, EfficiencyMap
+from multi_agent_system.models.registry import register_model, register_setup
 
+# resolution of measured temperatures within keys of bid cache in K, bids of temperatures within resolution are reused
+TEMPERATURE_RESOLUTION = 0.1
 
+
+def _efficiency_curve(parameters, name):
+    """
+    return efficiency curve of model parameters - compiled once by setup, built on demand otherwise
+
+    Args:
+        parameters (dict): dictionary holding model parameters and model inputs
+        name (str): name of efficiency curve [[sampling points], [values]] within model parameters
+
+    Returns:
+        curve (EfficiencyCurve): efficiency curve
+    """
+    curve = parameters['model_parameters'].get(name + '_curve')
+    if curve is None:
+        curve = EfficiencyCurve(*parameters['model_parameters'][name])
+    return curve
+
+
+@register_model('quantity_assessment', inputs={
+    'ambient_temperature': TEMPERATURE_RESOLUTION, 'cleared_energy_neg': None, 'product_allocation': None,
+    'product_type': None, 'trading_time': None})
 def cooling_utility(parameters):
     """
     utility generating cooling energy
@@ -23,10 +48,8 @@ def cooling_utility(parameters):
         result (dict): dictionary holding thermal and electric energies for bidding process
     """
     # calcalute residual thermal power depending on ambient temperature
-    thermal_efficiency = np.interp(
-        parameters['model_inputs']['ambient_temperature'],
-        parameters['model_parameters']['thermal_efficiencies'][0],
-        parameters['model_parameters']['thermal_efficiencies'][1])
+    thermal_efficiency = _efficiency_curve(parameters, 'thermal_efficiencies')(
+        parameters['model_inputs']['ambient_temperature'])
     nominal_thermal_power = thermal_efficiency*parameters['model_parameters']['nominal_electric_power']
 
     # maximum residual power
@@ -51,10 +74,7 @@ def cooling_utility(parameters):
 
     # calculate electric power
     operating_points = thermal_powers/nominal_thermal_power
-    electric_efficiencies = np.interp(
-        operating_points,
-        parameters['model_parameters']['electric_efficiencies'][0],
-        parameters['model_parameters']['electric_efficiencies'][1])
+    electric_efficiencies = _efficiency_curve(parameters, 'electric_efficiencies')(operating_points)
     electric_powers = operating_points*electric_efficiencies*parameters['model_parameters']['nominal_electric_power']
 
     # calculate energy based on powers and product
@@ -69,6 +89,9 @@ def cooling_utility(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'cleared_energy_pos': None, 'fReturnTemperature': TEMPERATURE_RESOLUTION, 'product_allocation': None,
+    'product_type': None, 'trading_time': None})
 def heating_utility(parameters):
     """
     utility generating heating energy
@@ -80,10 +103,8 @@ def heating_utility(parameters):
         result (dict): dictionary holding thermal, electric and fuel energies for bidding process
     """
     # calculate residual thermal power depending on return temperature
-    thermal_efficiency = np.interp(
-        parameters['model_inputs']['fReturnTemperature'],
-        parameters['model_parameters']['thermal_efficiencies'][0],
-        parameters['model_parameters']['thermal_efficiencies'][1])
+    thermal_efficiency = _efficiency_curve(parameters, 'thermal_efficiencies')(
+        parameters['model_inputs']['fReturnTemperature'])
     nominal_thermal_power = thermal_efficiency*parameters['model_parameters']['nominal_fuel_power']
 
     # maximum residual power - trading time in seconds and energy in kWh
@@ -111,10 +132,7 @@ def heating_utility(parameters):
 
     # calculate electric power
     operating_points = thermal_powers/nominal_thermal_power
-    electric_efficiencies = np.interp(
-        operating_points,
-        parameters['model_parameters']['electric_efficiencies'][0],
-        parameters['model_parameters']['electric_efficiencies'][1])
+    electric_efficiencies = _efficiency_curve(parameters, 'electric_efficiencies')(operating_points)
     electric_powers = -operating_points*electric_efficiencies*parameters['model_parameters']['nominal_fuel_power']
 
     # calculate energies based on power and product
@@ -131,6 +149,9 @@ def heating_utility(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'cleared_energy_neg': None, 'cleared_energy_pos': None, 'demand': None, 'product_allocation': None,
+    'product_type': None, 'trading_time': None})
 def demand_prescribed(parameters):
     """
     external prescribed heating or cooling demand
@@ -163,6 +184,10 @@ def demand_prescribed(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'ambient_temperature': TEMPERATURE_RESOLUTION, 'bHeatingMode': None, 'cleared_energy_neg': None,
+    'cleared_energy_pos': None, 'fRoomTemperature': TEMPERATURE_RESOLUTION, 'product_allocation': None,
+    'product_type': None, 'shorttime_product': None, 'trading_time': None})
 def demand_building(parameters):
     """
     building demand which is calculated by ambient temperature
@@ -231,6 +256,10 @@ def demand_building(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'ambient_temperature': TEMPERATURE_RESOLUTION, 'bHeatingMode': None, 'cleared_energy_neg': None,
+    'cleared_energy_pos': None, 'fRoomTemperature': TEMPERATURE_RESOLUTION, 'product_allocation': None,
+    'product_type': None, 'trading_time': None})
 def demand_building_one_product(parameters):
     """
     building demand which is calculated by ambient temperature
@@ -296,6 +325,9 @@ def demand_building_one_product(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'buy_product_allocation': None, 'fLowerTemperature': TEMPERATURE_RESOLUTION,
+    'fUpperTemperature': TEMPERATURE_RESOLUTION, 'product_type': None, 'sell_product_allocation': None})
 def thermal_network(parameters):
     """
     thermal_network acting as system operator
@@ -337,6 +369,10 @@ def thermal_network(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'buy_product_allocation': None, 'cleared_energy_neg': None, 'cleared_energy_pos': None,
+    'fLowerTemperature': TEMPERATURE_RESOLUTION, 'fUpperTemperature': TEMPERATURE_RESOLUTION,
+    'sell_product_allocation': None, 'shorttime_product': None})
 def storage(parameters):
     """
     active heat or cold storage
@@ -389,6 +425,10 @@ def storage(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'buy_product_allocation': None, 'cleared_energy_neg': None, 'cleared_energy_pos': None,
+    'fLowerTemperature': TEMPERATURE_RESOLUTION, 'fUpperTemperature': TEMPERATURE_RESOLUTION,
+    'sell_product_allocation': None})
 def storage_one_product(parameters):
     """
     active heat or cold storage
@@ -432,6 +472,40 @@ def storage_one_product(parameters):
     return result
 
 
+@lru_cache(maxsize=256)
+def _heat_exchanger_effectiveness(capacity_flow_hot, capacity_flow_cold, heat_transfer_coefficient,
+                                  heat_exchanger_area):
+    """
+    effectiveness of counter flow heat exchanger by number of transfer units (ntu), cached by flow state
+
+    Args:
+        capacity_flow_hot (float): capacity flow of hot side
+        capacity_flow_cold (float): capacity flow of cold side
+        heat_transfer_coefficient (float): heat transfer coefficient
+        heat_exchanger_area (float): heat exchanger area
+
+    Returns:
+        c_min_flow (float): minimum capacity flow
+        eps (float): effectiveness
+    """
+    c_min_flow = min(capacity_flow_hot, capacity_flow_cold)
+    c_max_flow = max(capacity_flow_hot, capacity_flow_cold)
+    if c_min_flow == 0:
+        return c_min_flow, 0
+
+    ntu = heat_transfer_coefficient*heat_exchanger_area/c_min_flow
+    if c_min_flow/c_max_flow == 1:
+        eps = ntu/(1+ntu)
+    else:
+        eps = (1-np.exp(-(1-c_min_flow/c_max_flow)*ntu))/(1-c_min_flow/c_max_flow*np.exp(
+            -(1-c_min_flow/c_max_flow)*ntu))
+    return c_min_flow, eps
+
+
+@register_model('quantity_assessment', inputs={
+    'cleared_energy_neg': None, 'cleared_energy_pos': None, 'fFeedTemperature_hot': TEMPERATURE_RESOLUTION,
+    'fReturnTemperature_cold': TEMPERATURE_RESOLUTION, 'product_allocation': None, 'product_type': None,
+    'trading_time': None})
 def heat_exchanger(parameters):
     """
     heat exchanger
@@ -442,29 +516,21 @@ def heat_exchanger(parameters):
     Returns:
         result (dict): dictionary holding thermal energies for bidding process
     """
-    c_min_flow = min(
-        parameters['model_parameters']['max_capacity_flow_hot'],
-        parameters['model_parameters']['max_capacity_flow_cold'])
-    c_max_flow = max(
-        parameters['model_parameters']['max_capacity_flow_hot'],
-        parameters['model_parameters']['max_capacity_flow_cold'])
+    # effectiveness of heat exchanger - compiled once by setup, evaluated by capacity flows otherwise
+    c_min_flow = parameters['model_parameters'].get('min_capacity_flow')
+    eps = parameters['model_parameters'].get('effectiveness')
+    if c_min_flow is None or eps is None:
+        c_min_flow, eps = _heat_exchanger_effectiveness(
+            parameters['model_parameters']['max_capacity_flow_hot'],
+            parameters['model_parameters']['max_capacity_flow_cold'],
+            parameters['model_parameters']['heat_transfer_coefficient'],
+            parameters['model_parameters']['heat_exchanger_area'])
 
     # limit power to zero because bids are always greater than zero
     thermal_power_max = c_min_flow*(
         parameters['model_inputs']['fFeedTemperature_hot'] -
         parameters['model_inputs']['fReturnTemperature_cold'])
 
-    ntu = (
-        parameters['model_parameters']['heat_transfer_coefficient'] *
-        parameters['model_parameters']['heat_exchanger_area']/c_min_flow)
-    if c_min_flow == 0:
-        eps = 0
-    elif c_min_flow/c_max_flow == 1:
-        eps = ntu/(1+ntu)
-    else:
-        eps = (1-np.exp(-(1-c_min_flow/c_max_flow)*ntu))/(1-c_min_flow/c_max_flow*np.exp(
-            -(1-c_min_flow/c_max_flow)*ntu))
-
     # use case heating
     if parameters['model_parameters']['heating_use_case']:
         cleared_power = max(
@@ -485,6 +551,10 @@ def heat_exchanger(parameters):
     return result
 
 
+@register_model('quantity_assessment', inputs={
+    'cleared_energy_neg': None, 'cleared_energy_pos': None, 'fReturnTemperature_cold': TEMPERATURE_RESOLUTION,
+    'fReturnTemperature_hot': TEMPERATURE_RESOLUTION, 'product_allocation': None, 'product_type': None,
+    'trading_time': None})
 def heat_pump(parameters):
     """
     heat pump
@@ -495,58 +565,19 @@ def heat_pump(parameters):
     Returns:
         result (dict): dictionary holding thermal and electric energies for bidding process
     """
-    # thermal efficiency
-    thermal_efficiencies = np.array(parameters['model_parameters']['thermal_efficiencies'])
-    return_temperatures_hot_thermal_grid = thermal_efficiencies[0, 1:]
-    feed_temperature_cold_thermal_grid = thermal_efficiencies[1:, 0]
-    data_thermal_grid = thermal_efficiencies[1:, 1:]
-    return_temperature_hot_thermal_mesh, feed_temperature_cold_thermal_mesh = np.meshgrid(
-        return_temperatures_hot_thermal_grid, feed_temperature_cold_thermal_grid)
-    points_thermal = np.column_stack([return_temperature_hot_thermal_mesh.ravel(),
-                                      feed_temperature_cold_thermal_mesh.ravel()])
-    values_thermal = data_thermal_grid.ravel()
-    thermal_efficiency = griddata(
-        points_thermal, values_thermal,
-        (
-            parameters['model_inputs']['fReturnTemperature_hot'],
-            parameters['model_inputs']['fReturnTemperature_cold']
-        ),
-        method='linear')
-    if np.isnan(thermal_efficiency):
-        thermal_efficiency = griddata(
-            points_thermal, values_thermal,
-            (
-                parameters['model_inputs']['fReturnTemperature_hot'],
-                parameters['model_inputs']['fReturnTemperature_cold']
-            ),
-            method='nearest')
-
-    # electric efficiency
-    electric_efficiencies = np.array(parameters['model_parameters']['electric_efficiencies'])
-    return_temperatures_hot_electric_grid = electric_efficiencies[0, 1:]
-    feed_temperature_cold_electric_grid = electric_efficiencies[1:, 0]
-    data_electric_grid = electric_efficiencies[1:, 1:]
-    return_temperature_hot_electric_mesh, feed_temperature_cold_electric_mesh = np.meshgrid(
-        return_temperatures_hot_electric_grid,
-        feed_temperature_cold_electric_grid)
-    points_electric = np.column_stack([return_temperature_hot_electric_mesh.ravel(),
-                                       feed_temperature_cold_electric_mesh.ravel()])
-    values_electric = data_electric_grid.ravel()
-    electric_efficiency = griddata(
-        points_electric, values_electric,
-        (
-            parameters['model_inputs']['fReturnTemperature_hot'],
-            parameters['model_inputs']['fReturnTemperature_cold']
-        ),
-        method='linear')
-    if np.isnan(electric_efficiency):
-        electric_efficiency = griddata(
-            points_electric, values_electric,
-            (
-                parameters['model_inputs']['fReturnTemperature_hot'],
-                parameters['model_inputs']['fReturnTemperature_cold']
-            ),
-            method='nearest')
+    # thermal and electric efficiency from efficiency maps - compiled once by setup, built on demand otherwise
+    thermal_efficiency_map = parameters['model_parameters'].get('thermal_efficiency_map')
+    if thermal_efficiency_map is None:
+        thermal_efficiency_map = EfficiencyMap(parameters['model_parameters']['thermal_efficiencies'])
+    electric_efficiency_map = parameters['model_parameters'].get('electric_efficiency_map')
+    if electric_efficiency_map is None:
+        electric_efficiency_map = EfficiencyMap(parameters['model_parameters']['electric_efficiencies'])
+    thermal_efficiency = thermal_efficiency_map(
+        parameters['model_inputs']['fReturnTemperature_hot'],
+        parameters['model_inputs']['fReturnTemperature_cold'])
+    electric_efficiency = electric_efficiency_map(
+        parameters['model_inputs']['fReturnTemperature_hot'],
+        parameters['model_inputs']['fReturnTemperature_cold'])
 
     nominal_cooling_power = thermal_efficiency*parameters['model_parameters']['nominal_cooling_power']
     nominal_electric_power = electric_efficiency*parameters['model_parameters']['nominal_electric_power']
@@ -612,3 +643,57 @@ def heat_pump(parameters):
         'electric_energy': np.array(electric_energy, dtype=np.float64)
         }
     return result
+
+
+@register_setup('quantity_assessment', 'heat_pump')
+def heat_pump_setup(model_parameters):
+    """
+    compile efficiency maps of heat pump once
+
+    Args:
+        model_parameters (dict): compiled model parameters
+
+    Returns:
+        model_parameters (dict): additional static model parameters
+    """
+    return {
+        'thermal_efficiency_map': EfficiencyMap(model_parameters['thermal_efficiencies']),
+        'electric_efficiency_map': EfficiencyMap(model_parameters['electric_efficiencies']),
+    }
+
+
+@register_setup('quantity_assessment', 'cooling_utility')
+@register_setup('quantity_assessment', 'heating_utility')
+def utility_setup(model_parameters):
+    """
+    compile efficiency curves of utilities once
+
+    Args:
+        model_parameters (dict): compiled model parameters
+
+    Returns:
+        model_parameters (dict): additional static model parameters
+    """
+    return {
+        'thermal_efficiencies_curve': EfficiencyCurve(*model_parameters['thermal_efficiencies']),
+        'electric_efficiencies_curve': EfficiencyCurve(*model_parameters['electric_efficiencies']),
+    }
+
+
+@register_setup('quantity_assessment', 'heat_exchanger')
+def heat_exchanger_setup(model_parameters):
+    """
+    compile effectiveness of heat exchanger once
+
+    Args:
+        model_parameters (dict): compiled model parameters
+
+    Returns:
+        model_parameters (dict): additional static model parameters
+    """
+    c_min_flow, eps = _heat_exchanger_effectiveness(
+        model_parameters['max_capacity_flow_hot'],
+        model_parameters['max_capacity_flow_cold'],
+        model_parameters['heat_transfer_coefficient'],
+        model_parameters['heat_exchanger_area'])
+    return {'min_capacity_flow': c_min_flow, 'effectiveness': eps}
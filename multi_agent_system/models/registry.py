@@ -0,0 +1,125 @@
+"""
+registry of quantity assessment, pricing and market models
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "registry of models"
+
+import importlib
+
+# registered models by kind and name
+MODELS = {
+    'quantity_assessment': {},
+    'fleet_quantity_assessment': {},
+    'pricing': {},
+    'market': {},
+}
+
+# resolutions of model inputs read by models by kind and model name
+INPUTS = {kind: {} for kind in MODELS}
+
+# setup functions compiling static model parameters by kind and model name
+SETUPS = {kind: {} for kind in MODELS}
+
+
+def register_model(kind, name=None, inputs=None):
+    """
+    decorator registering a model function by name, e.g. @register_model('pricing')
+
+    Args:
+        kind (str): model kind, e.g. quantity_assessment, pricing or market
+        name (str): name of model within agent config, function name if None
+        inputs (dict): resolution of every model input read by model by input name (None for default resolution of
+            bid cache), quantities of pricing models are not declared since they are assessed from the inputs of the
+            capacity model. bids of undeclared models are keyed on all model inputs
+
+    Returns:
+        decorator (function): decorator returning the unchanged model function
+    """
+    def decorator(model):
+        MODELS.setdefault(kind, {})[name or model.__name__] = model
+        if inputs is not None:
+            INPUTS.setdefault(kind, {})[name or model.__name__] = dict(inputs)
+        return model
+    return decorator
+
+
+def register_setup(kind, name):
+    """
+    decorator registering a setup function of a model, e.g. @register_setup('quantity_assessment', 'heat_pump')
+
+    the setup function is called once with the compiled model parameters of an agent (shared by agents with equal
+    model parameters) and returns a dict of additional static model parameters, e.g. interpolators
+
+    Args:
+        kind (str): model kind, e.g. quantity_assessment, pricing or market
+        name (str): name of model within agent config
+
+    Returns:
+        decorator (function): decorator returning the unchanged setup function
+    """
+    def decorator(setup):
+        SETUPS.setdefault(kind, {})[name] = setup
+        return setup
+    return decorator
+
+
+def get_setup(kind, name):
+    """
+    resolve registered setup function of a model
+
+    Args:
+        kind (str): model kind, e.g. quantity_assessment, pricing or market
+        name (str): name of model within agent config
+
+    Returns:
+        setup (function): setup function, None if model has no setup function
+    """
+    return SETUPS.get(kind, {}).get(name)
+
+
+def get_inputs(kind, name):
+    """
+    resolve declared model inputs of a model
+
+    Args:
+        kind (str): model kind, e.g. quantity_assessment, pricing or market
+        name (str): name of model within agent config
+
+    Returns:
+        inputs (dict): resolution of model inputs by input name, None if model inputs are not declared
+    """
+    return INPUTS.get(kind, {}).get(name)
+
+
+def get_model(kind, name):
+    """
+    resolve registered model function by name
+
+    Args:
+        kind (str): model kind, e.g. quantity_assessment, pricing or market
+        name (str): name of model within agent config
+
+    Returns:
+        model (function): model function
+    """
+    try:
+        return MODELS[kind][name]
+    except KeyError:
+        raise ValueError(
+            'Unknown ' + kind + ' model: ' + str(name) + '. Registered models: ' +
+            ', '.join(sorted(MODELS.get(kind, {})))) from None
+
+
+def load_model_plugins(module_names):
+    """
+    import modules registering additional models
+
+    Args:
+        module_names (list): list of importable module names, e.g. 'my_package.my_pricing_models'
+    """
+    for module_name in module_names:
+        importlib.import_module(module_name)
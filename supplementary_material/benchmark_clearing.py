@@ -0,0 +1,89 @@
+"""
+benchmark of double auction clearing
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "benchmark of double auction clearing"
+
+import timeit
+import uuid
+import numpy as np
+from multi_agent_system.models.clearing_kernel import IS_NUMBA_AVAILABLE, double_auction_clearing
+from multi_agent_system.models.market_models import double_auction
+
+
+def random_order_book(rng, num_traders, num_steps):
+    """
+    random order book of coupled bid ladders, traders alternately buy and sell
+
+    Args:
+        rng (np.random.Generator): random number generator
+        num_traders (int): number of traders
+        num_steps (int): number of orders per bid ladder
+
+    Returns:
+        order_book (list): list of order messages
+    """
+    order_book = []
+    for trader in range(num_traders):
+        order_type = 'buy' if trader % 2 == 0 else 'sell'
+        ids = [uuid.uuid4() for _ in range(num_steps)]
+        prices = np.sort(rng.uniform(0, 0.3, num_steps))
+        for step, order_id in enumerate(ids):
+            order_book.append({
+                'type': 'order_msg', 'sender_id': 'trader_' + str(trader), 'reciever_id': 'market',
+                'order_type': order_type, 'product_type': 900, 'product_lead_time': 0,
+                'quantity': float(rng.uniform(1, 20)), 'price': float(prices[step]),
+                'min_acceptance_ratio': float(rng.choice([0., 0.5, 1.])),
+                'coupled_order': ids[step + 1:], 'id': order_id})
+    return order_book
+
+
+def clearing_parameters(order_book, **model_inputs):
+    """
+    parameters of market model
+
+    Args:
+        order_book (list): list of order messages
+        model_inputs (dict): additional model inputs, e.g. is_compiled_clearing
+
+    Returns:
+        parameters (dict): parameters of market model
+    """
+    return {'model_parameters': {},
+            'model_inputs': dict({'market_id': 'market', 'order_book': order_book}, **model_inputs)}
+
+
+if __name__ == '__main__':
+    # clearing of random order books with coupled bid ladders in pure python and with compiled kernel, repeated
+    # matchings of compiled kernel from scratch and with warm start
+    rng = np.random.default_rng(0)
+    number = 20
+    for num_traders, num_steps in ((10, 5), (40, 10), (100, 20)):
+        order_book = random_order_book(rng, num_traders, num_steps)
+        parameters = clearing_parameters(order_book)
+        compiled_parameters = clearing_parameters(order_book, is_compiled_clearing=True)
+        warm_parameters = clearing_parameters(order_book, is_compiled_clearing=True, is_warm_start=True)
+        if double_auction(parameters) != double_auction(compiled_parameters) or \
+                double_auction(parameters) != double_auction(warm_parameters):
+            print('[ERROR] Compiled clearing differs from pure python clearing.')
+
+        time_python = timeit.timeit(lambda: double_auction(parameters), number=number) / number
+        time_compiled = timeit.timeit(lambda: double_auction(compiled_parameters), number=number) / number
+        print('[INFO] {} orders - pure python: {:.2f} ms, compiled kernel{}: {:.2f} ms, speedup: {:.1f}'.format(
+            len(order_book), time_python * 1e3, '' if IS_NUMBA_AVAILABLE else ' (numba unavailable)',
+            time_compiled * 1e3, time_python / time_compiled))
+
+        # price comparisons of repeated matchings from scratch and with warm start
+        time_warm = timeit.timeit(lambda: double_auction(warm_parameters), number=number) / number
+        cold_statistics, warm_statistics = {}, {}
+        double_auction_clearing(order_book, statistics=cold_statistics)
+        double_auction_clearing(order_book, is_warm_start=True, statistics=warm_statistics)
+        print('[INFO] {} orders - {} matchings, comparisons from scratch: {}, with warm start: {} ({:.0f} % less), '
+              'warm start: {:.2f} ms'.format(
+                  len(order_book), cold_statistics['matchings'], cold_statistics['comparisons'],
+                  warm_statistics['comparisons'],
+                  100 * (1 - warm_statistics['comparisons'] / cold_statistics['comparisons']), time_warm * 1e3))
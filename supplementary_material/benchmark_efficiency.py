@@ -0,0 +1,46 @@
+"""
+benchmark of compiled efficiency curves
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "benchmark of compiled efficiency curves"
+
+import timeit
+import numpy as np
+from multi_agent_system.models.efficiency import EfficiencyCurve
+
+
+def benchmark(efficiencies, value, values, number=100000):
+    """
+    per-call evaluation of json curves by np.interp compared to compiled efficiency curve
+
+    Args:
+        efficiencies (list): efficiency curve [[sampling points], [values]]
+        value (float): scalar value
+        values (np.ndarray): batch of values
+        number (int): number of evaluations
+
+    Returns:
+        times (dict): mean time per evaluation in s by method and input
+    """
+    curve = EfficiencyCurve(*efficiencies)
+    return {
+        'scalar_interp': timeit.timeit(
+            lambda: np.interp(value, efficiencies[0], efficiencies[1]), number=number) / number,
+        'scalar_curve': timeit.timeit(lambda: curve(value), number=number) / number,
+        'batch_interp': timeit.timeit(
+            lambda: np.interp(values, efficiencies[0], efficiencies[1]), number=number) / number,
+        'batch_curve': timeit.timeit(lambda: curve(values), number=number) / number,
+    }
+
+
+if __name__ == '__main__':
+    thermal_efficiencies = [[-10, 0, 10, 20, 30, 40], [0.95, 0.93, 0.9, 0.86, 0.81, 0.75]]
+    times = benchmark(thermal_efficiencies, value=17.3, values=np.linspace(-10, 40, 10))
+    for name in ('scalar', 'batch'):
+        print('[INFO] {} np.interp on lists: {:.2f} us, efficiency curve: {:.2f} us, speedup: {:.1f}'.format(
+            name.capitalize(), times[name + '_interp'] * 1e6, times[name + '_curve'] * 1e6,
+            times[name + '_interp'] / times[name + '_curve']))
@@ -0,0 +1,128 @@
+"""
+benchmark of concurrent evaluation of traders within a trading round
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "benchmark of concurrent evaluation of traders"
+
+import copy
+import os
+import timeit
+from multi_agent_system.base.executor import trade_round, trading_executor
+from multi_agent_system.base.schedule import ProductSchedule
+from multi_agent_system.base.templates import clear_templates
+from multi_agent_system.base.util import read_config
+from multi_agent_system.components.consumer import Consumer
+from multi_agent_system.components.converter import Converter
+from multi_agent_system.components.heat_exchanger import HeatExchanger
+from multi_agent_system.components.heat_pump import HeatPump
+from multi_agent_system.components.storage import Storage
+from multi_agent_system.components.system_operator import SystemOperator
+
+TRADER_CLASSES = {
+    'converter': Converter,
+    'consumer': Consumer,
+    'system_operator': SystemOperator,
+    'storage': Storage,
+    'heat_exchanger': HeatExchanger,
+    'heat_pump': HeatPump,
+}
+
+
+def observation(trader):
+    """
+    constant observation of trader within the temperature limits of its networks
+
+    Args:
+        trader (Trader): observing trader
+
+    Returns:
+        observation (dict): observed values by input name
+    """
+    observation = {'time': 0, 'scenario_time': 0}
+    for input_name in trader.agent_config['base_config']['env_inputs']:
+        if input_name == 'bHeatingMode':
+            observation[input_name] = 1
+        elif input_name == 'fHeatEnergy':
+            observation[input_name] = 0.
+        elif input_name == 'fRoomTemperature':
+            observation[input_name] = 21.
+        elif 'Temperature' in input_name:
+            observation[input_name] = 50.
+        else:
+            observation[input_name] = 20.
+    return observation
+
+
+def setup_traders(config_path, num_copies=1):
+    """
+    traders of experiment config, copied to scale the number of traders
+
+    Args:
+        config_path (str): path of experiment config
+        num_copies (int): number of copies of every trader
+
+    Returns:
+        traders (list): list of participating traders after first observation
+        product (dict): first tradable product
+    """
+    config = read_config(config_path)
+    clear_templates()
+    schedule = ProductSchedule(dict(zip(*config['environment_specific']['products'])))
+    traders = []
+    for copy_idx in range(num_copies):
+        for agent in config['agents']:
+            if agent['type'] == 'market':
+                continue
+            # copies are set up with the name of the config to read its demands, names are unique afterwards
+            trader = TRADER_CLASSES[agent['type']](
+                agent_name=agent['name'], agent_type=agent['type'], agent_config=copy.deepcopy(agent['config']),
+                experiment_config=config['environment_specific'], schedule=schedule)
+            trader.setup_agent()
+            trader.get_state(observation(trader), 0)
+            traders.append(trader)
+    # traders participating in first tradable product
+    entry = schedule.batches[0][0][0]
+    traders = [trader for trader in traders if trader.name in entry['participants']]
+    for idx, trader in enumerate(traders):
+        schedule.allocations[trader.name + '_' + str(idx)] = schedule.allocations[trader.name]
+        trader.name = trader.name + '_' + str(idx)
+    return traders, entry['product']
+
+
+def benchmark(traders, product, workers=4, number=20):
+    """
+    sequential trading round compared to thread and process pools
+
+    Args:
+        traders (list): list of traders
+        product (dict): traded product
+        workers (int): number of workers of pools
+        number (int): number of trading rounds
+
+    Returns:
+        times (dict): mean time per trading round in s by executor
+    """
+    times = {}
+    for kind, num_workers in (('sequential', 1), ('thread', workers), ('process', workers)):
+        executor = trading_executor(kind='thread' if kind == 'sequential' else kind, workers=num_workers)
+        trade_round(traders, product, executor=executor)
+        times[kind] = timeit.timeit(lambda: trade_round(traders, product, executor=executor), number=number) / number
+        if executor is not None:
+            executor.shutdown()
+    return times
+
+
+if __name__ == '__main__':
+    config_path = os.path.join('experiments', 'eta_heating_systems', 'config', '2024_01_10_1_day_s5.json')
+    for num_copies in (1, 10):
+        traders, product = setup_traders(config_path, num_copies=num_copies)
+        times = benchmark(traders, product)
+        print('[INFO] {} traders, sequential: {:.1f} ms, thread pool: {:.1f} ms (speedup: {:.2f}), process pool: '
+              '{:.1f} ms (speedup: {:.2f})'.format(
+                  len(traders), times['sequential'] * 1e3, times['thread'] * 1e3,
+                  times['sequential'] / times['thread'], times['process'] * 1e3,
+                  times['sequential'] / times['process']))
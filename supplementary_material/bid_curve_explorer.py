@@ -0,0 +1,229 @@
+"""
+offline exploration of bid curves of agents without simulation environment
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "offline exploration of bid curves"
+
+import argparse
+import copy
+import itertools
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from multi_agent_system.components.converter import Converter
+from multi_agent_system.components.consumer import Consumer
+from multi_agent_system.components.system_operator import SystemOperator
+from multi_agent_system.components.storage import Storage
+from multi_agent_system.components.heat_exchanger import HeatExchanger
+from multi_agent_system.components.heat_pump import HeatPump
+from multi_agent_system.components.trader import ALLOCATION_NAMES
+from multi_agent_system.base.util import read_config
+from multi_agent_system.base.templates import shared_model_context
+from multi_agent_system.models import fleet_models  # noqa: F401
+from multi_agent_system.models.registry import MODELS, get_setup, load_model_plugins
+
+# trader classes by agent type of experiment config
+TRADER_CLASSES = {
+    'converter': Converter,
+    'consumer': Consumer,
+    'system_operator': SystemOperator,
+    'storage': Storage,
+    'heat_exchanger': HeatExchanger,
+    'heat_pump': HeatPump,
+}
+
+# values of order messages which span the bid surface
+ORDER_COLUMNS = ('reciever_id', 'order_type', 'quantity', 'price', 'min_acceptance_ratio')
+
+
+def load_trader(config_path, agent_name, model_parameters=None, experiment_config=None):
+    """
+    instantiate and set up a single trader of an experiment config
+
+    Args:
+        config_path (str): path to experiment config
+        agent_name (str): name of agent in experiment config
+        model_parameters (dict): model parameters replacing values of agent config, e.g. {"minimal_load": 0.3}
+        experiment_config (dict): values replacing environment specific config, e.g. {"positive_market_limit": 1}
+
+    Returns:
+        trader (Trader): trader ready for quantity assessment and pricing
+    """
+    config = read_config(config_path)
+    environment_config = dict(config['environment_specific'], **(experiment_config or {}))
+    load_model_plugins(environment_config.get('model_plugins', []))
+
+    agents = {agent['name']: agent for agent in config['agents']}
+    if agent_name not in agents:
+        raise ValueError('Agent ' + str(agent_name) + ' does not exist in experiment config.')
+    agent = agents[agent_name]
+    if agent['type'] not in TRADER_CLASSES:
+        raise ValueError('Agent ' + str(agent_name) + ' of type ' + str(agent['type']) + ' does not place orders.')
+
+    agent_config = copy.deepcopy(agent['config'])
+    agent_config['model_config']['model_parameters'].update(copy.deepcopy(model_parameters or {}))
+    trader = TRADER_CLASSES[agent['type']](
+        agent_name=agent_name,
+        agent_type=agent['type'],
+        agent_config=agent_config,
+        experiment_config=environment_config)
+    trader.setup_agent()
+    return trader
+
+
+def explore(trader, grid, product, state=None, experiment_time=0, drop_empty=True):
+    """
+    evaluate capacity and pricing model of trader for every combination of grid values
+
+    grid values replace model inputs (e.g. observed temperatures, ambient temperature, cleared energies, prices or
+    market limits) or model parameters (e.g. bid_discretization, minimal_load or soc_range). model inputs which hold
+    one value per covered trading period (e.g. cleared energies) are set to the grid value for all trading periods.
+    quantities of all grid points are assessed in one vectorized call if a fleet model is registered for the capacity
+    model, point by point otherwise. pricing is evaluated point by point.
+
+    Args:
+        trader (Trader): trader set up by load_trader
+        grid (dict): list of values by name of model input or model parameter
+        product (dict): product with product type and lead time in seconds
+        state (dict): observed values of environment inputs not covered by grid, zero if not given
+        experiment_time (int): seconds since scenario begin, e.g. for ambient temperatures and prices
+        drop_empty (bool): drop orders without quantity
+
+    Returns:
+        bids (pd.DataFrame): one row per order with grid values, grid point and order values
+    """
+    # observe base state once, trading table is empty
+    scenario_time = datetime.strptime(trader.experiment_config['scenario_time_begin'],
+                                      trader.experiment_config['date_format'])
+    observation = {name: 0. for name in trader.env_input_names}
+    observation.update(state or {})
+    observation['time'] = experiment_time
+    observation['scenario_time'] = scenario_time + timedelta(seconds=experiment_time)
+    trader.get_state(observation, 0)
+
+    # base model inputs of product - all grid points derive from these inputs
+    trader._quantity_assessment(product=product)
+    trader._pricing(product=product, quantities=None)
+    physical_inputs = trader.physical_parameters['model_inputs']
+    pricing_inputs = trader.pricing_parameters['model_inputs']
+    model_config = trader.agent_config['model_config']
+    model_parameters = model_config['model_parameters']
+
+    names = list(grid)
+    for name in names:
+        if name not in physical_inputs and name not in pricing_inputs and name not in model_parameters:
+            raise ValueError('Grid variable ' + name + ' is neither a model input nor a model parameter of agent ' +
+                             trader.name + '.')
+    parameter_names = [name for name in names if name not in physical_inputs and name not in pricing_inputs]
+    points = list(itertools.product(*[grid[name] for name in names]))
+
+    # compiled contexts per combination of model parameters - shared with traders of equal parameters
+    contexts = {}
+
+    def context(point):
+        key = tuple(repr(point[names.index(name)]) for name in parameter_names)
+        if key not in contexts:
+            parameters = dict(model_parameters)
+            parameters.update({name: point[names.index(name)] for name in parameter_names})
+            contexts[key] = (
+                shared_model_context(
+                    parameters, exclude=ALLOCATION_NAMES,
+                    setup=get_setup('quantity_assessment', model_config['capacity_model'])),
+                shared_model_context(
+                    parameters, exclude=ALLOCATION_NAMES,
+                    setup=get_setup('pricing', model_config['pricing_model']),
+                    markets=trader.agent_config['base_config']['connections_markets'],
+                    name=trader.name))
+        return contexts[key]
+
+    def apply(model_inputs, point):
+        model_inputs = dict(model_inputs)
+        for name, value in zip(names, point):
+            if name not in model_inputs:
+                continue
+            if isinstance(model_inputs[name], list):
+                model_inputs[name] = [value] * len(model_inputs[name])
+            else:
+                model_inputs[name] = value
+        return model_inputs
+
+    # quantity assessment of all grid points
+    physical_parameters = [{'model_parameters': context(point)[0], 'model_inputs': apply(physical_inputs, point)}
+                           for point in points]
+    fleet_model = MODELS['fleet_quantity_assessment'].get(model_config['capacity_model'])
+    if fleet_model is not None and len(points) > 1:
+        results = fleet_model(physical_parameters)
+    else:
+        results = [trader.capacity_model(parameters) for parameters in physical_parameters]
+
+    # pricing of every grid point
+    rows = []
+    for idx, (point, parameters, quantities) in enumerate(zip(points, physical_parameters, results)):
+        trader.physical_parameters = parameters
+        quantities = trader._process_quantities(quantities=quantities)
+        model_inputs = apply(pricing_inputs, point)
+        model_inputs['quantities'] = quantities
+        msgs = trader.pricing_model({'model_parameters': context(point)[1], 'model_inputs': model_inputs})
+        for msg in msgs:
+            if drop_empty and msg['quantity'] == 0:
+                continue
+            row = dict(zip(names, point))
+            row['point'] = idx
+            row.update({column: msg.get(column) for column in ORDER_COLUMNS})
+            rows.append(row)
+
+    return pd.DataFrame(rows, columns=names + ['point'] + list(ORDER_COLUMNS))
+
+
+def parse_values(text):
+    """
+    parse grid values from command line, either "start:stop:num" or comma separated values
+
+    Args:
+        text (str): grid values, e.g. "10:30:21" or "0.2,0.3,0.5"
+
+    Returns:
+        values (list): grid values
+    """
+    if ':' in text:
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num)).tolist()
+    return [float(value) for value in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='explore bid curves of an agent without simulation environment')
+    parser.add_argument('--config', required=True, help='path to experiment config')
+    parser.add_argument('--agent', required=True, help='name of agent')
+    parser.add_argument('--product', type=int, nargs=2, metavar=('TYPE', 'LEAD_TIME'), default=None,
+                        help='product type and lead time in seconds, shortest product without lead time by default')
+    parser.add_argument('--grid', nargs='*', default=[], metavar='NAME=VALUES',
+                        help='grid of model input or parameter, e.g. fRoomTemperature=18:24:25 minimal_load=0.2,0.4')
+    parser.add_argument('--state', nargs='*', default=[], metavar='NAME=VALUE',
+                        help='observed value of environment input not covered by grid, e.g. fFeedTemperature=60')
+    parser.add_argument('--time', type=int, default=0, help='seconds since scenario begin')
+    parser.add_argument('--output', default=None, help='csv file of bid surface')
+    args = parser.parse_args()
+
+    trader = load_trader(config_path=args.config, agent_name=args.agent)
+    if args.product is None:
+        product = {'product_type': trader.trading_time, 'lead_time': 0}
+    else:
+        product = {'product_type': args.product[0], 'lead_time': args.product[1]}
+    grid = {name: parse_values(values) for name, values in (item.split('=', 1) for item in args.grid)}
+    state = {name: float(value) for name, value in (item.split('=', 1) for item in args.state)}
+
+    start = time.perf_counter()
+    bids = explore(trader=trader, grid=grid, product=product, state=state, experiment_time=args.time)
+    print('[INFO] Evaluated ' + str(len(bids['point'].unique())) + ' grid points with orders (' + str(len(bids)) +
+          ' orders) in {:.2f} s.'.format(time.perf_counter() - start))
+
+    if args.output is not None:
+        bids.to_csv(args.output, index=False)
+    else:
+        print(bids)
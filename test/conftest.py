@@ -0,0 +1,222 @@
+"""
+fixtures of tests - multi agent systems of shipped experiment configs
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "fixtures of tests"
+
+import os
+import numpy as np
+import pytest
+from multi_agent_system.base.billing import BalancingEnergyBilling
+from multi_agent_system.base.executor import trade_round, trading_executor
+from multi_agent_system.base.fleet import assess_fleet
+from multi_agent_system.base.schedule import ProductSchedule
+from multi_agent_system.base.templates import clear_templates
+from multi_agent_system.base.util import read_config
+from multi_agent_system.components.consumer import Consumer
+from multi_agent_system.components.converter import Converter
+from multi_agent_system.components.heat_exchanger import HeatExchanger
+from multi_agent_system.components.heat_pump import HeatPump
+from multi_agent_system.components.market import Market
+from multi_agent_system.components.storage import Storage
+from multi_agent_system.components.system_operator import SystemOperator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT, 'experiments', 'eta_heating_systems', 'config')
+
+TRADER_CLASSES = {
+    'converter': Converter,
+    'consumer': Consumer,
+    'system_operator': SystemOperator,
+    'storage': Storage,
+    'heat_exchanger': HeatExchanger,
+    'heat_pump': HeatPump,
+}
+
+
+class MultiAgentSystem():
+    def __init__(self, config_name, market_model=None, **experiment_config):
+        """
+        traders and markets of shipped experiment config traded like the controller without environment
+
+        Args:
+            config_name (str): name of config file without extension, e.g. 2024_01_10_1_day_s5
+            market_model (str): model type of all markets, models of config if None
+            experiment_config (dict): changed entries of environment specific config, e.g. bid_cache=True
+        """
+        self.config = read_config(os.path.join(CONFIG_PATH, config_name + '.json'))
+        self.experiment_config = dict(self.config['environment_specific'], **experiment_config)
+        self.sampling_time = self.experiment_config['sampling_time']
+
+        clear_templates()
+        self.schedule = ProductSchedule(dict(zip(*self.experiment_config['products'])))
+        self.traders = {}
+        self.markets = {}
+        for agent in self.config['agents']:
+            if agent['type'] == 'market':
+                if market_model is not None:
+                    agent['config']['pricing_config']['model_type'] = market_model
+                self.markets[agent['name']] = Market(
+                    agent_name=agent['name'], agent_type=agent['type'], agent_config=agent['config'],
+                    experiment_config=self.experiment_config, schedule=self.schedule)
+            else:
+                self.traders[agent['name']] = TRADER_CLASSES[agent['type']](
+                    agent_name=agent['name'], agent_type=agent['type'], agent_config=agent['config'],
+                    experiment_config=self.experiment_config, schedule=self.schedule)
+        for agent in list(self.markets.values()) + list(self.traders.values()):
+            agent.setup_agent()
+        curve_order_markets = [name for name, market in self.markets.items() if market.is_curve_orders]
+        for trader in self.traders.values():
+            trader.set_curve_order_markets(curve_order_markets)
+        self.billing = BalancingEnergyBilling(self.traders)
+        self.num_control_steps = int(self.schedule.trading_time / self.sampling_time)
+        self.time = 0
+        self.trading_step = 0
+        self.heat_energy = {name: 0. for name in self.traders}
+        self.executor = trading_executor(kind=self.experiment_config.get('trading_executor', 'thread'),
+                                         workers=self.experiment_config.get('trading_workers', 1))
+
+    def observation(self, trader, rng):
+        """
+        random observation of trader around the temperature limits of its networks
+
+        Args:
+            trader (Trader): observing trader
+            rng (np.random.Generator): random number generator, constant observations if None
+
+        Returns:
+            observation (dict): observed values by input name
+        """
+        def noise(scale):
+            return 0. if rng is None else float(rng.normal(0, scale))
+
+        markets = trader.agent_config['base_config']['connections_markets']
+        observation = {}
+        for input_name in trader.agent_config['base_config']['env_inputs']:
+            market = markets[-1] if input_name.endswith('_cold') else markets[0]
+            limits = self.experiment_config.get('temperature_limits_' + market, [40, 60])
+            if input_name == 'bHeatingMode':
+                observation[input_name] = 1
+            elif input_name == 'fHeatEnergy':
+                self.heat_energy[trader.name] += 0. if rng is None else abs(float(rng.normal(0.2, 0.2)))
+                observation[input_name] = self.heat_energy[trader.name]
+            elif input_name == 'fRoomTemperature':
+                observation[input_name] = 21 + noise(0.3)
+            elif input_name == 'fUpperTemperature':
+                observation[input_name] = limits[1] - 3 + noise(0.3)
+            elif input_name == 'fLowerTemperature':
+                observation[input_name] = limits[0] + 3 + noise(0.3)
+            elif 'Temperature' in input_name:
+                observation[input_name] = sum(limits) / 2 + noise(0.3)
+            else:
+                observation[input_name] = 20 + noise(1)
+        observation['time'] = self.time
+        observation['scenario_time'] = self.time
+        return observation
+
+    def run(self, num_trading_steps, rng=None):
+        """
+        trading steps of multi agent system - observation of every sampling time, trading and clearing of tradable
+        products in every trading step and billing of balancing energy
+
+        Args:
+            num_trading_steps (int): number of trading steps
+            rng (np.random.Generator): random number generator of observations, constant observations if None
+
+        Returns:
+            order_books (list): order messages per cleared product in order of clearing
+        """
+        order_books = []
+        for _ in range(num_trading_steps):
+            for control_step in range(self.num_control_steps):
+                for trader in self.traders.values():
+                    trader.get_state(self.observation(trader, rng), control_step)
+                if control_step == 0:
+                    order_books.extend(self.trading_round())
+                self.time += self.sampling_time
+            self.trading_step = (self.trading_step + 1) % self.schedule.num_trading_steps
+        return order_books
+
+    def trading_round(self):
+        """
+        trade and clear tradable products of trading step in trading order
+
+        Returns:
+            order_books (list): order messages per cleared product in order of clearing
+        """
+        order_books = []
+        for entries in self.schedule.batches[self.trading_step]:
+            quantities = {}
+            if self.experiment_config.get('lead_time_batch_assessment', False) and len(entries) > 1:
+                quantities = assess_fleet([(self.traders[name], entry['product'])
+                                           for entry in entries for name in entry['participants']])
+            for entry in entries:
+                product = entry['product']
+                trader_msgs = trade_round(
+                    [self.traders[name] for name in entry['participants']], product, quantities=quantities,
+                    executor=self.executor,
+                    is_fleet_assessment=self.experiment_config.get('fleet_quantity_assessment', False))
+                order_book = [msg for msgs in trader_msgs for msg in msgs]
+                order_books.append(order_book)
+                for msg in order_book:
+                    self.markets[msg['reciever_id']].process_msg(msg=msg)
+                for market in self.markets.values():
+                    for msg in market.clear(product=product, experiment_time=self.time):
+                        self.traders[msg['reciever_id']].process_msg(msg=msg)
+
+        # bill balancing energy of last trading period
+        self.billing.bill([msg for trader in self.traders.values() if trader.type == 'system_operator'
+                           for msg in trader.return_balancing_energy_price()])
+        return order_books
+
+    def close(self):
+        """
+        shut down executor of trading rounds
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def strip_ids(order_book):
+    """
+    order messages without uuids - coupled orders are replaced by their positions within the order book
+
+    Args:
+        order_book (list): list of order messages
+
+    Returns:
+        order_book (list): comparable list of order messages
+    """
+    positions = {msg['id']: position for position, msg in enumerate(order_book)}
+    stripped = []
+    for msg in order_book:
+        msg = {name: value for name, value in msg.items() if name != 'id'}
+        if msg.get('coupled_order') is not None:
+            msg['coupled_order'] = [positions.get(order_id, order_id) for order_id in msg['coupled_order']]
+        for name, value in msg.items():
+            if isinstance(value, (np.ndarray, np.generic)):
+                msg[name] = value.tolist()
+        stripped.append(msg)
+    return stripped
+
+
+@pytest.fixture
+def multi_agent_system(monkeypatch):
+    """
+    factory of multi agent systems of shipped experiment configs, paths of configs are relative to project root
+    """
+    monkeypatch.chdir(ROOT)
+    systems = []
+
+    def factory(*args, **kwargs):
+        systems.append(MultiAgentSystem(*args, **kwargs))
+        return systems[-1]
+
+    yield factory
+    for system in systems:
+        system.close()
+    clear_templates()
@@ -0,0 +1,147 @@
+"""
+tests of aggregator agent
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of aggregator agent"
+
+import uuid
+import numpy as np
+import pytest
+from multi_agent_system.base.messages import curve_order_msg, order_msg
+from multi_agent_system.components.aggregator import Aggregator
+from multi_agent_system.models.market_models import double_auction
+
+PRODUCT = {'product_type': 900, 'lead_time': 0}
+EXPERIMENT_CONFIG = {'products': [[900], [[0]]], 'sampling_time': 60}
+
+
+def _aggregator(members, experiment_config=None):
+    aggregator = Aggregator(
+        agent_name='aggregator', agent_type='aggregator',
+        agent_config={'base_config': {'connections_traders': members, 'connections_markets': ['market']}},
+        experiment_config=dict(EXPERIMENT_CONFIG, **(experiment_config or {})))
+    aggregator.setup_agent()
+    return aggregator
+
+
+def _order(sender_id, order_type, quantity, price, min_acceptance_ratio=0):
+    return order_msg(
+        sender_id=sender_id, reciever_id='market', order_type=order_type, product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantity=quantity, price=price,
+        min_acceptance_ratio=min_acceptance_ratio, coupled_order=None, id=uuid.uuid4())
+
+
+def _clear(order_book):
+    order_book = [dict(order) for order in order_book]
+    return double_auction({'model_parameters': {}, 'model_inputs': {'market_id': 'market', 'order_book': order_book}})
+
+
+def _settlement(trades):
+    # cleared quantity and costs by trader and trade type
+    result = {}
+    for trade in trades:
+        quantity, costs = result.get((trade['reciever_id'], trade['trade_type']), (0, 0))
+        result[(trade['reciever_id'], trade['trade_type'])] = (
+            quantity + trade['quantity'], costs + trade['quantity'] * trade['price'])
+    return result
+
+
+def _aggregated_clearing(aggregator, order_book):
+    # orders of members are merged by aggregator, trades of aggregator are disaggregated to members
+    market_orders = []
+    for order in order_book:
+        if (order['sender_id'], order['reciever_id']) in aggregator.routes():
+            aggregator.process_msg(order)
+        else:
+            market_orders.append(order)
+    market_orders.extend(aggregator.trade(PRODUCT))
+
+    trades = []
+    for trade in _clear(market_orders):
+        if trade['reciever_id'] == aggregator.name:
+            aggregator.process_msg(trade)
+        else:
+            trades.append(trade)
+    return trades + aggregator.distribute(PRODUCT)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_aggregated_clearing_equals_flat_order_book(seed):
+    rng = np.random.default_rng(seed)
+    members = ['member_' + str(idx) for idx in range(6)]
+    order_book = []
+    for idx, trader in enumerate(members + ['buyer', 'seller']):
+        order_type = 'sell' if idx % 2 else 'buy'
+        # distinct prices, so every price level holds orders of one member
+        for price in rng.uniform(0, 0.3, 3):
+            order_book.append(_order(trader, order_type, float(rng.uniform(1, 10)), float(price)))
+
+    flat = _settlement(_clear(order_book))
+    aggregated = _settlement(_aggregated_clearing(_aggregator(members), order_book))
+
+    assert aggregated.keys() == flat.keys()
+    for key, (quantity, costs) in flat.items():
+        assert aggregated[key] == pytest.approx((quantity, costs))
+
+
+def test_price_level_is_split_pro_rata():
+    aggregator = _aggregator(['member_0', 'member_1'])
+    order_book = [
+        _order('member_0', 'sell', 6, 0.1),
+        _order('member_1', 'sell', 2, 0.1),
+        _order('buyer', 'buy', 4, 0.2)]
+
+    aggregated = _settlement(_aggregated_clearing(aggregator, order_book))
+    flat = _settlement(_clear(order_book))
+
+    # total of price level equals flat order book, level is split by quantities of member orders
+    assert aggregated[('member_0', 'sell')][0] + aggregated[('member_1', 'sell')][0] == pytest.approx(
+        sum(quantity for (trader, _), (quantity, _) in flat.items() if trader.startswith('member')))
+    assert aggregated[('member_0', 'sell')][0] == pytest.approx(3)
+    assert aggregated[('member_1', 'sell')][0] == pytest.approx(1)
+    assert aggregated[('buyer', 'buy')] == pytest.approx(flat[('buyer', 'buy')])
+
+
+def test_unmergeable_orders_are_forwarded():
+    aggregator = _aggregator(['member_0'])
+    orders = [
+        _order('member_0', 'sell', 4, 0.1, min_acceptance_ratio=0.5),
+        curve_order_msg(
+            sender_id='member_0', reciever_id='market', order_type='sell', product_type=PRODUCT['product_type'],
+            product_lead_time=PRODUCT['lead_time'], quantities=[1, 2], prices=[0.1, 0.2], min_quantity=0,
+            id=uuid.uuid4())]
+    for order in orders:
+        aggregator.process_msg(order)
+
+    assert aggregator.trade(PRODUCT) == orders
+
+
+def test_coupled_ladders_of_shipped_traders_are_forwarded(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    order_book = [msg for msg in mas.run(num_trading_steps=1)[0] if msg['quantity'] != 0]
+    aggregator = Aggregator(
+        agent_name='aggregator', agent_type='aggregator',
+        agent_config={'base_config': {'connections_traders': list(mas.traders),
+                                      'connections_markets': list(mas.markets)}},
+        experiment_config=mas.experiment_config)
+    aggregator.setup_agent()
+    for msg in order_book:
+        aggregator.process_msg(msg)
+    msgs = aggregator.trade({'product_type': order_book[0]['product_type'],
+                             'lead_time': order_book[0]['product_lead_time']})
+
+    coupled = [msg for msg in order_book if msg['coupled_order']]
+    mergeable = [msg for msg in order_book if not msg['coupled_order'] and msg['min_acceptance_ratio'] == 0]
+    assert coupled
+    assert all(msg in msgs for msg in coupled)
+    assert len(msgs) == len(order_book) - len(mergeable) + len(
+        {(msg['reciever_id'], msg['order_type'], msg['price']) for msg in mergeable})
+
+
+def test_delta_orders_are_rejected():
+    with pytest.raises(ValueError):
+        _aggregator(['member_0'], experiment_config={'delta_orders': True})
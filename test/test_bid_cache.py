@@ -0,0 +1,75 @@
+"""
+tests of memoization of bids
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of memoization of bids"
+
+import pytest
+from conftest import strip_ids
+
+
+def test_cached_curve_orders(multi_agent_system):
+    # curve orders of piecewise linear auction are retagged without coupled orders
+    order_books = multi_agent_system(
+        '2024_01_10_1_day_s5', market_model='piecewise_linear_auction', curve_orders=True).run(num_trading_steps=8)
+    mas = multi_agent_system('2024_01_10_1_day_s5', market_model='piecewise_linear_auction', curve_orders=True,
+                             bid_cache=True)
+    cached_order_books = mas.run(num_trading_steps=8)
+
+    assert any(msg['type'] == 'curve_order_msg' for order_book in cached_order_books for msg in order_book)
+    assert sum(trader.bid_cache.hits for trader in mas.traders.values()) > 0
+    assert [strip_ids(order_book) for order_book in cached_order_books] == [
+        strip_ids(order_book) for order_book in order_books]
+
+
+def _trade(mas, trader_name, product, **changes):
+    # trade product after observation of constant inputs with changed inputs
+    trader = mas.traders[trader_name]
+    trader.get_state(dict(mas.observation(trader, None), **changes), 0)
+    return trader.trade(product=product)
+
+
+@pytest.mark.parametrize('trader_name, input_name', [
+    ('CHP1System', 'fReturnTemperature'), ('StaticHeatingSystem', 'fRoomTemperature'),
+    ('HeatPump1System', 'fReturnTemperature_hot'), ('VSIStorageSystem', 'fUpperTemperature')])
+def test_hits_of_read_inputs(multi_agent_system, trader_name, input_name):
+    mas = multi_agent_system('2024_01_10_1_day_s5', bid_cache=True)
+    fresh_mas = multi_agent_system('2024_01_10_1_day_s5')
+    cache = mas.traders[trader_name].bid_cache
+    product = {'product_type': 3600, 'lead_time': 0}
+    temperature = mas.observation(mas.traders[trader_name], None)[input_name]
+
+    # (changed inputs, is hit) - meter readings are not read by capacity and pricing model, temperatures within
+    # resolution of capacity model reuse bids
+    rounds = [
+        ({}, False),
+        ({}, True),
+        ({'fHeatEnergy': 1000.}, True),
+        ({input_name: temperature + 0.02}, True),
+        ({input_name: temperature + 2}, False),
+        ({input_name: temperature + 2.02, 'fHeatEnergy': 2000.}, True),
+        ({}, True),
+    ]
+    for changes, is_hit in rounds:
+        hits = cache.hits
+        msgs = _trade(mas, trader_name, product, **changes)
+        fresh_msgs = _trade(fresh_mas, trader_name, product, **changes)
+        assert msgs
+        assert cache.hits == hits + is_hit
+        # cached bids of equal read inputs equal fresh bids
+        if input_name not in changes:
+            assert strip_ids(msgs) == strip_ids(fresh_msgs)
+    assert cache.return_stats() == {'hits': 5, 'misses': 2, 'size': 2}
+
+
+def test_resolution_of_inputs(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5', bid_cache={'resolutions': {'fReturnTemperature': 10}})
+    product = {'product_type': 3600, 'lead_time': 0}
+    temperature = mas.observation(mas.traders['CHP1System'], None)['fReturnTemperature']
+    for offset in (0.2, 2, 4):
+        _trade(mas, 'CHP1System', product, fReturnTemperature=temperature + offset)
+    assert mas.traders['CHP1System'].bid_cache.return_stats() == {'hits': 2, 'misses': 1, 'size': 1}
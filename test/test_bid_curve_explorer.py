@@ -0,0 +1,73 @@
+"""
+tests of offline bid curve explorer
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of bid curve explorer"
+
+import os
+from datetime import datetime, timedelta
+import pytest
+from conftest import CONFIG_PATH
+from supplementary_material.bid_curve_explorer import ORDER_COLUMNS, explore, load_trader, parse_values
+
+CONFIG = os.path.join(CONFIG_PATH, '2024_01_10_1_day_s5.json')
+PRODUCT = {'product_type': 3600, 'lead_time': 0}
+STATE = {'fFeedTemperature': 70., 'fLowerTemperature': 60., 'fReturnTemperature': 60.}
+
+
+def _orders(agent_name, state, product=PRODUCT, model_parameters=None):
+    # orders of trader observing state, traded like within the simulation
+    trader = load_trader(CONFIG, agent_name, model_parameters=model_parameters)
+    scenario_time = datetime.strptime(trader.experiment_config['scenario_time_begin'],
+                                      trader.experiment_config['date_format'])
+    observation = {name: 0. for name in trader.env_input_names}
+    observation.update({name: value for name, value in state.items() if name in observation})
+    observation['time'] = 0
+    observation['scenario_time'] = scenario_time + timedelta(seconds=0)
+    trader.get_state(observation, 0)
+    return [tuple(msg[column] for column in ORDER_COLUMNS) for msg in trader.trade(product=product)
+            if msg['quantity'] != 0]
+
+
+@pytest.mark.parametrize('agent_name, name, values, product', [
+    ('CHP1System', 'fReturnTemperature', [40., 55., 70.], PRODUCT),
+    ('StaticHeatingSystem', 'fRoomTemperature', [19., 21., 23.], {'product_type': 900, 'lead_time': 0}),
+    ('VSIStorageSystem', 'fUpperTemperature', [60., 70., 80.], PRODUCT),
+    ('HeatPump1System', 'fReturnTemperature_hot', [50., 60.], PRODUCT),
+])
+def test_explored_bids_equal_traded_bids(multi_agent_system, agent_name, name, values, product):
+    bids = explore(load_trader(CONFIG, agent_name), grid={name: values}, product=product, state=STATE)
+    assert len(bids)
+
+    for point, value in enumerate(values):
+        explored = [tuple(row) for row in bids[bids['point'] == point][list(ORDER_COLUMNS)].itertuples(index=False)]
+        traded = _orders(agent_name, dict(STATE, **{name: value}), product=product)
+        assert explored == pytest.approx(traded)
+        assert (bids[bids['point'] == point][name] == value).all()
+
+
+def test_explored_model_parameters(multi_agent_system):
+    bids = explore(load_trader(CONFIG, 'CHP1System'), grid={'minimal_load': [0.2, 0.6]}, product=PRODUCT,
+                   state=STATE)
+    for point, minimal_load in enumerate([0.2, 0.6]):
+        explored = [tuple(row) for row in bids[bids['point'] == point][list(ORDER_COLUMNS)].itertuples(index=False)]
+        assert explored == pytest.approx(_orders('CHP1System', STATE, model_parameters={'minimal_load': minimal_load}))
+
+
+def test_invalid_grid_and_agents(multi_agent_system):
+    trader = load_trader(CONFIG, 'CHP1System')
+    with pytest.raises(ValueError, match='neither a model input nor a model parameter'):
+        explore(trader, grid={'fUnknown': [1.]}, product=PRODUCT)
+    with pytest.raises(ValueError, match='does not exist'):
+        load_trader(CONFIG, 'UnknownSystem')
+    with pytest.raises(ValueError, match='does not place orders'):
+        load_trader(CONFIG, 'HNHT')
+
+
+def test_parse_values():
+    assert parse_values('10:30:3') == [10., 20., 30.]
+    assert parse_values('0.2,0.5') == [0.2, 0.5]
@@ -0,0 +1,86 @@
+"""
+tests of vectorized billing of balancing energy
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of vectorized billing"
+
+import numpy as np
+import pytest
+from multi_agent_system.base.billing import BILLING_COLUMNS, compute_balancing_energy
+
+
+def _legacy_billing(trader, msg, log):
+    # balancing energy and specific costs as billed by every trader on its own
+    markets = trader.agent_config['base_config']['connections_markets']
+    if trader.type == 'consumer' and len(markets) > 1:
+        if msg['sender_id'] == markets[0]:
+            energy_difference = log['cleared_energy_neg'] - log['real_energy_neg']
+        else:
+            energy_difference = log['cleared_energy_pos'] - log['real_energy_pos']
+    elif trader.type == 'heat_exchanger':
+        if msg['system_id'] == markets[0]:
+            energy_difference = -(log['cleared_energy_neg'] - log['real_energy_pos'])
+        else:
+            energy_difference = log['cleared_energy_pos'] - log['real_energy_pos']
+    elif trader.type == 'heat_pump':
+        if msg['system_id'] == markets[0]:
+            energy_difference = (log['cleared_energy_pos'] - log['real_energy_pos'])
+        else:
+            energy_difference = -((log['cleared_energy_pos'] - log['real_energy_pos']) * (1 - 1 / trader.cop))
+    else:
+        energy_difference = (log['cleared_energy_pos'] - log['cleared_energy_neg']) - \
+                            (log['real_energy_pos'] - log['real_energy_neg'])
+
+    if energy_difference >= 0:
+        cost_balancing_energy = energy_difference * msg['price_pos']
+    else:
+        cost_balancing_energy = energy_difference * msg['price_neg']
+    if energy_difference == 0:
+        return energy_difference, 0
+    return energy_difference, cost_balancing_energy / energy_difference
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('config_name', ['2024_01_10_1_day_s5', '2024_01_10_1_day_s3_2'])
+def test_billing_equals_billing_per_trader(multi_agent_system, config_name, seed):
+    rng = np.random.default_rng(seed)
+    mas = multi_agent_system(config_name)
+    mas.run(num_trading_steps=1)
+
+    # random energies of last trading period, balanced traders are not billed
+    for trader in mas.traders.values():
+        log = trader.trading_table_longtime[-1]
+        for column in BILLING_COLUMNS:
+            log[column] = float(rng.uniform(0, 10))
+        if rng.uniform() < 0.3:
+            log['real_energy_pos'], log['real_energy_neg'] = log['cleared_energy_pos'], log['cleared_energy_neg']
+        if trader.type == 'heat_pump':
+            trader.cop = float(rng.uniform(1.5, 5))
+
+    msgs = [msg for trader in mas.traders.values() if trader.type == 'system_operator'
+            for msg in trader.return_balancing_energy_price()]
+    for msg in msgs:
+        msg['price_pos'], msg['price_neg'] = float(rng.uniform(0, 0.5)), float(rng.uniform(0, 0.5))
+    expected = [_legacy_billing(mas.traders[msg['reciever_id']], msg,
+                                mas.traders[msg['reciever_id']].trading_table_longtime[-1]) for msg in msgs]
+    assert msgs
+
+    mas.billing.bill(msgs)
+    for msg, (energy_difference, cost_balancing_energy) in zip(msgs, expected):
+        log = mas.traders[msg['reciever_id']].trading_table_longtime[-1]
+        assert log['balancing_energy_' + msg['system_id']] == pytest.approx(energy_difference, abs=1e-12)
+        assert log['cost_balancing_energy_' + msg['system_id']] == pytest.approx(cost_balancing_energy, abs=1e-12)
+
+
+def test_balanced_rows_have_no_costs():
+    energies = np.array([[2., 0., 2., 0.], [3., 0., 1., 0.], [1., 0., 3., 0.]])
+    energy_difference, cost_balancing_energy = compute_balancing_energy(
+        energies, weights=np.tile([1., 1., 1., 1.], (3, 1)), signs=np.ones(3), factors=np.ones(3),
+        price_pos=np.full(3, 0.3), price_neg=np.full(3, 0.1))
+
+    assert energy_difference.tolist() == [0., 2., -2.]
+    assert cost_balancing_energy.tolist() == pytest.approx([0., 0.3, 0.1])
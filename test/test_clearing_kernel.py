@@ -0,0 +1,66 @@
+"""
+tests of compiled double auction clearing
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of compiled double auction clearing"
+
+import uuid
+import numpy as np
+import pytest
+import multi_agent_system.models.market_models as market_models
+from multi_agent_system.base.messages import order_msg
+from multi_agent_system.models.clearing_kernel import double_auction_clearing
+
+
+def _order_book(rng, num_traders, num_steps):
+    # coupled bid ladders with minimum ratios of acceptance, traders alternately buy and sell
+    order_book = []
+    for trader in range(num_traders):
+        ids = [uuid.uuid4() for _ in range(num_steps)]
+        prices = np.sort(rng.uniform(0, 0.3, num_steps))
+        for step, order_id in enumerate(ids):
+            order_book.append(order_msg(
+                sender_id='trader_' + str(trader), reciever_id='market',
+                order_type='buy' if trader % 2 == 0 else 'sell', product_type=900, product_lead_time=0,
+                quantity=float(rng.uniform(1, 20)), price=float(prices[step]),
+                min_acceptance_ratio=float(rng.choice([0., 0.5, 1.])), coupled_order=ids[step + 1:], id=order_id))
+    return order_book
+
+
+def _clear(order_book, **model_inputs):
+    return market_models.double_auction({'model_parameters': {}, 'model_inputs': dict(
+        {'market_id': 'market', 'order_book': [dict(order) for order in order_book]}, **model_inputs)})
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_compiled_clearing_equals_pure_python(seed, monkeypatch):
+    # kernel is executed in pure python without numba
+    monkeypatch.setattr(market_models, 'IS_NUMBA_AVAILABLE', True)
+    order_book = _order_book(np.random.default_rng(seed), num_traders=10, num_steps=5)
+
+    trades = _clear(order_book)
+    assert trades
+    assert _clear(order_book, is_compiled_clearing=True) == trades
+    assert _clear(order_book, is_compiled_clearing=True, is_warm_start=True) == trades
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_warm_start_saves_comparisons(seed):
+    order_book = _order_book(np.random.default_rng(seed), num_traders=20, num_steps=10)
+    cold_statistics, warm_statistics = {}, {}
+    cold_matches = double_auction_clearing(order_book, statistics=cold_statistics)
+    warm_matches = double_auction_clearing(order_book, is_warm_start=True, statistics=warm_statistics)
+
+    assert warm_matches == cold_matches
+    assert warm_statistics['matchings'] == cold_statistics['matchings']
+    assert warm_statistics['comparisons'] <= cold_statistics['comparisons']
+
+
+def test_order_book_without_prices_is_not_compiled():
+    order_book = _order_book(np.random.default_rng(0), num_traders=2, num_steps=1)
+    order_book[0]['price'] = None
+    assert double_auction_clearing(order_book) is None
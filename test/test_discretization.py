@@ -0,0 +1,100 @@
+"""
+tests of adaptive bid discretization
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of adaptive bid discretization"
+
+import uuid
+import pytest
+from multi_agent_system.base.discretization import DiscretizationPolicy
+from multi_agent_system.base.messages import market_state_msg, order_msg
+from multi_agent_system.components.market import Market
+
+PRODUCT = {'product_type': 900, 'lead_time': 0}
+EXPERIMENT_CONFIG = {'products': [[900], [[0]]], 'sampling_time': 60}
+
+
+def _state(market, book_depth, clearing_latency=0.):
+    return market_state_msg(sender_id=market, reciever_id='trader', product_type=900, product_lead_time=0,
+                            book_depth=book_depth, clearing_latency=clearing_latency)
+
+
+def _market(experiment_config=None):
+    market = Market(
+        agent_name='market', agent_type='market',
+        agent_config={'pricing_config': {'model_type': 'double_auction', 'model_parameters': {}}},
+        experiment_config=dict(EXPERIMENT_CONFIG, **(experiment_config or {})))
+    market.setup_agent()
+    for sender_id, order_type, price in (('buyer', 'buy', 0.2), ('seller', 'sell', 0.1)):
+        market.process_msg(order_msg(
+            sender_id=sender_id, reciever_id='market', order_type=order_type, product_type=900,
+            product_lead_time=0, quantity=1., price=price, min_acceptance_ratio=0, coupled_order=None,
+            id=uuid.uuid4()))
+    return market
+
+
+def test_additive_increase_multiplicative_decrease():
+    policy = DiscretizationPolicy(bid_discretization=20, target_depth=10, target_latency=None)
+    assert policy.bounds == (2, 20)
+
+    # unchanged without new market states
+    assert policy.adapt() == 20
+
+    policy.update(_state('market_0', book_depth=11))
+    assert policy.adapt() == 10
+    policy.update(_state('market_0', book_depth=11))
+    assert policy.adapt() == 5
+
+    # one congested market is sufficient for a decrease
+    policy.update(_state('market_0', book_depth=5))
+    policy.update(_state('market_1', book_depth=11))
+    assert policy.adapt() == 2
+    policy.update(_state('market_0', book_depth=11))
+    assert policy.adapt() == 2
+
+    for bid_discretization in range(3, 21):
+        policy.update(_state('market_0', book_depth=5))
+        assert policy.adapt() == bid_discretization
+    policy.update(_state('market_0', book_depth=5))
+    assert policy.adapt() == 20
+
+
+def test_latency_target_and_bounds():
+    policy = DiscretizationPolicy(bid_discretization=10, bounds=[4, 12], target_latency=0.01)
+    policy.update(_state('market_0', book_depth=100, clearing_latency=0.02))
+    assert policy.adapt() == 5
+    policy.update(_state('market_0', book_depth=100, clearing_latency=0.02))
+    assert policy.adapt() == 4
+
+    with pytest.raises(ValueError):
+        DiscretizationPolicy(bid_discretization=10, target_depth=10, decrease=1)
+
+
+def test_latency_target_is_optional():
+    # default policy ignores wall-clock latency of clearings
+    policy = DiscretizationPolicy(bid_discretization=10, bounds=[4, 12], target_depth=50)
+    assert policy.target_latency is None
+    policy.update(_state('market_0', book_depth=10, clearing_latency=1.))
+    assert policy.adapt() == 11
+
+    with pytest.raises(ValueError, match='requires a target'):
+        DiscretizationPolicy(bid_discretization=10)
+
+
+def test_market_state_only_if_enabled():
+    market = _market()
+    msgs = market.clear(product=PRODUCT, experiment_time=None)
+    assert market.market_states is None
+    assert {msg['type'] for msg in msgs} == {'trade_msg'}
+
+    market = _market({'adaptive_discretization': {'window': 2}})
+    msgs = market.clear(product=PRODUCT, experiment_time=None)
+    state_msgs = [msg for msg in msgs if msg['type'] == 'market_state_msg']
+    assert sorted(msg['reciever_id'] for msg in state_msgs) == ['buyer', 'seller']
+    assert state_msgs[0]['book_depth'] == 2
+    assert [msg for msg in msgs if msg['type'] == 'trade_msg'] == [
+        msg for msg in _market().clear(product=PRODUCT, experiment_time=None)]
@@ -0,0 +1,93 @@
+"""
+tests of precompiled efficiency lookup tables
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of efficiency lookup tables"
+
+import json
+import os
+import numpy as np
+import pytest
+from multi_agent_system.models.efficiency import EfficiencyCurve, EfficiencyMap
+
+scipy_interpolate = pytest.importorskip('scipy.interpolate')
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'experiments', 'eta_heating_systems', 'config',
+                           '2023_07_12_1_day_s3_1.json')
+
+# maximum deviation of bilinear interpolation from triangulated interpolation on shipped efficiency maps
+TRIANGULATION_TOLERANCE = 0.03
+
+
+def _heat_pump_maps():
+    # thermal and electric efficiency maps of heat pumps of experiment config
+    with open(CONFIG_PATH) as config_file:
+        config = json.load(config_file)
+    maps = []
+    for agent in config['agents']:
+        if agent['type'] == 'heat_pump':
+            model_parameters = agent['config']['model_config']['model_parameters']
+            maps.extend([model_parameters['thermal_efficiencies'], model_parameters['electric_efficiencies']])
+    return maps
+
+
+def _points(efficiencies, num_points=500, seed=0):
+    # random points within grid of efficiency map
+    efficiencies = np.array(efficiencies, dtype=float)
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(efficiencies[0, 1:].min(), efficiencies[0, 1:].max(), num_points)
+    y = rng.uniform(efficiencies[1:, 0].min(), efficiencies[1:, 0].max(), num_points)
+    return x, y
+
+
+@pytest.mark.parametrize('efficiencies', _heat_pump_maps())
+def test_efficiency_map_matches_griddata(efficiencies):
+    grid = np.array(efficiencies, dtype=float)
+    mesh_x, mesh_y = np.meshgrid(grid[0, 1:], grid[1:, 0])
+    points = np.column_stack([mesh_x.ravel(), mesh_y.ravel()])
+    values = grid[1:, 1:].ravel()
+    efficiency_map = EfficiencyMap(efficiencies)
+
+    # exact at sampling points
+    assert [efficiency_map(x, y) for x, y in points] == pytest.approx(values.tolist())
+
+    # previous triangulated interpolation within tolerance inside the grid
+    x, y = _points(efficiencies)
+    expected = scipy_interpolate.griddata(points, values, (x, y), method='linear')
+    result = np.array([efficiency_map(x_value, y_value) for x_value, y_value in zip(x, y)])
+    assert np.max(np.abs(result - expected)) < TRIANGULATION_TOLERANCE
+
+
+@pytest.mark.parametrize('efficiencies', _heat_pump_maps())
+def test_efficiency_map_is_bilinear(efficiencies):
+    grid = np.array(efficiencies, dtype=float)
+    interpolator = scipy_interpolate.RegularGridInterpolator((grid[1:, 0], grid[0, 1:]), grid[1:, 1:])
+    efficiency_map = EfficiencyMap(efficiencies)
+    x, y = _points(efficiencies, seed=1)
+
+    expected = interpolator(np.column_stack([y, x]))
+    assert [efficiency_map(x_value, y_value) for x_value, y_value in zip(x, y)] == pytest.approx(expected.tolist())
+    assert efficiency_map.evaluate(x, y) == pytest.approx(expected)
+
+
+def test_efficiency_map_clamps_inputs():
+    efficiencies = _heat_pump_maps()[0]
+    grid = np.array(efficiencies, dtype=float)
+    efficiency_map = EfficiencyMap(efficiencies)
+
+    assert efficiency_map(grid[0, 1] - 10, grid[1, 0] - 10) == pytest.approx(grid[1, 1])
+    assert efficiency_map(grid[0, -1] + 10, grid[-1, 0] + 10) == pytest.approx(grid[-1, -1])
+    assert efficiency_map.evaluate(np.array([grid[0, -1] + 10]), np.array([grid[1, 0]])) == pytest.approx(
+        [grid[1, -1]])
+
+
+def test_efficiency_curve_matches_interp():
+    curve = EfficiencyCurve([-10, 0, 10, 20, 30, 40], [0.95, 0.93, 0.9, 0.86, 0.81, 0.75])
+    values = np.linspace(-20, 50, 71)
+    expected = np.interp(values, curve.x, curve.y)
+    assert [curve(float(value)) for value in values] == pytest.approx(expected.tolist())
+    assert curve(values) == pytest.approx(expected)
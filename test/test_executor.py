@@ -0,0 +1,37 @@
+"""
+tests of concurrent evaluation of traders
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of concurrent evaluation of traders"
+
+import numpy as np
+import pytest
+from conftest import strip_ids
+from multi_agent_system.base.executor import trading_executor
+
+
+@pytest.mark.parametrize('config_name', ['2024_01_10_1_day_s5', '2024_01_10_1_day_s3_2'])
+@pytest.mark.parametrize('experiment_config', [
+    {'trading_executor': 'thread'},
+    {'trading_executor': 'process'},
+    {'trading_executor': 'process', 'fleet_quantity_assessment': True},
+    {'trading_executor': 'process', 'lead_time_batch_assessment': True},
+])
+def test_concurrent_rounds_equal_sequential_rounds(multi_agent_system, config_name, experiment_config):
+    sequential_config = {name: value for name, value in experiment_config.items() if name != 'trading_executor'}
+    order_books = multi_agent_system(config_name, **sequential_config).run(
+        num_trading_steps=8, rng=np.random.default_rng(0))
+    concurrent_order_books = multi_agent_system(config_name, trading_workers=4, **experiment_config).run(
+        num_trading_steps=8, rng=np.random.default_rng(0))
+    assert [strip_ids(order_book) for order_book in concurrent_order_books] == [
+        strip_ids(order_book) for order_book in order_books]
+
+
+def test_sequential_executor():
+    assert trading_executor(kind='process', workers=1) is None
+    with pytest.raises(ValueError, match='Unknown trading executor'):
+        trading_executor(kind='fiber', workers=4)
@@ -0,0 +1,83 @@
+"""
+tests of fleet models for quantity assessment
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of fleet models"
+
+import numpy as np
+import pytest
+from conftest import strip_ids
+from multi_agent_system.models import fleet_models  # noqa: F401
+from multi_agent_system.models.registry import MODELS
+
+# shipped configs holding agents of capacity models
+CONFIGS = {'demand_building_one_product': '2024_01_10_1_day_s3_2', 'storage_one_product': '2024_01_10_1_day_s3_2'}
+
+
+def _assignments(mas):
+    # (trader, product) pairs of every tradable product of a trading cycle
+    return [(mas.traders[name], entry['product']) for entries in mas.schedule.steps for entry in entries
+            for name in entry['participants']]
+
+
+def _parameters(mas, model_name, bid_discretization):
+    # physical parameters of all assignments of capacity model with changed bid discretization
+    parameters = []
+    for trader, product in _assignments(mas):
+        if trader.agent_config['model_config']['capacity_model'] != model_name:
+            continue
+        trader._quantity_assessment(product=product)
+        model_parameters = trader.physical_parameters['model_parameters']
+        if bid_discretization == 'mixed':
+            model_parameters = dict(model_parameters, bid_discretization=1 + len(parameters) % 3)
+        elif bid_discretization is not None:
+            model_parameters = dict(model_parameters, bid_discretization=bid_discretization)
+        parameters.append({'model_parameters': model_parameters,
+                           'model_inputs': trader.physical_parameters['model_inputs']})
+    return parameters
+
+
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('bid_discretization', [None, 1, 'mixed'])
+@pytest.mark.parametrize('model_name', sorted(MODELS['fleet_quantity_assessment']))
+def test_fleet_model_equals_scalar_model(multi_agent_system, model_name, bid_discretization):
+    mas = multi_agent_system(CONFIGS.get(model_name, '2024_01_10_1_day_s5'))
+    mas.run(num_trading_steps=5, rng=np.random.default_rng(0))
+    parameters = _parameters(mas, model_name, bid_discretization)
+    assert len(parameters) > 1
+
+    results = MODELS['fleet_quantity_assessment'][model_name](parameters)
+    assert len(results) == len(parameters)
+    for agent_parameters, result in zip(parameters, results):
+        expected = MODELS['quantity_assessment'][model_name](agent_parameters)
+        assert result.keys() == expected.keys()
+        for key, value in expected.items():
+            np.testing.assert_allclose(result[key], value, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('bid_cache', [False, True])
+def test_batch_assessment_equals_assessment_per_lead_time(multi_agent_system, bid_cache):
+    mas = multi_agent_system('2024_01_10_1_day_s5', bid_cache=bid_cache)
+    batch_mas = multi_agent_system('2024_01_10_1_day_s5', bid_cache=bid_cache, lead_time_batch_assessment=True)
+
+    # every capacity model is assessed in batches
+    assert {trader.agent_config['model_config']['capacity_model'] for trader in batch_mas.traders.values()} <= set(
+        MODELS['fleet_quantity_assessment'])
+
+    order_books = mas.run(num_trading_steps=8, rng=np.random.default_rng(0))
+    batch_order_books = batch_mas.run(num_trading_steps=8, rng=np.random.default_rng(0))
+    assert [strip_ids(order_book) for order_book in batch_order_books] == [
+        strip_ids(order_book) for order_book in order_books]
+
+
+@pytest.mark.parametrize('config_name', ['2024_01_10_1_day_s5', '2024_01_10_1_day_s3_2'])
+def test_fleet_assessment_equals_assessment_per_trader(multi_agent_system, config_name):
+    order_books = multi_agent_system(config_name).run(num_trading_steps=8, rng=np.random.default_rng(0))
+    fleet_order_books = multi_agent_system(config_name, fleet_quantity_assessment=True).run(
+        num_trading_steps=8, rng=np.random.default_rng(0))
+    assert [strip_ids(order_book) for order_book in fleet_order_books] == [
+        strip_ids(order_book) for order_book in order_books]
@@ -0,0 +1,64 @@
+"""
+tests of longtime trading log
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of longtime trading log"
+
+import glob
+import pandas as pd
+from multi_agent_system.base.longtime_log import LongtimeLog
+
+
+def _rows(num_rows, start=0):
+    # trading periods are initialized with integer 0 and hold floats once they are cleared
+    return [{'time': idx, 'cleared_energy_pos': 0 if idx % 2 else idx * 0.5, 'price_pos': None if idx < 3 else 0.1}
+            for idx in range(start, start + num_rows)]
+
+
+def test_round_trip_int_then_float_rows(tmp_path):
+    path = str(tmp_path / 'agent')
+    log = LongtimeLog(path=path, tail_size=2)
+    rows = [{'time': idx, 'cleared_energy_pos': 0, 'price_pos': None} for idx in range(5)] + _rows(10, start=5)
+    for row in rows:
+        log.append(dict(row))
+    log.close()
+
+    df = log.to_dataframe()
+    expected = pd.DataFrame.from_records(rows)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert len(log) == len(rows)
+
+    # changing types of values do not start new segments
+    assert len(glob.glob(path + '.*.arrow')) == 1
+
+
+def test_round_trip_in_memory_and_on_disk(tmp_path):
+    log = LongtimeLog(path=str(tmp_path / 'agent'), tail_size=4)
+    rows = _rows(20)
+    for row in rows:
+        log.append(dict(row))
+
+    # open rows are read from memory, closed rows from disk
+    pd.testing.assert_frame_equal(log.to_dataframe(), pd.DataFrame.from_records(rows), check_dtype=False)
+    assert log[-1] == rows[-1]
+
+
+def test_segments_in_order_of_writing(tmp_path):
+    path = str(tmp_path / 'agent')
+    log = LongtimeLog(path=path, tail_size=1)
+    rows = []
+    for idx in range(12):
+        # new column starts a new segment
+        row = {'time': idx, 'column_' + str(idx): float(idx)}
+        rows.append(row)
+        log.append(dict(row))
+    log.close()
+
+    assert len(glob.glob(path + '.*.arrow')) == 12
+    df = log.to_dataframe()
+    assert df['time'].tolist() == list(range(12))
+    assert df['column_11'].iloc[11] == 11
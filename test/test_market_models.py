@@ -0,0 +1,148 @@
+"""
+tests of market models
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of market models"
+
+import uuid
+import numpy as np
+import pytest
+from multi_agent_system.base.messages import curve_order_msg, order_msg
+from multi_agent_system.models.market_models import double_auction, piecewise_linear_auction
+
+PRODUCT = {'product_type': 900, 'lead_time': 0}
+
+
+def _order(sender_id, order_type, quantity, price):
+    return order_msg(
+        sender_id=sender_id, reciever_id='market', order_type=order_type, product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantity=quantity, price=price, min_acceptance_ratio=0,
+        coupled_order=None, id=uuid.uuid4())
+
+
+def _curve(sender_id, order_type, quantities, prices, min_quantity=0):
+    return curve_order_msg(
+        sender_id=sender_id, reciever_id='market', order_type=order_type, product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantities=quantities, prices=prices, min_quantity=min_quantity,
+        id=uuid.uuid4())
+
+
+def _clear(market_model, order_book):
+    return market_model({'model_parameters': {},
+                         'model_inputs': {'market_id': 'market', 'order_book': [dict(order) for order in order_book]}})
+
+
+def _quantities(trades):
+    # cleared quantity by trader
+    quantities = {}
+    for trade in trades:
+        quantities[trade['reciever_id']] = quantities.get(trade['reciever_id'], 0) + trade['quantity']
+    return quantities
+
+
+def _volume(trades, trade_type):
+    return sum(trade['quantity'] for trade in trades if trade['trade_type'] == trade_type)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_volume_of_step_order_books_equals_double_auction(seed):
+    rng = np.random.default_rng(seed)
+    order_book = [_order('trader_' + str(idx), 'sell' if idx % 2 else 'buy', float(rng.uniform(1, 10)),
+                         float(rng.uniform(0, 0.3))) for idx in range(12)]
+
+    trades = _clear(piecewise_linear_auction, order_book)
+
+    # uniform price, supply equals demand
+    assert len({trade['price'] for trade in trades}) <= 1
+    assert _volume(trades, 'buy') == pytest.approx(_volume(trades, 'sell'))
+    assert _volume(trades, 'buy') == pytest.approx(_volume(_clear(double_auction, order_book), 'buy'))
+    for trade in trades:
+        order = next(order for order in order_book if order['sender_id'] == trade['reciever_id'])
+        assert trade['quantity'] <= order['quantity'] + 1e-9
+        if order['order_type'] == 'buy':
+            assert order['price'] >= trade['price']
+        else:
+            assert order['price'] <= trade['price']
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_curves_intersect_at_clearing_price(seed):
+    rng = np.random.default_rng(seed)
+    order_book = []
+    for idx in range(6):
+        order_type = 'sell' if idx % 2 else 'buy'
+        quantities = np.cumsum(rng.uniform(1, 5, 3))
+        prices = np.sort(rng.uniform(0, 0.3, 3))
+        order_book.append(_curve('trader_' + str(idx), order_type, quantities.tolist(),
+                                 (prices if order_type == 'sell' else prices[::-1]).tolist()))
+
+    trades = _clear(piecewise_linear_auction, order_book)
+    if not trades:
+        return
+    price = trades[0]['price']
+    assert _volume(trades, 'buy') == pytest.approx(_volume(trades, 'sell'))
+
+    # cleared quantity of every curve lies on its linear segment at clearing price, or within its step if the
+    # clearing price equals the price of a flat segment
+    quantities = _quantities(trades)
+    for order in order_book:
+        prices = np.array([order['prices'][0]] + order['prices'])
+        breakpoints = np.array([0] + order['quantities'])
+        sign = -1 if order['order_type'] == 'buy' else 1
+        lower, upper = (np.interp(sign * price + delta, sign * prices, breakpoints) for delta in (-1e-9, 1e-9))
+        assert lower - 1e-6 <= quantities.get(order['sender_id'], 0) <= upper + 1e-6
+        if upper - lower > 1e-3:
+            assert price in order['prices']
+
+
+def test_curve_equals_ladder_in_limit():
+    # sell curve of converter against flat demand compared to discretized ladder of the same curve
+    curve = _curve('converter', 'sell', [2, 10], [0.1, 0.2])
+    demand = _order('consumer', 'buy', 6, 0.3)
+    flat = _order('supplier', 'sell', 3, 0.25)
+    curve_trades = _clear(piecewise_linear_auction, [curve, demand, flat])
+
+    steps = np.linspace(2, 10, 801)
+    ladder = [_order('converter', 'sell', 2, 0.1)] + [
+        _order('converter', 'sell', float(end - start), float(0.1 + (end - 2) / 80))
+        for start, end in zip(steps[:-1], steps[1:])]
+    ladder_trades = _clear(piecewise_linear_auction, ladder + [demand, flat])
+
+    assert _quantities(curve_trades)['converter'] == pytest.approx(6)
+    assert _quantities(ladder_trades)['converter'] == pytest.approx(6)
+    assert curve_trades[0]['price'] == pytest.approx(0.15)
+    assert ladder_trades[0]['price'] == pytest.approx(0.15, abs=1e-3)
+
+
+def test_min_quantity_rejects_curve():
+    demand = _order('consumer', 'buy', 3, 0.3)
+    supplier = _order('supplier', 'sell', 10, 0.25)
+
+    # minimal load of converter is not cleared, demand is met by supplier
+    trades = _clear(piecewise_linear_auction, [_curve('converter', 'sell', [4, 10], [0.1, 0.2], 4), demand, supplier])
+    assert 'converter' not in _quantities(trades)
+    assert _quantities(trades)['supplier'] == pytest.approx(3)
+
+    trades = _clear(piecewise_linear_auction, [_curve('converter', 'sell', [4, 10], [0.1, 0.2], 2), demand, supplier])
+    assert _quantities(trades) == pytest.approx({'converter': 3, 'consumer': 3})
+
+
+@pytest.mark.parametrize('market_model', [None, 'piecewise_linear_auction'])
+def test_curve_orders_only_on_curve_markets(multi_agent_system, capsys, market_model):
+    # shipped markets clear double auctions, converters place bid ladders there
+    mas = multi_agent_system('2024_01_10_1_day_s5', market_model=market_model, curve_orders=True, delta_orders=True)
+    order_books = mas.run(num_trading_steps=8, rng=np.random.default_rng(0))
+
+    senders = {msg['order']['sender_id'] for order_book in order_books for msg in order_book
+               if msg.get('order') is not None and msg['order']['type'] == 'curve_order_msg'}
+    if market_model is None:
+        assert senders == set()
+    else:
+        assert senders == {name for name, trader in mas.traders.items() if trader.type == 'converter'}
+    assert '[ERROR]' not in capsys.readouterr().out
+    for market in mas.markets.values():
+        assert not any(log['price'] is not None and np.isnan(log['price']) for log in market.trading_table_longtime)
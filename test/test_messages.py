@@ -0,0 +1,56 @@
+"""
+tests of messages
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of messages"
+
+import numpy as np
+import pytest
+from conftest import strip_ids
+from multi_agent_system.base.messages import aggregate_trade_msgs, trade_msg
+
+
+def _trade(reciever_id, trade_type, quantity, price, lead_time=0):
+    return trade_msg(sender_id='market', reciever_id=reciever_id, trade_type=trade_type, product_type=900,
+                     product_lead_time=lead_time, quantity=quantity, price=price)
+
+
+def test_trades_are_netted_at_volume_weighted_price():
+    msgs = aggregate_trade_msgs([
+        _trade('buyer', 'buy', 2, 0.1),
+        _trade('seller', 'sell', 2, 0.1),
+        _trade('buyer', 'buy', 3, 0.2),
+        _trade('buyer', 'sell', 1, 0.3),
+        _trade('buyer', 'buy', 1, 0.4, lead_time=900),
+        _trade('seller', 'sell', 3, 0.2),
+    ])
+
+    # one trade per trader, trade type and product in order of first trade
+    assert [(msg['reciever_id'], msg['trade_type'], msg['product_lead_time']) for msg in msgs] == [
+        ('buyer', 'buy', 0), ('seller', 'sell', 0), ('buyer', 'sell', 0), ('buyer', 'buy', 900)]
+    assert [msg['quantity'] for msg in msgs] == [5, 5, 1, 1]
+    assert [msg['price'] for msg in msgs] == pytest.approx([0.16, 0.16, 0.3, 0.4])
+    assert all(msg['type'] == 'trade_msg' and msg['sender_id'] == 'market' for msg in msgs)
+
+
+def test_trades_without_quantity_carry_last_price():
+    msgs = aggregate_trade_msgs([_trade('buyer', 'buy', 0, 0.1), _trade('buyer', 'buy', 0, 0.2)])
+    assert [(msg['quantity'], msg['price']) for msg in msgs] == [(0, 0.2)]
+    assert aggregate_trade_msgs([]) == []
+
+
+def test_aggregated_trades_keep_quantities_and_costs(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    aggregated_mas = multi_agent_system('2024_01_10_1_day_s5', trade_aggregation=True)
+    order_books = mas.run(num_trading_steps=8, rng=np.random.default_rng(0))
+    aggregated_order_books = aggregated_mas.run(num_trading_steps=8, rng=np.random.default_rng(0))
+
+    # traders recieve equal quantities and costs, thus place equal orders
+    for order_book, aggregated_order_book in zip(order_books, aggregated_order_books):
+        for msg, aggregated_msg in zip(strip_ids(order_book), strip_ids(aggregated_order_book)):
+            assert aggregated_msg == pytest.approx(msg, rel=1e-9, abs=1e-12)
+        assert len(order_book) == len(aggregated_order_book)
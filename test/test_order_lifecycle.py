@@ -0,0 +1,127 @@
+"""
+tests of standing orders and order lifecycle messages
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of standing orders and order lifecycle messages"
+
+import uuid
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from multi_agent_system.base.messages import curve_order_msg, order_lifecycle_msg, order_msg
+from multi_agent_system.components.market import Market
+from multi_agent_system.components.trader import Trader
+
+PRODUCT = {'product_type': 900, 'lead_time': 0}
+EXPERIMENT_CONFIG = {'products': [[900], [[0]]], 'sampling_time': 60}
+TRADERS = ['lifecycle_trader_' + str(idx) for idx in range(4)]
+
+
+def _market(model_type='double_auction'):
+    market = Market(
+        agent_name='market', agent_type='market',
+        agent_config={'pricing_config': {'model_type': model_type, 'model_parameters': {}}},
+        experiment_config=dict(EXPERIMENT_CONFIG))
+    market.setup_agent()
+    return market
+
+
+def _ladder(rng, trader, order_type):
+    # bid ladder of coupled orders with random length, quantities may be zero
+    num_steps = int(rng.integers(0, 5))
+    ids = [uuid.uuid4() for _ in range(num_steps)]
+    prices = np.sort(rng.uniform(0, 0.3, num_steps))
+    return [order_msg(
+        sender_id=trader, reciever_id='market', order_type=order_type, product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantity=float(rng.choice([0, rng.uniform(1, 10)])),
+        price=float(prices[step]), min_acceptance_ratio=float(rng.choice([0., 1.])), coupled_order=ids[step + 1:],
+        id=order_id) for step, order_id in enumerate(ids)]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_standing_orders_equal_full_order_book(seed):
+    rng = np.random.default_rng(seed)
+    market, delta_market = _market(), _market()
+    # standing orders of traders as kept by order deltas of trader
+    traders = {trader: SimpleNamespace(name=trader, standing_orders={}) for trader in TRADERS}
+
+    for _ in range(8):
+        for idx, trader in enumerate(TRADERS):
+            ladder = _ladder(rng, trader, 'sell' if idx % 2 else 'buy')
+            for msg in ladder:
+                market.process_msg(msg)
+            for msg in Trader._Trader__order_deltas(traders[trader], product=PRODUCT, msgs=ladder):
+                assert msg['type'] == 'order_lifecycle_msg'
+                delta_market.process_msg(msg)
+
+        assert delta_market.clear(product=PRODUCT, experiment_time=None) == market.clear(
+            product=PRODUCT, experiment_time=None)
+
+
+def test_unchanged_ladder_sends_no_messages():
+    rng = np.random.default_rng(0)
+    trader = SimpleNamespace(name=TRADERS[0], standing_orders={})
+    ladder = []
+    while len(ladder) < 2:
+        ladder = _ladder(rng, TRADERS[0], 'buy')
+    msgs = Trader._Trader__order_deltas(trader, product=PRODUCT, msgs=ladder)
+    assert [msg['lifecycle'] for msg in msgs] == ['new'] * len(ladder)
+
+    # same ladder with new uuids keeps the uuids of standing orders
+    ids = {msg['id']: uuid.uuid4() for msg in ladder}
+    renewed = [dict(msg, id=ids[msg['id']], coupled_order=[ids[order_id] for order_id in msg['coupled_order']])
+               for msg in ladder]
+    assert Trader._Trader__order_deltas(trader, product=PRODUCT, msgs=renewed) == []
+
+    # shortened ladder amends coupling of first order and cancels remaining standing orders
+    msgs = Trader._Trader__order_deltas(trader, product=PRODUCT, msgs=[dict(renewed[0], coupled_order=[])])
+    assert [msg['lifecycle'] for msg in msgs] == ['amend'] + ['cancel'] * (len(ladder) - 1)
+    assert [msg['id'] for msg in msgs] == [msg['id'] for msg in ladder]
+    assert msgs[0]['order']['coupled_order'] == []
+
+
+def _lifecycle(lifecycle, order):
+    return order_lifecycle_msg(
+        lifecycle=lifecycle, sender_id=order['sender_id'], reciever_id='market', product_type=order['product_type'],
+        product_lead_time=order['product_lead_time'], id=order['id'], order=order)
+
+
+@pytest.mark.parametrize('model_type', ['double_auction', 'double_auction_uniform_pricing', 'piecewise_linear_auction'])
+def test_standing_curve_orders_only_on_curve_markets(model_type):
+    market = _market(model_type)
+    is_curve_market = model_type == 'piecewise_linear_auction'
+    demand = order_msg(
+        sender_id='consumer', reciever_id='market', order_type='buy', product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantity=6., price=0.3, min_acceptance_ratio=0, coupled_order=None,
+        id=uuid.uuid4())
+    order = order_msg(
+        sender_id='converter', reciever_id='market', order_type='sell', product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantity=6., price=0.1, min_acceptance_ratio=0, coupled_order=None,
+        id=uuid.uuid4())
+    curve = curve_order_msg(
+        sender_id='converter', reciever_id='market', order_type='sell', product_type=PRODUCT['product_type'],
+        product_lead_time=PRODUCT['lead_time'], quantities=[2., 5.], prices=[0.1, 0.2], min_quantity=0,
+        id=order['id'])
+
+    # standing order is cleared
+    market.process_msg(_lifecycle('new', order))
+    market.process_msg(dict(demand))
+    assert {trade['reciever_id'] for trade in market.clear(product=PRODUCT, experiment_time=None)} == {
+        'consumer', 'converter'}
+
+    # amendment to curve order is only admitted by curve markets, otherwise standing order is withdrawn
+    market.process_msg(_lifecycle('amend', curve))
+    market.process_msg(dict(demand))
+    trades = market.clear(product=PRODUCT, experiment_time=None)
+    assert all(np.isfinite(trade['price']) for trade in trades)
+    assert bool(trades) == is_curve_market
+
+    # new curve orders are only admitted by curve markets
+    market.process_msg(_lifecycle('cancel', curve))
+    market.process_msg(_lifecycle('new', dict(curve, id=uuid.uuid4())))
+    market.process_msg(dict(demand))
+    assert bool(market.clear(product=PRODUCT, experiment_time=None)) == is_curve_market
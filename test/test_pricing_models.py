@@ -0,0 +1,55 @@
+"""
+tests of pricing models
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of pricing models"
+
+import numpy as np
+import pytest
+from multi_agent_system.models.pricing_models import _bid_ladder, _coupled_orders
+
+
+def _legacy_bid_ladder(quantities, min_acceptance_ratio, minimal_load):
+    # minimum acceptance ratios and coupled orders computed order by order
+    max_quantity = max(quantities)
+    min_acceptance_ratios = []
+    for quantity in quantities:
+        if quantity*min_acceptance_ratio >= max_quantity*minimal_load:
+            min_acceptance_ratios.append(min_acceptance_ratio)
+        elif quantity != 0:
+            min_acceptance_ratios.append(min(1, (minimal_load*max_quantity)/quantity))
+        else:
+            min_acceptance_ratios.append(0)
+
+    coupled_orders = []
+    for idx, quantity in enumerate(quantities):
+        idx_coupled_orders = np.nonzero(quantities + quantity > max_quantity)
+        coupled_orders.append(idx_coupled_orders[0][idx_coupled_orders[0] != idx].tolist())
+    return min_acceptance_ratios, coupled_orders
+
+
+@pytest.mark.parametrize('seed', range(10))
+@pytest.mark.parametrize('num_steps', [1, 2, 10, 200])
+@pytest.mark.parametrize('min_acceptance_ratio, minimal_load', [(0, 0), (0.5, 0.3), (1, 0.5)])
+def test_bid_ladder_equals_loop(seed, num_steps, min_acceptance_ratio, minimal_load):
+    rng = np.random.default_rng(seed)
+    quantities = np.sort(rng.uniform(0, 10, num_steps))
+    quantities[rng.uniform(size=num_steps) < 0.2] = 0
+    expected_ratios, expected_coupled = _legacy_bid_ladder(quantities, min_acceptance_ratio, minimal_load)
+
+    min_acceptance_ratios, indptr, indices = _bid_ladder(quantities, min_acceptance_ratio, minimal_load)
+    assert min_acceptance_ratios.tolist() == expected_ratios
+    assert _coupled_orders(list(range(num_steps)), indptr, indices) == expected_coupled
+
+
+def test_bid_ladder_of_negative_quantities():
+    quantities = np.array([-4., -2., 0., 1.])
+    expected_ratios, expected_coupled = _legacy_bid_ladder(quantities, 0.5, 0.3)
+
+    min_acceptance_ratios, indptr, indices = _bid_ladder(quantities, 0.5, 0.3)
+    assert min_acceptance_ratios.tolist() == expected_ratios
+    assert _coupled_orders(list(range(4)), indptr, indices) == expected_coupled
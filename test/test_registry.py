@@ -0,0 +1,72 @@
+"""
+tests of model registry
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of model registry"
+
+import copy
+import glob
+import os
+import pytest
+from conftest import CONFIG_PATH, TRADER_CLASSES
+from multi_agent_system.base.util import read_config
+from multi_agent_system.components.market import Market
+from multi_agent_system.models import market_models, pricing_models, quantity_assessment_models  # noqa: F401
+from multi_agent_system.models.registry import MODELS, get_model, load_model_plugins
+
+PLUGIN = '''
+from multi_agent_system.models.registry import register_model
+
+
+@register_model('pricing')
+def zero_pricing(parameters):
+    return []
+'''
+
+
+@pytest.mark.parametrize('config_path', sorted(glob.glob(os.path.join(CONFIG_PATH, '*.json'))),
+                         ids=os.path.basename)
+def test_models_of_shipped_configs_are_registered(config_path):
+    for agent in read_config(config_path)['agents']:
+        if agent['type'] == 'market':
+            assert callable(get_model('market', agent['config']['pricing_config']['model_type']))
+        elif agent['type'] in TRADER_CLASSES:
+            assert callable(get_model('quantity_assessment', agent['config']['model_config']['capacity_model']))
+            assert callable(get_model('pricing', agent['config']['model_config']['pricing_model']))
+
+
+def test_unknown_model_fails_at_setup(multi_agent_system):
+    with pytest.raises(ValueError, match='Unknown pricing model: unknown_pricing. Registered models: .*heat_'):
+        get_model('pricing', 'unknown_pricing')
+    with pytest.raises(ValueError, match='Unknown fleet_quantity_assessment model'):
+        get_model('fleet_quantity_assessment', 'unknown')
+
+    config = read_config(os.path.join(CONFIG_PATH, '2024_01_10_1_day_s5.json'))
+    agent = next(agent for agent in config['agents'] if agent['type'] == 'converter')
+    agent_config = copy.deepcopy(agent['config'])
+    agent_config['model_config']['capacity_model'] = 'unknown_capacity'
+    trader = TRADER_CLASSES['converter'](agent_name=agent['name'], agent_type=agent['type'],
+                                         agent_config=agent_config, experiment_config=config['environment_specific'])
+    with pytest.raises(ValueError, match='Unknown quantity_assessment model: unknown_capacity'):
+        trader.setup_agent()
+
+    market = Market(agent_name='market', agent_type='market',
+                    agent_config={'pricing_config': {'model_type': 'unknown_auction', 'model_parameters': {}}},
+                    experiment_config=config['environment_specific'])
+    with pytest.raises(ValueError, match='Unknown market model: unknown_auction'):
+        market.setup_agent()
+
+
+def test_model_plugins(tmp_path, monkeypatch):
+    (tmp_path / 'zero_pricing_plugin.py').write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setitem(MODELS, 'pricing', dict(MODELS['pricing']))
+
+    load_model_plugins(['zero_pricing_plugin'])
+    assert get_model('pricing', 'zero_pricing')({}) == []
+    with pytest.raises(ModuleNotFoundError):
+        load_model_plugins(['missing_plugin'])
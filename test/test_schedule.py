@@ -0,0 +1,105 @@
+"""
+tests of product schedule
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of product schedule"
+
+import glob
+import json
+import os
+import pytest
+from conftest import CONFIG_PATH, strip_ids
+from multi_agent_system.base.schedule import ProductSchedule
+from multi_agent_system.base.util import read_config
+
+# distinct product configurations of shipped configs
+PRODUCTS = sorted({json.dumps(read_config(path)['environment_specific']['products'])
+                   for path in glob.glob(os.path.join(CONFIG_PATH, '*.json'))})
+
+
+def _legacy_step(products, trading_step):
+    # tradable products and horizons as recomputed by controller and traders in every trading step
+    min_product = min(list(products.keys()))
+    if trading_step == 0:
+        tradable_products = products
+    else:
+        tradable_products = {product: lead_times for product, lead_times in products.items()
+                             if trading_step % (product / min_product) == 0}
+    entries = []
+    for product in sorted(list(tradable_products.keys()), reverse=True):
+        for lead_time in sorted(products[product], reverse=True):
+            min_horizon = int(lead_time / min_product)
+            max_horizon = int((lead_time + product) / min_product)
+            entries.append((product, lead_time, min_horizon, max_horizon))
+    return entries
+
+
+@pytest.mark.parametrize('products', PRODUCTS)
+def test_schedule_equals_recomputed_products(products):
+    products = dict(zip(*json.loads(products)))
+    schedule = ProductSchedule(products)
+    assert schedule.num_trading_steps == max(products) // min(products)
+    assert schedule.horizon_length == max(
+        horizon.stop for horizons in schedule.horizons.values() for horizon in horizons.values())
+
+    for trading_step in range(schedule.num_trading_steps):
+        entries = [(entry['product']['product_type'], entry['product']['lead_time'], entry['horizon'].start,
+                    entry['horizon'].stop) for entry in schedule.steps[trading_step]]
+        assert entries == _legacy_step(products, trading_step)
+        for entry in schedule.steps[trading_step]:
+            assert schedule.horizon(**entry['product']) == entry['horizon']
+            assert entry['shorttime_product'] == (entry['product']['product_type'] == min(products))
+
+        # batches keep trading order and hold one product type with disjoint horizons
+        batches = schedule.batches[trading_step]
+        assert [entry for batch in batches for entry in batch] == schedule.steps[trading_step]
+        for batch in batches:
+            assert len({entry['product']['product_type'] for entry in batch}) == 1
+            covered = [idx for entry in batch for idx in range(entry['horizon'].start, entry['horizon'].stop)]
+            assert len(covered) == len(set(covered))
+
+
+def test_batches_of_lead_times():
+    schedule = ProductSchedule({900: [0], 3600: [0, 3600, 7200]})
+    assert [[(entry['product']['product_type'], entry['product']['lead_time']) for entry in batch]
+            for batch in schedule.batches[0]] == [[(3600, 7200), (3600, 3600), (3600, 0)], [(900, 0)]]
+    assert [[entry['product']['lead_time'] for entry in batch] for batch in schedule.batches[1]] == [[0]]
+
+
+def test_allocations_equal_agent_config(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    for name, trader in mas.traders.items():
+        model_parameters = trader.agent_config['model_config']['model_parameters']
+        allocation_names = [allocation_name for allocation_name in (
+            'product_allocation', 'buy_product_allocation', 'sell_product_allocation')
+            if allocation_name in model_parameters]
+        for product_idx, (product_type, lead_times) in enumerate(mas.schedule.products.items()):
+            for lead_idx, lead_time in enumerate(lead_times):
+                allocation = mas.schedule.allocation(name, {'product_type': product_type, 'lead_time': lead_time})
+                assert allocation == {allocation_name: model_parameters[allocation_name][product_idx][lead_idx]
+                                      for allocation_name in allocation_names}
+
+
+@pytest.mark.parametrize('config_name, is_sparse', [('2024_01_10_1_day_s5', True),
+                                                    ('2024_01_10_1_day_s3_2', False)])
+def test_participation_matrix_skips_zero_orders(multi_agent_system, config_name, is_sparse):
+    mas = multi_agent_system(config_name)
+    full_mas = multi_agent_system(config_name, participation_matrix=False)
+
+    # skipped traders have no allocation, consumers and storages always trade the shorttime product
+    for entries in mas.schedule.steps:
+        for entry in entries:
+            for name in set(mas.traders) - set(entry['participants']):
+                assert not any(entry['allocations'][name].values())
+                assert mas.traders[name].type not in ('consumer', 'storage') or not entry['shorttime_product']
+
+    # markets drop orders without quantity, so cleared order books are equal
+    order_books = mas.run(num_trading_steps=8)
+    full_order_books = full_mas.run(num_trading_steps=8)
+    assert (sum(map(len, order_books)) < sum(map(len, full_order_books))) == is_sparse
+    assert [strip_ids([msg for msg in order_book if msg['quantity'] != 0]) for order_book in order_books] == [
+        strip_ids([msg for msg in order_book if msg['quantity'] != 0]) for order_book in full_order_books]
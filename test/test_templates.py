@@ -0,0 +1,56 @@
+"""
+tests of shared templates and product schedule of multi agent systems
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of shared templates"
+
+from multi_agent_system.base.templates import TEMPLATES, clear_templates, shared_dynamic_object
+
+
+def test_agents_share_schedule_of_multi_agent_system(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    for agent in list(mas.traders.values()) + list(mas.markets.values()):
+        assert agent.schedule is mas.schedule
+
+    # every trader registers its allocation once
+    assert list(mas.schedule.allocations) == list(mas.traders)
+    for entries in mas.schedule.steps:
+        for entry in entries:
+            assert len(entry['participants']) == len(set(entry['participants']))
+            assert set(entry['allocations']) == set(mas.traders)
+
+
+def test_schedules_of_multi_agent_systems_are_independent(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    participants = [[list(entry['participants']) for entry in entries] for entries in mas.schedule.steps]
+    other_mas = multi_agent_system('2024_01_10_1_day_s5', participation_matrix=False)
+
+    assert other_mas.schedule is not mas.schedule
+    assert [[entry['participants'] for entry in entries] for entries in mas.schedule.steps] == participants
+
+
+def test_participation_matrix_is_optional(multi_agent_system):
+    mas = multi_agent_system('2024_01_10_1_day_s5')
+    full_mas = multi_agent_system('2024_01_10_1_day_s5', participation_matrix=False)
+
+    num_participants = sum(len(entry['participants']) for entries in mas.schedule.steps for entry in entries)
+    assert num_participants < sum(len(entry['participants']) for entries in full_mas.schedule.steps
+                                  for entry in entries)
+    for entries in full_mas.schedule.steps:
+        for entry in entries:
+            assert entry['participants'] == list(full_mas.traders)
+
+
+def test_clear_templates(multi_agent_system):
+    multi_agent_system('2024_01_10_1_day_s5')
+    dynamic_objects = dict(TEMPLATES['dynamic_object'])
+    assert 'schedule' not in TEMPLATES
+    assert shared_dynamic_object(*next(iter(dynamic_objects))) is next(iter(dynamic_objects.values()))
+
+    clear_templates()
+    assert TEMPLATES == {}
+    assert shared_dynamic_object(*next(iter(dynamic_objects))) is not next(iter(dynamic_objects.values()))
@@ -0,0 +1,103 @@
+"""
+tests of multi-resolution trading table
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of multi-resolution trading table"
+
+import numpy as np
+import pytest
+from multi_agent_system.base.trading_table import TradingTable
+
+VAR_NAMES = ['cleared_energy_pos', 'price_pos']
+LENGTH = 96
+
+
+def _clear(rows, quantity, price):
+    # mean price and cleared energy like trader clearing
+    for row, row_quantity in rows:
+        if row['cleared_energy_pos'] != 0:
+            row['price_pos'] = (row['cleared_energy_pos'] * row['price_pos'] + row_quantity * price) / (
+                row['cleared_energy_pos'] + row_quantity)
+        else:
+            row['price_pos'] = price
+        row['cleared_energy_pos'] += row_quantity
+
+
+def _products(rng, num_periods):
+    # random clearings of products with lead time, e.g. shorttime and day-ahead products
+    for _ in range(num_periods):
+        clearings = []
+        for _ in range(rng.integers(0, 4)):
+            duration = int(rng.choice([1, 4, 24]))
+            start = int(rng.integers(0, LENGTH - duration + 1))
+            clearings.append((slice(start, start + duration), float(rng.uniform(0, 10)), float(rng.uniform(0, 1))))
+        yield clearings
+
+
+def test_uncompressed_trading_table_equals_list_of_rows():
+    rng = np.random.default_rng(0)
+    table = TradingTable(VAR_NAMES, LENGTH)
+    reference = [{var_name: 0 for var_name in VAR_NAMES} for _ in range(LENGTH)]
+
+    for clearings in _products(rng, 200):
+        for horizon, quantity, price in clearings:
+            quantity = quantity / (horizon.stop - horizon.start)
+            _clear(table.split(horizon, quantity), quantity, price)
+            _clear([(reference[idx], quantity) for idx in range(horizon.start, horizon.stop)], quantity, price)
+
+        for var_name in VAR_NAMES:
+            assert table.column(var_name, slice(0, LENGTH)) == pytest.approx(
+                [row[var_name] for row in reference], rel=1e-12, abs=1e-12)
+        assert table[0] == pytest.approx(reference[0])
+
+        # roll trading table like trader at first control step of trading period
+        assert table.roll() == pytest.approx(reference.pop(0))
+        reference.append({var_name: 0 for var_name in VAR_NAMES})
+
+
+def test_compressed_trading_table_conserves_energy():
+    rng = np.random.default_rng(1)
+    fine_length = 24
+    table = TradingTable(VAR_NAMES, LENGTH, resolution=4, fine_length=fine_length)
+    reference = [{var_name: 0 for var_name in VAR_NAMES} for _ in range(LENGTH)]
+    energy_table = energy_reference = 0
+
+    for clearings in _products(rng, 200):
+        for horizon, quantity, price in clearings:
+            quantity = quantity / (horizon.stop - horizon.start)
+            _clear(table.split(horizon, quantity), quantity, price)
+            _clear([(reference[idx], quantity) for idx in range(horizon.start, horizon.stop)], quantity, price)
+
+        # cleared energy is conserved - energy of coarse blocks is spread in time, so only the sum of rolled and
+        # remaining energy is equal
+        assert sum(table.column('cleared_energy_pos', slice(0, LENGTH))) + energy_table == pytest.approx(
+            sum(row['cleared_energy_pos'] for row in reference) + energy_reference)
+        energy_table += table.roll()['cleared_energy_pos']
+        energy_reference += reference.pop(0)['cleared_energy_pos']
+        reference.append({var_name: 0 for var_name in VAR_NAMES})
+
+
+def test_compressed_trading_table_equals_uncompressed_within_fine_horizon():
+    rng = np.random.default_rng(2)
+    fine_length = 24
+    table = TradingTable(VAR_NAMES, LENGTH, resolution=4, fine_length=fine_length)
+    reference = TradingTable(VAR_NAMES, LENGTH)
+
+    for clearings in _products(rng, 50):
+        for horizon, quantity, price in clearings:
+            # products within fine horizon are resolved exactly
+            if horizon.stop > fine_length:
+                continue
+            quantity = quantity / (horizon.stop - horizon.start)
+            _clear(table.split(horizon, quantity), quantity, price)
+            _clear(reference.split(horizon, quantity), quantity, price)
+
+        for var_name in VAR_NAMES:
+            assert table.column(var_name, slice(0, LENGTH)) == pytest.approx(
+                reference.column(var_name, slice(0, LENGTH)))
+        table.roll()
+        reference.roll()
@@ -0,0 +1,47 @@
+"""
+tests of utilities
+"""
+
+__author__ = "Fabian Borst"
+__maintainer__ = "Fabian Borst"
+__email__ = "f.borst@ptw.tu-darmstadt.de"
+__project__ = "Transactive control of linked heating and cooling system at production sites"
+__subject__ = "tests of utilities"
+
+import json
+import os
+from datetime import datetime
+from multi_agent_system.base.util import ObservationBuffer
+
+
+def test_observation_buffer_is_bounded():
+    buffer = ObservationBuffer(maxlen=3)
+    for time in range(10):
+        buffer.append({'time': time})
+
+    assert len(buffer) == 3
+    assert [observation['time'] for observation in buffer] == [7, 8, 9]
+    assert buffer[-1] == {'time': 9}
+
+
+def test_observation_buffer_archives_dropped_observations(tmp_path):
+    archive_path = os.path.join(tmp_path, 'archive', 'trader_observations.jsonl')
+    buffer = ObservationBuffer(maxlen=2, archive_path=archive_path)
+    for time in range(5):
+        buffer.append({'time': time, 'scenario_time': datetime(2024, 1, 10, 0, time)})
+
+    with open(archive_path) as file:
+        archive = [json.loads(line) for line in file]
+    assert [observation['time'] for observation in archive] == list(range(5))
+    assert archive[0]['scenario_time'] == '2024-01-10 00:00:00'
+    assert len(buffer) == 2
+
+
+def test_observations_of_agents_are_bounded(multi_agent_system, tmp_path):
+    mas = multi_agent_system('2024_01_10_1_day_s5', observation_archive=str(tmp_path))
+    mas.run(num_trading_steps=3)
+
+    for name, trader in mas.traders.items():
+        assert len(trader.observations) == trader.observations.maxlen == mas.num_control_steps + 1
+        with open(os.path.join(tmp_path, name + '_observations.jsonl')) as file:
+            assert len(file.readlines()) == 3 * mas.num_control_steps